@@ -2,10 +2,55 @@ import http.server
 import socketserver
 import os
 import sys
+import json
+import re
+import shutil
+import threading
+import time
+import urllib.parse
 
 # Port configuration
 PORT = 8082
 DIRECTORY = "/workspaces/supaconnect-hub/ATTENDRO-REPORT/Research-paper"
+REPO_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", ".."))
+PAPER_FILE = "Attendro_Research_Paper_IRJMETS.html"
+
+sys.path.insert(0, REPO_ROOT)
+from report_gen import assets, daemon, lazy, search, store
+
+# Page thumbnails written by the PDF builds, served under /thumbnails/<name>/
+THUMBNAIL_DIRS = {
+    "final-report": os.path.join(REPO_ROOT, "report_gen", "output", "Attendro_Final_Report_thumbs"),
+    "project-report": os.path.join(REPO_ROOT, "project-report", "Attendro_Final_Report_thumbs"),
+    "research-paper": os.path.join(DIRECTORY, os.path.splitext(PAPER_FILE)[0] + "_thumbs"),
+}
+THUMBNAIL_FILE_RE = re.compile(r'^(page-\d{3}\.png|index\.json)$')
+# Lazy (--lazy) combined reports, served under /reports/<name>/ with their chapter fragments
+LAZY_REPORTS = {
+    "combined": os.path.join(REPO_ROOT, "ATTENDRO-REPORT", "Attendro_Full_Report_lazy.html"),
+    "project": os.path.join(REPO_ROOT, "project-report", "Attendro_Full_Report_lazy.html"),
+}
+SEARCH_LIMIT = 20
+# One search index update at a time (startup, POST /search/reindex, after /save-paper)
+REINDEX_LOCK = threading.Lock()
+# One inline DOCX build at a time when no render daemon runs; other requests are served meanwhile
+DOCX_LOCK = threading.Lock()
+# Minimal search box for /search without a query; results come from /search?q=
+SEARCH_PAGE = """<!DOCTYPE html><html><head><meta charset='utf-8'><title>Search</title>
+<style>body{font-family:sans-serif;max-width:760px;margin:24px auto}input{width:100%;font-size:16px;padding:6px}
+li{margin:12px 0}small{color:#666}mark{background:#ffe066}</style></head>
+<body><input id="q" placeholder="Search chapters, paper and references (term* for prefixes)" autofocus>
+<p id="n"></p><ol id="r"></ol><script>
+const q = document.getElementById('q');
+const esc = s => s.replace(/[&<>"]/g, c => `&#${c.charCodeAt(0)};`);
+q.addEventListener('input', async () => {
+    const res = await (await fetch('/search?q=' + encodeURIComponent(q.value))).json();
+    document.getElementById('n').textContent = res.total + ' matches in ' + res.took_ms + ' ms';
+    document.getElementById('r').innerHTML = res.results.map(r =>
+        `<li><a href="${r.url}">${esc(r.title)}</a> <small>${esc(r.path)}${r.page ? ' p.' + r.page : ''}</small><br>${r.snippet}</li>`).join('');
+});
+</script></body></html>"""
+DOCX_MIME = "application/vnd.openxmlformats-officedocument.wordprocessingml.document"
 
 # Define the handler to manage requests
 class RequestHandler(http.server.SimpleHTTPRequestHandler):
@@ -13,6 +58,236 @@ class RequestHandler(http.server.SimpleHTTPRequestHandler):
         # Serve files from the specific directory
         super().__init__(*args, directory=DIRECTORY, **kwargs)
 
+    def do_GET(self):
+        if self.path.startswith('/thumbnails/'):
+            self.send_thumbnail()
+        elif self.path.startswith('/reports/'):
+            self.send_lazy_report()
+        elif self.path.split('?')[0] == '/search':
+            self.send_search()
+        elif self.path.split('?')[0] == '/export/docx':
+            self.send_docx_export()
+        elif os.path.splitext(self.path.split('?')[0])[1].lower() in assets.EXTENSIONS:
+            self.send_image()
+        else:
+            super().do_GET()
+
+    def send_image(self):
+        # Images go out as their screen-sized variant (report_gen/assets.py);
+        # ?original serves the file as stored
+        url, _, query = self.path.partition('?')
+        path = self.translate_path(url)
+        if query == 'original' or not os.path.isfile(path):
+            super().do_GET()
+            return
+        variant = assets.variant(path, "screen")
+        # Cached variant names carry the source hash, so they make a stable ETag
+        etag = '"%s"' % os.path.basename(variant)
+        if self.headers.get('If-None-Match') == etag:
+            self.send_response(304)
+            self.end_headers()
+            return
+        with open(variant, 'rb') as f:
+            data = f.read()
+        self.send_response(200)
+        self.send_header('Content-type', 'image/jpeg' if variant.endswith(('.jpg', '.jpeg')) else 'image/png')
+        self.send_header('Content-Length', str(len(data)))
+        self.send_header('ETag', etag)
+        self.send_header('Cache-Control', 'no-cache')
+        self.end_headers()
+        self.wfile.write(data)
+
+    def send_thumbnail(self):
+        # /thumbnails/<name>/             -> page viewer
+        # /thumbnails/<name>/index.json   -> page list
+        # /thumbnails/<name>/page-001.png -> one page
+        parts = self.path.split('?')[0].split('/')
+        if len(parts) != 4 or parts[2] not in THUMBNAIL_DIRS:
+            self.send_error(404, "Unknown thumbnail set")
+            return
+        thumb_dir = THUMBNAIL_DIRS[parts[2]]
+        index_path = os.path.join(thumb_dir, "index.json")
+        if not os.path.exists(index_path):
+            self.send_error(404, "Thumbnails not generated yet")
+            return
+        with open(index_path, 'r', encoding='utf-8') as f:
+            index = json.load(f)
+
+        filename = parts[3]
+        if filename == '':
+            imgs = "".join(f'<img src="{name}" loading="lazy" title="{name}">' for name in index["pages"])
+            body = ("<!DOCTYPE html><html><head><meta charset='utf-8'><title>Pages</title>"
+                    "<style>body{background:#f0f2f5;display:flex;flex-wrap:wrap;gap:12px;padding:12px}"
+                    "img{background:#fff;box-shadow:0 2px 8px rgba(0,0,0,.15)}</style></head>"
+                    f"<body>{imgs}</body></html>").encode('utf-8')
+            self.send_response(200)
+            self.send_header('Content-type', 'text/html; charset=utf-8')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+            return
+        if not THUMBNAIL_FILE_RE.match(filename) or not os.path.exists(os.path.join(thumb_dir, filename)):
+            self.send_error(404, "Page not found")
+            return
+
+        # Thumbnails only change when the PDF does, so its hash is a stable ETag
+        etag = '"%s-%s"' % (index["pdf_sha256"][:16], filename)
+        if self.headers.get('If-None-Match') == etag:
+            self.send_response(304)
+            self.end_headers()
+            return
+        with open(os.path.join(thumb_dir, filename), 'rb') as f:
+            data = f.read()
+        self.send_response(200)
+        self.send_header('Content-type', 'image/png' if filename.endswith('.png') else 'application/json')
+        self.send_header('Content-Length', str(len(data)))
+        self.send_header('ETag', etag)
+        self.send_header('Cache-Control', 'no-cache')
+        self.end_headers()
+        self.wfile.write(data)
+
+    def send_lazy_report(self):
+        # /reports/<name>/                          -> shell page (cover, TOC, placeholders)
+        # /reports/<name>/<name>_fragments/<file>   -> one chapter, fetched on scroll
+        # /reports/<name>/<image>                   -> images next to the report
+        # /reports/<name>/<source>                  -> a searched chapter, paper or PDF (/search links here)
+        # Nothing else: the report directories also hold build scripts and datasets
+        parts = self.path.split('?')[0].split('/', 3)
+        if len(parts) != 4 or parts[2] not in LAZY_REPORTS:
+            self.send_error(404, "Unknown report")
+            return
+        shell = LAZY_REPORTS[parts[2]]
+        root = os.path.dirname(shell)
+        if parts[3] == '':
+            path, cache = shell, 'no-cache'
+        else:
+            path = os.path.normpath(os.path.join(root, parts[3]))
+            if not path.startswith(root + os.sep):
+                self.send_error(404, "File not found")
+                return
+            fragment = (os.path.dirname(path) == lazy.fragments_dir(shell.replace("_lazy.html", ".html"))
+                        and lazy.FRAGMENT_RE.match(os.path.basename(path)))
+            image = os.path.splitext(path)[1].lower() in assets.EXTENSIONS
+            if not (fragment or image or path in search.source_files()):
+                self.send_error(404, "File not found")
+                return
+            # Fragment names change with their content, so they never need revalidating
+            cache = 'public, max-age=31536000, immutable' if fragment else 'no-cache'
+            if image and os.path.isfile(path):
+                path = assets.variant(path, "screen")
+        if not os.path.isfile(path):
+            self.send_error(404, "Run `python report.py merge --lazy` / `combine --lazy` first"
+                            if path == shell else "File not found")
+            return
+
+        with open(path, 'rb') as f:
+            data = f.read()
+        self.send_response(200)
+        self.send_header('Content-type', self.guess_type(path))
+        self.send_header('Content-Length', str(len(data)))
+        self.send_header('Cache-Control', cache)
+        self.end_headers()
+        self.wfile.write(data)
+
+    def send_search(self):
+        # /search?q=face+recogn*[&limit=N] -> JSON results with <mark>ed snippets
+        # /search                           -> search page
+        params = urllib.parse.parse_qs(urllib.parse.urlsplit(self.path).query, keep_blank_values=True)
+        if 'q' not in params:
+            body, content_type = SEARCH_PAGE.encode('utf-8'), 'text/html; charset=utf-8'
+        else:
+            try:
+                limit = int(params.get('limit', [SEARCH_LIMIT])[0])
+            except ValueError:
+                self.send_error(400, "limit must be a number")
+                return
+            start = time.perf_counter()
+            # loaded() only reads the manifest; the sources are re-indexed outside requests (reindex())
+            try:
+                found = search.loaded().search(params['q'][0], limit)
+            except Exception as e:
+                print(f"Search failed: {e}")
+                self.send_json(500, {"error": f"search failed: {e}"})
+                return
+            found["took_ms"] = round((time.perf_counter() - start) * 1000, 2)
+            for result in found["results"]:
+                # Sources live under ATTENDRO-REPORT/, which /reports/combined/ serves
+                url = '/reports/combined/' + urllib.parse.quote(os.path.relpath(result["path"], "ATTENDRO-REPORT"))
+                result["url"] = url + (f'#page={result["page"]}' if result["page"] else '')
+            body, content_type = json.dumps(found).encode('utf-8'), 'application/json'
+        self.send_response(200)
+        self.send_header('Content-type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        self.send_header('Cache-Control', 'no-cache')
+        self.end_headers()
+        self.wfile.write(body)
+
+    def send_reindex(self):
+        # POST /search/reindex -> brings the index up to date with the sources now
+        start = time.perf_counter()
+        try:
+            files = reindex()
+        except Exception as e:
+            print(f"Search reindex failed: {e}")
+            self.send_json(500, {"error": f"reindex failed: {e}"})
+            return
+        self.send_json(200, {"files": len(files), "took_ms": round((time.perf_counter() - start) * 1000, 2)})
+
+    def send_json(self, status, data):
+        body = json.dumps(data).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.send_header('Cache-Control', 'no-cache')
+        self.end_headers()
+        self.wfile.write(body)
+
+    def send_docx_export(self):
+        # The report DOCX, built by build_docx.py from the same markdown source.
+        # Builds go through the render daemon when it runs; either way the
+        # artifact store keys them by source version, so downloading an
+        # unchanged report again only costs a hash check.
+        try:
+            reply = daemon.try_submit({"format": "docx", "priority": "interactive"})
+            if reply is not None:
+                path = reply["path"]
+            else:
+                from report_gen import build_docx
+                with DOCX_LOCK:
+                    path = build_docx.generate_docx()
+        except Exception as e:
+            print(f"DOCX export failed: {e}")
+            self.send_error(500, f"DOCX export failed: {e}")
+            return
+
+        etag = '"%s"' % store.file_digest(path)[:32]
+        if self.headers.get('If-None-Match') == etag:
+            self.send_response(304)
+            self.end_headers()
+            return
+        self.send_response(200)
+        self.send_header('Content-type', DOCX_MIME)
+        self.send_header('Content-Length', str(os.path.getsize(path)))
+        self.send_header('Content-Disposition', f'attachment; filename="{os.path.basename(path)}"')
+        self.send_header('ETag', etag)
+        self.send_header('Cache-Control', 'no-cache')
+        self.end_headers()
+        with open(path, 'rb') as f:
+            shutil.copyfileobj(f, self.wfile)
+
+    def queue_preview(self, file_path):
+        # Refresh the PDF + page thumbnails through the render daemon, if it is running.
+        # Autosaves in quick succession collapse into one render there, and previews
+        # go ahead of batch builds; the save itself never waits for it.
+        try:
+            reply = daemon.submit({"format": "paper", "source": file_path,
+                                   "priority": "interactive", "wait": False}, timeout=5)
+            print(f"Preview render {reply['status']} ({reply['job']})")
+        except daemon.DaemonUnavailable:
+            pass
+        except Exception as e:
+            print(f"Preview render not queued: {e}")
+
     def do_POST(self):
         # Handle the save-paper endpoint
         if self.path == '/save-paper':
@@ -26,7 +301,7 @@ class RequestHandler(http.server.SimpleHTTPRequestHandler):
                 html_content = post_data.decode('utf-8')
                 
                 # Define file path
-                file_path = os.path.join(DIRECTORY, "Attendro_Research_Paper_IRJMETS.html")
+                file_path = os.path.join(DIRECTORY, PAPER_FILE)
                 
                 # Write the changes to the file
                 with open(file_path, "w", encoding="utf-8") as f:
@@ -38,6 +313,9 @@ class RequestHandler(http.server.SimpleHTTPRequestHandler):
                 self.end_headers()
                 self.wfile.write(b"File saved successfully")
                 print(f"Successfully saved {file_path}")
+                self.queue_preview(file_path)
+                # The paper is a search source; re-index it without holding up the reply
+                threading.Thread(target=reindex, kwargs={"quiet": True}, daemon=True).start()
                 
             except Exception as e:
                 # Send error response
@@ -45,19 +323,45 @@ class RequestHandler(http.server.SimpleHTTPRequestHandler):
                 self.send_response(500)
                 self.end_headers()
                 self.wfile.write(str(e).encode())
+        elif self.path == '/search/reindex':
+            self.send_reindex()
         else:
             # Handle unknown endpoints
             self.send_error(404, "Endpoint not found")
 
-# Set up the server
-# allow_reuse_address allows restarting immediately
-socketserver.TCPServer.allow_reuse_address = True
-
-try:
-    with socketserver.TCPServer(("", PORT), RequestHandler) as httpd:
-        print(f"Serving HTTP on 0.0.0.0 port {PORT} (http://localhost:{PORT}/) ...")
-        print(f"Serving files from {DIRECTORY}")
-        httpd.serve_forever()
-except KeyboardInterrupt:
-    print("\nServer stopped.")
-    sys.exit(0)
+
+def reindex(quiet=False):
+    """search.current() under REINDEX_LOCK; with quiet, errors are printed instead of raised."""
+    with REINDEX_LOCK:
+        try:
+            return search.current().files
+        except Exception as e:
+            if not quiet:
+                raise
+            print(f"Search reindex failed: {e}")
+            return {}
+
+
+def main(port=PORT):
+    # The report builds behind /export/docx use paths relative to the repository root
+    os.chdir(REPO_ROOT)
+    # allow_reuse_address allows restarting immediately
+    socketserver.ThreadingTCPServer.allow_reuse_address = True
+    # A thread per request, so a DOCX build or reindex doesn't hold up autosave, thumbnails or search
+    socketserver.ThreadingTCPServer.daemon_threads = True
+
+    try:
+        with socketserver.ThreadingTCPServer(("", port), RequestHandler) as httpd:
+            print(f"Serving HTTP on 0.0.0.0 port {port} (http://localhost:{port}/) ...")
+            print(f"Serving files from {DIRECTORY}")
+            # Index up front so the first /search doesn't pay for extracting the PDFs; requests
+            # are served meanwhile and search the index as it stands
+            threading.Thread(target=reindex, kwargs={"quiet": True}, daemon=True).start()
+            httpd.serve_forever()
+    except KeyboardInterrupt:
+        print("\nServer stopped.")
+        sys.exit(0)
+
+
+if __name__ == "__main__":
+    main()
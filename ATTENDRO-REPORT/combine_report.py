@@ -1,7 +1,12 @@
 import os
 import re
+import sys
 from html.parser import HTMLParser
 
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from report_gen import citations, mermaid
+from report_gen.css import StyleCollector
+
 # List of files in order
 files = [
     "Cover_Page.html",
@@ -20,6 +25,24 @@ files = [
 
 base_dir = "/workspaces/supaconnect-hub/ATTENDRO-REPORT"
 output_file = os.path.join(base_dir, "Attendro_Full_Report.html")
+# Inlined in the --lazy shell; every other file is fetched as it scrolls into view
+EAGER_FILES = ("Cover_Page.html", "Acknowledgment.html", "Abstract.html", "Table-of-Contents.html")
+# Builds the DOCX behind the page's download button (/export/docx)
+SERVER_SCRIPT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "Research-paper", "server.py")
+# Where a page opened from disk finds server.py, e.g. http://host:8090 after `report.py serve --port 8090`
+SERVER_URL_ENV = "REPORT_SERVER_URL"
+
+
+def server_url():
+    """REPORT_SERVER_URL, or server.py on this machine at its default PORT."""
+    if os.environ.get(SERVER_URL_ENV):
+        return os.environ[SERVER_URL_ENV].rstrip("/")
+    import importlib.util
+    spec = importlib.util.spec_from_file_location("server", SERVER_SCRIPT)
+    server = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(server)
+    return f"http://localhost:{server.PORT}"
+
 
 # Common Header
 html_start = """<!DOCTYPE html>
@@ -115,6 +138,8 @@ html_start = """<!DOCTYPE html>
         th { background-color: #f2f2f2; font-weight: bold; }
         .mermaid { text-align: center; margin: 24pt 0; }
         .mermaid svg { max-width: 100%; }
+        .mermaid-svg { text-align: center; margin: 24pt 0; }
+        .mermaid-svg svg { max-width: 100%; height: auto; }
         .figure-caption { font-style: italic; text-align: center; margin-bottom: 12pt; font-weight: bold;}
         
         /* TOC Specific */
@@ -205,32 +230,18 @@ html_start = """<!DOCTYPE html>
     </style>
     <script>
         function downloadDoc() {
-            var content = document.getElementById("full-report-content").innerHTML;
-            
-            // Cleanup script tags if any
-            content = content.replace(/<script\\b[^>]*>([\\s\\S]*?)<\\/script>/gm, "");
-            
-            // Create a Blob-based download
-            var header = "<html xmlns:o='urn:schemas-microsoft-com:office:office' " +
-                 "xmlns:w='urn:schemas-microsoft-com:office:word' " +
-                 "xmlns='http://www.w3.org/TR/REC-html40'>" +
-                 "<head><meta charset='utf-8'><title>Attendro Full Report</title></head><body>";
-            var footer = "</body></html>";
-            
-            var source = 'data:application/vnd.ms-word;charset=utf-8,' + encodeURIComponent(header + content + footer);
-            var fileDownload = document.createElement("a");
-            document.body.appendChild(fileDownload);
-            fileDownload.href = source;
-            fileDownload.download = 'Attendro_Full_Report.doc';
-            fileDownload.click();
-            document.body.removeChild(fileDownload);
+            // Built server-side by build_docx.py (see Research-paper/server.py) and
+            // downloaded as a normal file, instead of serializing the page in the tab.
+            // Served by server.py (/reports/combined/) the endpoint is on the same origin.
+            const server = location.protocol.startsWith('http') ? '' : '__SERVER_URL__';
+            window.location.href = server + '/export/docx';
         }
     </script>
 </head>
 <body>
     <div class="controls">
         <button onclick="window.print()" class="btn">Download / Print PDF</button>
-        <button onclick="downloadDoc()" class="btn btn-doc">Download DOC (Combined)</button>
+        <button onclick="downloadDoc()" class="btn btn-doc">Download DOCX (Combined)</button>
     </div>
     <div id="full-report-content">
 """
@@ -299,39 +310,75 @@ class ContentExtractor(HTMLParser):
         if self.recording:
             self.target_content += f"&#{name};"
 
-full_content = ""
-
-for filename in files:
-    filepath = os.path.join(base_dir, filename)
-    if os.path.exists(filepath):
-        print(f"Processing {filename}...")
-        with open(filepath, 'r', encoding='utf-8') as f:
-            content = f.read()
-            
-            # Use the parser to extract INNER content of the main wrapper
-            parser = ContentExtractor()
-            parser.feed(content)
-            
-            inner_content = parser.target_content
-            
-            # Fallback if parser found nothing (e.g. malformed HTML)
-            if not inner_content.strip():
-                # Fallback to crude regex for body
-                body_match = re.search(r'<body>([\s\S]*?)</body>', content)
-                if body_match:
-                     inner_content = body_match.group(1)
-                     # Attempt to clean wrappers crudely
-                     inner_content = re.sub(r'<div class="controls">.*?</div>', '', inner_content, flags=re.DOTALL)
-                     inner_content = re.sub(r'<script\b[^>]*>([\s\S]*?)<\/script>', '', inner_content, flags=re.DOTALL)
-            
-            # Wrap in .paper for the final report
-            if inner_content.strip():
-                if filename == "Cover_Page.html":
-                    full_content += f'<div class="paper cover-page">\n{inner_content}\n</div>\n'
-                else:
-                    full_content += f'<div class="paper">\n{inner_content}\n</div>\n'
-
-with open(output_file, 'w', encoding='utf-8') as f:
-    f.write(html_start + full_content + html_end)
-
-print(f"Created {output_file}")
+
+def main(make_bundle=False, lazy=False):
+    parts = []
+    # <style> blocks found inside the chapters, deduplicated and hoisted into <head>
+    styles = StyleCollector()
+
+    for filename in files:
+        filepath = os.path.join(base_dir, filename)
+        if os.path.exists(filepath):
+            print(f"Processing {filename}...")
+            with open(filepath, 'r', encoding='utf-8') as f:
+                content = f.read()
+
+                # Use the parser to extract INNER content of the main wrapper
+                parser = ContentExtractor()
+                parser.feed(content)
+
+                inner_content = parser.target_content
+
+                # Fallback if parser found nothing (e.g. malformed HTML)
+                if not inner_content.strip():
+                    # Fallback to crude regex for body
+                    body_match = re.search(r'<body>([\s\S]*?)</body>', content)
+                    if body_match:
+                         inner_content = body_match.group(1)
+                         # Attempt to clean wrappers crudely
+                         inner_content = re.sub(r'<div class="controls">.*?</div>', '', inner_content, flags=re.DOTALL)
+                         inner_content = re.sub(r'<script\b[^>]*>([\s\S]*?)<\/script>', '', inner_content, flags=re.DOTALL)
+
+                inner_content = styles.extract(inner_content)
+
+                # Wrap in .paper for the final report
+                if inner_content.strip():
+                    if filename == "Cover_Page.html":
+                        paper = f'<div class="paper cover-page">\n{inner_content}\n</div>\n'
+                    else:
+                        paper = f'<div class="paper">\n{inner_content}\n</div>\n'
+                    parts.append((filename, paper))
+
+    # [@key] citations numbered by first use and References.html's list generated (a no-op without them)
+    parts = citations.resolve_html_parts(parts, "References.html", "combined")
+    full_content = "".join(paper for _, paper in parts)
+
+    page_start = html_start.replace("</head>", styles.render() + "\n</head>", 1)
+    page_start = page_start.replace("__SERVER_URL__", server_url())
+
+    # --lazy: also write a shell with the front matter plus chapter fragments loaded on scroll
+    if lazy:
+        from report_gen import lazy as lazy_output
+        lazy_output.write_lazy(page_start, parts, html_end, output_file, eager=EAGER_FILES, theme="neutral")
+
+    # Pre-render mermaid diagrams to inline SVG; drop the CDN loader when nothing is left for it
+    full_content, remaining = mermaid.prerender(full_content)
+    if remaining:
+        print(f"{remaining} mermaid diagram(s) could not be pre-rendered; keeping the JS loader")
+    else:
+        page_start = mermaid.strip_loader(page_start)
+
+    with open(output_file, 'w', encoding='utf-8') as f:
+        f.write(page_start + full_content + html_end)
+
+    print(f"Created {output_file}")
+
+    # --bundle: also write a self-contained copy (scripts, fonts, images inlined) that opens offline
+    if make_bundle:
+        from report_gen import bundle
+        bundle_path = bundle.write_bundle(page_start + full_content + html_end, base_dir, output_file)
+        print(f"Offline bundle created at: {bundle_path}")
+
+
+if __name__ == "__main__":
+    main(make_bundle="--bundle" in sys.argv, lazy="--lazy" in sys.argv)
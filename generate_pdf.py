@@ -1,6 +1,7 @@
 import os
-import re
-from weasyprint import HTML, CSS
+
+from report_gen import mermaid, patterns, thumbnails
+from report_gen.css import StyleCollector
 
 # ----------------------------------------------------
 # 1. SETUP FILE LIST & PATHS
@@ -124,51 +125,68 @@ th, td {
     margin-top: 6pt;
 }
 
+/* Pre-rendered mermaid diagrams */
+.mermaid-svg {
+    text-align: center;
+    margin: 24pt 0;
+    page-break-inside: avoid;
+}
+.mermaid-svg svg {
+    max-width: 100%;
+    height: auto;
+}
+
 /* Helper for page breaks */
 .page-break {
     page-break-before: always;
 }
 """
 
-# ----------------------------------------------------
-# 3. MERGE CONTENT
-# ----------------------------------------------------
-full_html_content = ""
-
-for i, filename in enumerate(files):
-    path = os.path.join(base_dir, filename)
-    if os.path.exists(path):
-        with open(path, 'r', encoding='utf-8') as f:
-            content = f.read()
-            # Extract body only
-            match = re.search(r'<body[^>]*>(.*?)</body>', content, re.DOTALL)
-            if match:
-                body_inner = match.group(1)
-                
-                # Check for "Chapter 5" which has Mermaid.js
-                # Weasyprint can't execute JS. We'll replace mermaid div with a placeholder text note
-                # because we can't render JS diagrams in Python without a browser.
-                if "mermaid" in body_inner:
-                     body_inner = body_inner.replace('<div class="mermaid">', '<div class="diagram-placehoder" style="border:1px dashed #000; padding:20px; text-align:center;"><strong>[Diagrams generated by JS - Please See HTML Version for Visuals]</strong><br><pre>')
-                     body_inner = body_inner.replace('</div>', '</pre></div>', 1) 
-                     # Note: This is a hack because WeasyPrint is static. 
-                     # Perfect PDF requires Browser Print. We will prioritize the HTML output for the user to print.
-                
-                # Force Page Break for every new file (except the first)
-                # But h1.chapter-name has page-break-before: always; so we are good for chapters.
-                # Title page doesn't need break before.
-                
-                full_html_content += f'<div class="section-wrapper">{body_inner}</div>'
+def main():
+    # ----------------------------------------------------
+    # 3. MERGE CONTENT
+    # ----------------------------------------------------
+    full_html_content = ""
+    # Diagram and inline <style> CSS from every chapter, deduplicated into one stylesheet
+    styles = StyleCollector()
 
-# ----------------------------------------------------
-# 4. GENERATE PDF
-# ----------------------------------------------------
-final_html_str = f"""
+    for i, filename in enumerate(files):
+        path = os.path.join(base_dir, filename)
+        if os.path.exists(path):
+            with open(path, 'r', encoding='utf-8') as f:
+                content = f.read()
+                styles.extract_shared(content)
+                # Extract body only
+                match = patterns.BODY_RE.search(content)
+                if match:
+                    body_inner = styles.extract(match.group(1))
+
+                    # Mermaid blocks are pre-rendered to static SVG (cached by source hash),
+                    # since WeasyPrint can't execute JS. Anything the local renderer can't
+                    # handle falls back to a placeholder pointing at the HTML version.
+                    if "mermaid" in body_inner:
+                        body_inner, remaining = mermaid.prerender(body_inner)
+                        if remaining:
+                            body_inner = mermaid.MERMAID_BLOCK_RE.sub(
+                                lambda m: '<div class="diagram-placehoder" style="border:1px dashed #000; padding:20px; text-align:center;"><strong>[Diagrams generated by JS - Please See HTML Version for Visuals]</strong><br><pre>' + m.group(1) + '</pre></div>',
+                                body_inner)
+
+                    # Force Page Break for every new file (except the first)
+                    # But h1.chapter-name has page-break-before: always; so we are good for chapters.
+                    # Title page doesn't need break before.
+
+                    full_html_content += f'<div class="section-wrapper">{body_inner}</div>'
+
+    # ----------------------------------------------------
+    # 4. GENERATE PDF
+    # ----------------------------------------------------
+    final_html_str = f"""
 <!DOCTYPE html>
 <html>
 <head>
 <meta charset="UTF-8">
 <style>{css_string}</style>
+{styles.render()}
 </head>
 <body>
 {full_html_content}
@@ -176,7 +194,13 @@ final_html_str = f"""
 </html>
 """
 
-# Create PDF
-print("Generating PDF with WeasyPrint...")
-HTML(string=final_html_str).write_pdf(output_pdf)
-print(f"PDF Generated: {output_pdf}")
+    # Create PDF, plus page thumbnails from the same layout
+    from weasyprint import HTML  # heavy (Pango/cairo); only loaded when a PDF is built
+    print("Generating PDF with WeasyPrint...")
+    document = HTML(string=final_html_str).render()
+    thumbnails.write_outputs(document, output_pdf)
+    print(f"PDF Generated: {output_pdf}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,5 +1,8 @@
 import os
-import re
+import sys
+
+from report_gen import mermaid, patterns
+from report_gen.css import StyleCollector
 
 # File order
 files = [
@@ -17,6 +20,8 @@ files = [
 
 base_dir = "project-report"
 output_html = os.path.join(base_dir, "Attendro_Full_Report.html")
+# Inlined in the --lazy shell; every other file is fetched as it scrolls into view
+EAGER_FILES = ("Acknowledgment.html", "Table-of-Contents.html")
 
 # Common CSS
 css = """
@@ -54,6 +59,11 @@ css = """
         width: 100%;
         margin: 20px 0;
     }
+    .mermaid-svg {
+        text-align: center;
+        margin: 20px 0;
+    }
+    .mermaid-svg svg { max-width: 100%; height: auto; }
 </style>
 <script src="https://cdn.jsdelivr.net/npm/mermaid/dist/mermaid.min.js"></script>
 <script>
@@ -66,33 +76,67 @@ css = """
 </script>
 """
 
-full_content = []
-
-for i, filename in enumerate(files):
-    path = os.path.join(base_dir, filename)
-    if os.path.exists(path):
-        with open(path, 'r', encoding='utf-8') as f:
-            content = f.read()
-            
-            # Extract body content only
-            match = re.search(r'<body[^>]*>(.*?)</body>', content, re.DOTALL)
-            if match:
-                body_content = match.group(1)
-                
-                # Add page break before every chapter except the first one
-                if i > 0:
-                    full_content.append('<div class="page-break"></div>')
-                
-                full_content.append(f"<!-- Start of {filename} -->")
-                full_content.append(body_content)
-                full_content.append(f"<!-- End of {filename} -->")
-
-# Write master file
-with open(output_html, 'w', encoding='utf-8') as f:
-    f.write('<!DOCTYPE html>\n<html lang="en">\n<head>\n<meta charset="UTF-8">\n<title>Attendro Full Project Report</title>\n')
-    f.write(css)
-    f.write('\n</head>\n<body>\n')
-    f.write('\n'.join(full_content))
-    f.write('\n</body>\n</html>')
-
-print(f"Master HTML created at: {output_html}")
+
+def main(make_bundle=False, lazy=False):
+    full_content = []
+    parts = []
+    # Diagram and inline <style> CSS from every chapter, deduplicated into one stylesheet
+    styles = StyleCollector()
+
+    for i, filename in enumerate(files):
+        path = os.path.join(base_dir, filename)
+        if os.path.exists(path):
+            with open(path, 'r', encoding='utf-8') as f:
+                content = f.read()
+                styles.extract_shared(content)
+
+                # Extract body content only
+                match = patterns.BODY_RE.search(content)
+                if match:
+                    body_content = styles.extract(match.group(1))
+
+                    # Add page break before every chapter except the first one
+                    part = []
+                    if i > 0:
+                        part.append('<div class="page-break"></div>')
+
+                    part.append(f"<!-- Start of {filename} -->")
+                    part.append(body_content)
+                    part.append(f"<!-- End of {filename} -->")
+                    full_content.extend(part)
+                    parts.append((filename, '\n'.join(part)))
+
+    # Pre-render mermaid diagrams to inline SVG so the browser doesn't lay them out on every open.
+    # The JS loader is only kept if some diagram could not be rendered locally.
+    body_html, remaining = mermaid.prerender('\n'.join(full_content))
+    head_css = css
+    if remaining:
+        print(f"{remaining} mermaid diagram(s) could not be pre-rendered; keeping the JS loader")
+    else:
+        head_css = mermaid.strip_loader(css)
+
+    # Write master file
+    head = '<!DOCTYPE html>\n<html lang="en">\n<head>\n<meta charset="UTF-8">\n<title>Attendro Full Project Report</title>\n'
+    head_end = styles.render() + '\n</head>\n<body>\n'
+    page_end = '\n</body>\n</html>'
+    with open(output_html, 'w', encoding='utf-8') as f:
+        f.write(head + head_css + head_end + body_html + page_end)
+
+    print(f"Master HTML created at: {output_html}")
+
+    # --lazy: also write a shell with the front matter plus chapter fragments loaded on scroll
+    if lazy:
+        from report_gen import lazy as lazy_output
+        lazy_output.write_lazy(head + css + head_end, parts, page_end, output_html, eager=EAGER_FILES)
+
+    # --bundle: also write a self-contained copy (scripts, fonts, images inlined) that opens offline
+    if make_bundle:
+        from report_gen import bundle
+        with open(output_html, 'r', encoding='utf-8') as f:
+            master_html = f.read()
+        bundle_path = bundle.write_bundle(master_html, base_dir, output_html)
+        print(f"Offline bundle created at: {bundle_path}")
+
+
+if __name__ == "__main__":
+    main(make_bundle="--bundle" in sys.argv, lazy="--lazy" in sys.argv)
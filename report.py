@@ -0,0 +1,145 @@
+"""
+One entry point for the report builds.
+
+    python report.py split              # ATTENDRO_PROJECT_REPORT.md -> project-report/*.html chapters
+    python report.py merge [--bundle]   # chapters -> project-report/Attendro_Full_Report.html
+    python report.py combine [--bundle] # ATTENDRO-REPORT chapters -> Attendro_Full_Report.html
+    python report.py combine --lazy     # + a shell page whose chapters load on scroll (merge too)
+    python report.py pdf [--chapters]   # report_gen/output PDF with TOC (or PDF of the chapter files)
+    python report.py pdf --draft        # quick proofreading PDF: plain layout, placeholder figures
+    python report.py docx               # project-report/FINAL_OUTPUT/Attendro_Final_Report.docx
+    python report.py serve [--port N]   # research paper editor, page thumbnails, /export/docx, /search
+    python report.py daemon [--port N]  # warm render daemon; pdf/docx use it when running
+    python report.py build [targets]    # rebuild only what is stale (--dry-run, -j N)
+
+Build modules are imported inside each subcommand, so --help and the HTML-only
+commands never load WeasyPrint or python-docx. Keep this file's top-level
+imports to the standard library; `python report_gen/bench.py startup` checks it.
+"""
+import argparse
+import os
+
+REPO_ROOT = os.path.dirname(os.path.abspath(__file__))
+COMBINE_SCRIPT = "ATTENDRO-REPORT/combine_report.py"
+SERVER_SCRIPT = "ATTENDRO-REPORT/Research-paper/server.py"
+
+
+def load_script(relpath):
+    """Imports a script that isn't part of a package (e.g. under ATTENDRO-REPORT/) by path."""
+    import importlib.util
+    path = os.path.join(REPO_ROOT, relpath)
+    name = os.path.splitext(os.path.basename(path))[0]
+    spec = importlib.util.spec_from_file_location(name, path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def cmd_split(args):
+    import split_report
+    split_report.split_and_save()
+
+
+def cmd_merge(args):
+    import merge_chapters
+    merge_chapters.main(make_bundle=args.bundle, lazy=args.lazy)
+
+
+def cmd_combine(args):
+    load_script(COMBINE_SCRIPT).main(make_bundle=args.bundle, lazy=args.lazy)
+
+
+def cmd_pdf(args):
+    if args.chapters:
+        import generate_pdf
+        generate_pdf.main()
+        return
+    from report_gen import daemon
+    if args.local or daemon.try_submit({"format": "pdf", "draft": args.draft}) is None:
+        from report_gen import build_report_v3
+        build_report_v3.generate(draft=args.draft)
+
+
+def cmd_docx(args):
+    from report_gen import daemon
+    if args.local or daemon.try_submit({"format": "docx"}) is None:
+        from report_gen import build_docx
+        build_docx.generate_docx()
+
+
+def cmd_serve(args):
+    server = load_script(SERVER_SCRIPT)
+    server.main(args.port or server.PORT)
+
+
+def cmd_daemon(args):
+    from report_gen import daemon
+    daemon.main(args.port or daemon.PORT)
+
+
+def cmd_build(args):
+    from report_gen import graph
+    try:
+        ok = graph.build(args.targets, jobs=args.jobs, force=args.force, dry=args.dry_run)
+    except KeyError as e:
+        raise SystemExit(f"report build: {e.args[0]}")
+    if not ok:
+        raise SystemExit(1)
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog="report", description="Attendro report builds")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p = sub.add_parser("split", help="split the markdown source into chapter HTML files")
+    p.set_defaults(func=cmd_split)
+
+    p = sub.add_parser("merge", help="merge project-report chapters into one HTML file")
+    p.add_argument("--bundle", action="store_true", help="also write a self-contained offline copy")
+    p.add_argument("--lazy", action="store_true", help="also write a shell that loads chapters on scroll")
+    p.set_defaults(func=cmd_merge)
+
+    p = sub.add_parser("combine", help="combine the ATTENDRO-REPORT chapters into one HTML file")
+    p.add_argument("--bundle", action="store_true", help="also write a self-contained offline copy")
+    p.add_argument("--lazy", action="store_true", help="also write a shell that loads chapters on scroll")
+    p.set_defaults(func=cmd_combine)
+
+    p = sub.add_parser("pdf", help="build the PDF report (WeasyPrint)")
+    p.add_argument("--chapters", action="store_true",
+                   help="render the project-report chapter files instead of the markdown source")
+    p.add_argument("--draft", action="store_true",
+                   help="fast proofreading layout: no justification, placeholder diagrams and images")
+    p.add_argument("--local", action="store_true", help="build in this process even if the daemon is running")
+    p.set_defaults(func=cmd_pdf)
+
+    p = sub.add_parser("docx", help="build the Word report (python-docx)")
+    p.add_argument("--local", action="store_true", help="build in this process even if the daemon is running")
+    p.set_defaults(func=cmd_docx)
+
+    p = sub.add_parser("serve", help="serve the research paper editor")
+    p.add_argument("--port", type=int, help="port to listen on (default 8082)")
+    p.set_defaults(func=cmd_serve)
+
+    p = sub.add_parser("daemon", help="run the warm render daemon")
+    p.add_argument("--port", type=int, help="port to listen on (default 8083)")
+    p.set_defaults(func=cmd_daemon)
+
+    p = sub.add_parser("build", help="rebuild stale outputs in dependency order")
+    p.add_argument("targets", nargs="*", help="nodes to bring up to date (default: all)")
+    p.add_argument("--dry-run", action="store_true", help="print what would be rebuilt and why")
+    p.add_argument("-j", "--jobs", type=int, default=os.cpu_count() or 1,
+                   help="nodes to build in parallel (default: CPU count)")
+    p.add_argument("--force", action="store_true", help="rebuild even if up to date")
+    p.set_defaults(func=cmd_build)
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    # The build scripts use paths relative to the repository root
+    os.chdir(REPO_ROOT)
+    args.func(args)
+
+
+if __name__ == "__main__":
+    main()
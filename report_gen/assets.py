@@ -0,0 +1,152 @@
+"""
+Image variants for the report back ends. Screenshots and logos are kept at
+full resolution in the repository; each back end embeds a copy sized and
+compressed for its medium instead:
+
+  print   build_report_v3 PDF: 300 dpi across the A4 text block, lossless
+  screen  server.py: 1600 px (2x a typical page column), PNG or JPEG
+  docx    build_docx: 150 dpi across the Word text block, PNG or JPEG
+
+Lossy targets keep whichever encoding is smallest, and the original file is
+used whenever no variant beats it. Variants are cached under .cache/assets by
+source hash and target, so each is encoded once.
+
+    python report_gen/assets.py                # build all variants, print sizes
+    python report_gen/assets.py screen docx    # only those targets
+"""
+import glob
+import io
+import os
+import sys
+import threading
+import urllib.parse
+import urllib.request
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from report_gen import patterns, store
+
+CACHE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), ".cache", "assets")
+# Part of every cached name; bump when the encoding settings change
+ASSET_VERSION = "1"
+JPEG_QUALITY = 85
+
+# target -> (max width in px, dpi written into the file, lossy encodings allowed)
+TARGETS = {
+    "print": (1920, 300, False),  # 16.25 cm text block (A4, 3.5 + 1.25 cm margins) at 300 dpi
+    "screen": (1600, 144, True),
+    "docx": (960, 150, True),     # 16 cm Word text block at 150 dpi
+}
+# Raster images the reports and the research paper embed
+SOURCES = [
+    "ATTENDRO-REPORT/images/*.png",
+    "ATTENDRO-REPORT/image.png",
+    "ATTENDRO-REPORT/Research-paper/*.jpg",
+]
+EXTENSIONS = (".png", ".jpg", ".jpeg")
+
+
+def encode(path, target):
+    """(bytes, extension) of the smallest acceptable encoding of path for target."""
+    from PIL import Image
+
+    max_width, dpi, lossy = TARGETS[target]
+    with open(path, 'rb') as f:
+        original = f.read()
+    ext = os.path.splitext(path)[1].lower()
+    image = Image.open(io.BytesIO(original))
+    image.load()
+
+    candidates = []
+    resized = image.width > max_width
+    if not resized:
+        candidates.append((original, ext))
+    else:
+        image = image.resize((max_width, round(image.height * max_width / image.width)), Image.LANCZOS)
+    # Screenshots are often saved with an alpha channel that is fully opaque
+    if image.mode in ("RGBA", "LA") and image.getchannel("A").getextrema() == (255, 255):
+        image = image.convert(image.mode[:-1])
+
+    buf = io.BytesIO()
+    if ext == ".png":
+        image.save(buf, format="PNG", optimize=True, dpi=(dpi, dpi))
+        candidates.append((buf.getvalue(), ".png"))
+        buf = io.BytesIO()
+    # A JPEG is only re-encoded for print if it had to be scaled down anyway
+    if (lossy or (resized and ext != ".png")) and image.mode in ("RGB", "L"):
+        image.save(buf, format="JPEG", quality=JPEG_QUALITY, optimize=True, progressive=True, dpi=(dpi, dpi))
+        candidates.append((buf.getvalue(), ".jpg"))
+    return min(candidates, key=lambda c: len(c[0]))
+
+
+def variant(path, target):
+    """
+    Path of the cached variant of the image at path for target (print, screen,
+    docx), encoding it on first use. Falls back to path itself if Pillow is
+    missing or the file can't be decoded.
+    """
+    digest = store.file_digest(path)
+    name = f"{digest[:32]}-{target}-v{ASSET_VERSION}"
+    for ext in EXTENSIONS:
+        cached = os.path.join(CACHE_DIR, name + ext)
+        if os.path.exists(cached):
+            return cached
+    try:
+        data, ext = encode(path, target)
+    except (ImportError, OSError) as e:
+        print(f"Warning: using {path} as is ({e})")
+        return path
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    cached = os.path.join(CACHE_DIR, name + ext)
+    # Unique per thread too: server.py encodes variants from concurrent requests
+    tmp = f"{cached}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(tmp, 'wb') as f:
+        f.write(data)
+    os.replace(tmp, cached)
+    return cached
+
+
+def referenced_images(md_text, base_dir):
+    """Local image files a markdown document embeds with ![alt](path), relative to base_dir."""
+    paths = []
+    for m in patterns.MD_IMAGE_RE.finditer(md_text):
+        src = m.group(2)
+        if "://" not in src and not src.startswith("data:"):
+            paths.append(os.path.normpath(os.path.join(base_dir, urllib.parse.unquote(src))))
+    return paths
+
+
+def use_variants(html_text, base_dir, target):
+    """Points every local <img src> in html_text (relative to base_dir) at its variant, as a file: URL."""
+    def replace(m):
+        src = m.group(2)
+        path = os.path.join(base_dir, urllib.parse.unquote(src))
+        if "://" in src or src.startswith("data:") or not os.path.isfile(path):
+            return m.group(0)
+        url = "file://" + urllib.request.pathname2url(os.path.abspath(variant(path, target)))
+        return m.group(1) + url + m.group(3)
+
+    return patterns.IMG_SRC_RE.sub(replace, html_text)
+
+
+def main(targets):
+    paths = sorted({path for pattern in SOURCES for path in glob.glob(pattern)})
+    print(f"  {'asset':<48} {'source':>9}" + "".join(f" {t:>15}" for t in targets))
+    totals = {t: 0 for t in ["source", *targets]}
+    for path in paths:
+        size = os.path.getsize(path)
+        totals["source"] += size
+        row = f"  {path[-48:]:<48} {size / 1024:7.1f}KB"
+        for target in targets:
+            out = os.path.getsize(variant(path, target))
+            totals[target] += out
+            row += f" {out / 1024:7.1f}KB {out / size:4.0%}"
+        print(row)
+    print(f"  {'total':<48} {totals['source'] / 1024:7.1f}KB"
+          + "".join(f" {totals[t] / 1024:7.1f}KB {totals[t] / max(totals['source'], 1):4.0%}" for t in targets))
+
+
+if __name__ == "__main__":
+    unknown = sorted(set(sys.argv[1:]) - set(TARGETS))
+    if unknown:
+        sys.exit(f"unknown target(s): {', '.join(unknown)} (have {', '.join(TARGETS)})")
+    main(sys.argv[1:] or list(TARGETS))
@@ -0,0 +1,267 @@
+"""
+Microbenchmarks for the report pipeline.
+
+    python report_gen/bench.py patterns     # line classification, lines/sec before vs after
+    python report_gen/bench.py sections     # classification cost vs number of configured sections
+    python report_gen/bench.py engines      # markdown engine throughput + conformance; records the default
+    python report_gen/bench.py startup      # `report` CLI cold start via -X importtime, against a target
+    python report_gen/bench.py draft        # WeasyPrint layout per chapter, full vs --draft mode
+    python report_gen/bench.py similarity   # overlap check of N synthetic reports, time and recall
+"""
+import argparse
+import os
+import re
+import subprocess
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from report_gen import patterns, renderer, sections
+
+SOURCE_MD_PATH = "project-report/ATTENDRO_PROJECT_REPORT.md"
+
+REPORT_CLI = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "report.py")
+# Cold start budget for the CLI, in milliseconds of wall time
+STARTUP_TARGET_MS = 100
+# Must not be imported unless a subcommand actually builds something
+HEAVY_MODULES = ("weasyprint", "docx", "markdown", "markdown_it", "pypdf", "PIL", "pypdfium2")
+IMPORTTIME_RE = re.compile(r'^import time:\s+(\d+) \|\s+(\d+) \| ( *)(\S+)$')
+
+
+def timed(fn, *args, repeat=5):
+    """Best-of-N wall time for fn(*args), in seconds."""
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn(*args)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def report(label, count, unit, seconds):
+    print(f"  {label:<28} {count / seconds:>14,.0f} {unit}/s  ({seconds * 1000:.1f} ms)")
+
+
+def load_lines(copies):
+    with open(SOURCE_MD_PATH, 'r', encoding='utf-8') as f:
+        return f.read().split('\n') * copies
+
+
+# Reference copy of the per-line logic the scripts used before patterns.py:
+# an uncompiled re.match per line plus the chained startswith() checks.
+def legacy_scan(lines):
+    found = 0
+    for line in lines:
+        if re.match(r'^###\s+\d+\.\d+\s+', line):
+            line = line.replace('###', '##', 1)
+        if "## Title Page" in line:
+            found += 1
+        elif line.startswith("## Certificate"):
+            found += 1
+        elif line.startswith("## Acknowledgement"):
+            found += 1
+        elif line.startswith("## Index") or line.startswith("## Table of Contents"):
+            found += 1
+        elif line.startswith("## Abstract"):
+            found += 1
+        elif line.startswith("## List of Figures"):
+            found += 1
+        elif line.startswith("## List of Tables"):
+            found += 1
+        elif line.startswith("# Chapter"):
+            found += 1
+        elif line.startswith("# References"):
+            found += 1
+    return found
+
+
+def registry_scan(lines):
+    found = 0
+    promote = patterns.SECTION_HEADING_RE.match
+    classify = sections.classify_line
+    for line in lines:
+        if promote(line):
+            line = line.replace('###', '##', 1)
+        if classify(line):
+            found += 1
+    return found
+
+
+def bench_patterns(args):
+    lines = load_lines(args.copies)
+    assert legacy_scan(lines) == registry_scan(lines)
+    print(f"Line classification over {len(lines):,} lines:")
+    report("before (re.match + chain)", len(lines), "lines", timed(legacy_scan, lines))
+    report("after (registry + trie)", len(lines), "lines", timed(registry_scan, lines))
+
+
+def bench_sections(args):
+    lines = load_lines(args.copies)
+    print(f"Section classification over {len(lines):,} lines:")
+    for extra in (0, 100, 1000):
+        # Pad the real table with synthetic front-matter sections
+        table = sections.SECTION_TABLE + [("##", f"Annexure {i}", f"Annexure {i}", "special") for i in range(extra)]
+        trie = sections.build_trie(table)
+        seconds = timed(lambda: [sections.classify_line(line, trie) for line in lines])
+        report(f"{len(table)} section types", len(lines), "lines", seconds)
+
+
+def bench_engines(args):
+    texts = renderer.load_sources()
+    size = sum(len(t.encode("utf-8")) for t in texts)
+    print(f"Markdown engines over {len(texts)} documents ({size / 1024:.0f} KB), reference {renderer.REFERENCE_ENGINE}:")
+    results = {}
+    for name, factory in renderer.ENGINES.items():
+        # cache_size=0 so every pass measures the parser, not the block cache
+        engine = factory()
+        engine.cache_size = 0
+        seconds = timed(lambda: [engine.render(t) for t in texts], repeat=args.repeat)
+        mismatches = renderer.conformance(name, texts)
+        results[name] = {"throughput": size / seconds, "mismatches": len(mismatches)}
+        report(name, size / 1024, "KB", seconds)
+        print(f"  {'':<28} {'conformant' if not mismatches else f'{len(mismatches)} blocks differ'}")
+        for block, expected, got in mismatches[:args.show]:
+            expected, got = renderer.normalize_html(expected), renderer.normalize_html(got)
+            at = next((i for i, (a, b) in enumerate(zip(expected, got)) if a != b), min(len(expected), len(got)))
+            print(f"    in block: {block.splitlines()[0][:60]!r}")
+            print(f"      {renderer.REFERENCE_ENGINE}: ...{expected[max(0, at - 30):at + 40]!r}")
+            print(f"      {name}: ...{got[max(0, at - 30):at + 40]!r}")
+    engine = renderer.save_selection(results)
+    print(f"Default engine: {engine} (saved to {renderer.ENGINE_FILE})")
+
+
+def import_profile(argv):
+    """
+    Runs `python -X importtime report.py <argv>` in a fresh interpreter.
+    Returns (wall seconds, {top-level module: cumulative import microseconds}).
+    """
+    start = time.perf_counter()
+    proc = subprocess.run([sys.executable, "-X", "importtime", REPORT_CLI, *argv],
+                          capture_output=True, text=True)
+    wall = time.perf_counter() - start
+    modules = {}
+    for line in proc.stderr.splitlines():
+        m = IMPORTTIME_RE.match(line)
+        if m and not m.group(3):
+            modules[m.group(4)] = int(m.group(2))
+    return wall, modules
+
+
+def bench_startup(args):
+    ok = True
+    print(f"`report` CLI cold start (best of {args.repeat}), target {args.target} ms:")
+    for argv in (["--help"], ["merge", "--help"], ["pdf", "--help"], ["docx", "--help"]):
+        wall, modules = min((import_profile(argv) for _ in range(args.repeat)), key=lambda r: r[0])
+        heavy = sorted(m for m in modules if m.split(".")[0] in HEAVY_MODULES)
+        passed = wall * 1000 <= args.target and not heavy
+        ok = ok and passed
+        slowest = sorted(modules.items(), key=lambda item: -item[1])[:3]
+        print(f"  report {' '.join(argv):<16} {wall * 1000:7.1f} ms  imports {sum(modules.values()) / 1000:6.1f} ms"
+              f"  {'ok' if passed else 'FAIL'}")
+        print(f"  {'':<23} slowest: {', '.join(f'{name} {us / 1000:.1f} ms' for name, us in slowest)}")
+        if heavy:
+            print(f"  {'':<23} heavy modules imported: {', '.join(heavy)}")
+    if not ok:
+        sys.exit(1)
+
+
+def bench_draft(args):
+    from weasyprint import HTML
+    from report_gen import build_report_v3 as v3
+    with open(SOURCE_MD_PATH, 'r', encoding='utf-8') as f:
+        md_text = f.read()
+
+    print(f"WeasyPrint layout, full vs draft (best of {args.repeat}):")
+    print(f"  {'section':<40} {'full':>9} {'draft':>9} {'speedup':>8}")
+    totals = {False: 0.0, True: 0.0}
+    bodies = {draft: v3.render_sections(md_text, draft)[1] for draft in totals}
+    # One section-wrapper per chapter in the main body
+    chapters = {draft: body.split("<div class='section-wrapper'>")[1:] for draft, body in bodies.items()}
+    for full_part, draft_part in zip(chapters[False], chapters[True]):
+        title = re.search(r'<h1>(.*?)</h1>', full_part).group(1)
+        seconds = {}
+        for draft, part in ((False, full_part), (True, draft_part)):
+            html = v3.wrap_html(f"<div class='section-wrapper'>{part}", draft)
+            seconds[draft] = timed(lambda: HTML(string=html).render(), repeat=args.repeat)
+            totals[draft] += seconds[draft]
+        print(f"  {title[:40]:<40} {seconds[False] * 1000:7.0f}ms {seconds[True] * 1000:7.0f}ms "
+              f"{seconds[False] / seconds[True]:7.1f}x")
+    print(f"  {'all chapters':<40} {totals[False] * 1000:7.0f}ms {totals[True] * 1000:7.0f}ms "
+          f"{totals[False] / totals[True]:7.1f}x")
+
+
+def bench_similarity(args):
+    import random
+    from report_gen import similarity
+
+    index = similarity.ReferenceIndex()
+    base = similarity.report_passages(SOURCE_MD_PATH)
+    ref_words = {key: similarity.reference_words(entry) for key, entry in index.entries.items()}
+    rng = random.Random(1)
+    # Each synthetic report is the real one with --plant paragraphs replaced by a reference span
+    reports, planted = [], []
+    for _ in range(args.reports):
+        passages, copied = list(base), set()
+        for slot in rng.sample(range(len(passages)), args.plant):
+            key = rng.choice(sorted(ref_words))
+            ws = ref_words[key][0]
+            start = rng.randrange(max(1, len(ws) - 80))
+            passages[slot] = (passages[slot][0], " ".join(ws[start:start + rng.randint(40, 80)]))
+            copied.add((passages[slot][0], key))
+        reports.append(passages)
+        planted.append(copied)
+
+    start = time.perf_counter()
+    segments = [similarity.passage_segment(passages) for passages in reports]
+    signed = time.perf_counter() - start
+    found = [similarity.check_segment(index, segment, passages, ref_words=ref_words)
+             for segment, passages in zip(segments, reports)]
+    checked = time.perf_counter() - start - signed
+
+    windows = sum(len(segment["windows"]) for segment in segments)
+    hits = sum(len(copied & {(o["passage"], o["reference"]) for o in overlaps})
+               for copied, overlaps in zip(planted, found))
+    print(f"{args.reports} reports x {len(index.entries)} references "
+          f"({windows:,} report windows, {len(index.windows):,} reference windows):")
+    print(f"  signatures  {signed:6.2f}s  ({windows / signed:,.0f} windows/s; cached per file in real runs)")
+    print(f"  LSH + check {checked:6.2f}s  ({windows * len(index.windows) / checked:,.0f} window pairs/s equivalent)")
+    print(f"  recall      {hits}/{args.reports * args.plant} planted copies found")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Report pipeline microbenchmarks")
+    sub = parser.add_subparsers(dest="bench", required=True)
+
+    p = sub.add_parser("patterns", help="heading/section line classification")
+    p.add_argument("--copies", type=int, default=200, help="repeat the report source N times")
+    p.set_defaults(func=bench_patterns)
+
+    p = sub.add_parser("sections", help="table-driven section classification scaling")
+    p.add_argument("--copies", type=int, default=200, help="repeat the report source N times")
+    p.set_defaults(func=bench_sections)
+
+    p = sub.add_parser("engines", help="markdown engine throughput and conformance")
+    p.add_argument("--repeat", type=int, default=5, help="best of N timed passes")
+    p.add_argument("--show", type=int, default=3, help="differing blocks to print per engine")
+    p.set_defaults(func=bench_engines)
+
+    p = sub.add_parser("startup", help="report CLI cold start time (-X importtime)")
+    p.add_argument("--repeat", type=int, default=5, help="best of N cold starts")
+    p.add_argument("--target", type=float, default=STARTUP_TARGET_MS, help="wall time budget in ms")
+    p.set_defaults(func=bench_startup)
+
+    p = sub.add_parser("draft", help="per-chapter layout time, full vs draft mode")
+    p.add_argument("--repeat", type=int, default=3, help="best of N layouts")
+    p.set_defaults(func=bench_draft)
+
+    p = sub.add_parser("similarity", help="MinHash/LSH overlap check over synthetic reports")
+    p.add_argument("--reports", type=int, default=200, help="number of synthetic reports")
+    p.add_argument("--plant", type=int, default=3, help="reference spans copied into each report")
+    p.set_defaults(func=bench_similarity)
+
+    args = parser.parse_args()
+    args.func(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,17 +1,24 @@
+import glob
 import os
-import markdown
-import re
+import docx
 from docx import Document
 from docx.shared import Pt, Cm
 from docx.enum.text import WD_ALIGN_PARAGRAPH, WD_LINE_SPACING
 from docx.oxml.ns import qn
 from docx.shared import RGBColor
 
+import sys
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from report_gen import assets, citations, daemon, patterns, reproducible, store
+from report_gen.sections import classify_line
+
 # Configuration
 CONTENT_DIR = "report_gen/content"
 SOURCE_MD_PATH = "project-report/ATTENDRO_PROJECT_REPORT.md"
 DIAGRAMS_MARKDOWN_DIR = "docs/diagrams"
 OUTPUT_DOCX = "project-report/FINAL_OUTPUT/Attendro_Final_Report.docx"
+# A4 less the 3.5 cm + 1.25 cm side margins; wider images are scaled down to fit
+TEXT_WIDTH = Cm(16.25)
 
 # Mapping of Diagrams (From Figure List to File)
 # 1. System Architecture Diagram – Figure 1 -> docs/diagrams/01-system-architecture.md
@@ -107,18 +114,32 @@ def extract_diagram_text(filepath):
         content = f.read()
         
     # Regex to find content inside ``` ... ```
-    match = re.search(r'```(.*?)```', content, re.DOTALL)
+    match = patterns.CODE_FENCE_RE.search(content)
     if match:
         return match.group(1).strip()
     return None
 
+def add_image(doc, src, caption):
+    """Embeds a markdown image (path relative to the source file) using its docx-sized variant."""
+    path = os.path.join(os.path.dirname(SOURCE_MD_PATH), src)
+    if not os.path.isfile(path):
+        doc.add_paragraph(f"[Missing image: {src}]", style='Normal')
+        return
+    picture = doc.add_picture(assets.variant(path, "docx"))
+    if picture.width > TEXT_WIDTH:
+        picture.height = int(picture.height * TEXT_WIDTH / picture.width)
+        picture.width = TEXT_WIDTH
+    doc.paragraphs[-1].alignment = WD_ALIGN_PARAGRAPH.CENTER
+    if caption:
+        doc.add_paragraph(caption, style='Caption')
+
 def process_markdown_content(md_content):
     # Same as before, promote headers
     lines = md_content.split('\n')
     processed_lines = []
     
     for line in lines:
-        if re.match(r'^###\s+\d+\.\d+\s+', line):
+        if patterns.SECTION_HEADING_RE.match(line):
             line = line.replace('###', '##', 1)
         
         # Determine if we need to insert a diagram here?
@@ -140,35 +161,11 @@ def parse_structure(lines):
     
     # We will split strictly by Headers
     for line in lines:
-        # Title Page Marker
-        if "## Title Page" in line:
-            structure.append(current_section)
-            current_section = {"title": "Title Page", "type": "special", "content": []}
-        elif "## Certificate" in line:
-            structure.append(current_section)
-            current_section = {"title": "Certificate", "type": "special", "content": []}
-        elif "## Acknowledgement" in line:
-            structure.append(current_section)
-            current_section = {"title": "Acknowledgement", "type": "special", "content": []}
-        elif "## Table of Contents" in line or "## Index" in line:
-             structure.append(current_section)
-             current_section = {"title": "Table of Contents", "type": "special", "content": []}
-        elif "## Abstract" in line:
-             structure.append(current_section)
-             current_section = {"title": "Abstract", "type": "special", "content": []}
-        elif "## List of Figures" in line:
-             structure.append(current_section)
-             current_section = {"title": "List of Figures", "type": "special", "content": []}
-        elif "## List of Tables" in line:
-             structure.append(current_section)
-             current_section = {"title": "List of Tables", "type": "special", "content": []}
-        elif line.startswith("# Chapter"):
+        heading = classify_line(line)
+        if heading:
             structure.append(current_section)
-            title = line.strip("# ").strip()
-            current_section = {"title": title, "type": "chapter", "content": []}
-        elif line.startswith("# References"):
-            structure.append(current_section)
-            current_section = {"title": "References", "type": "ref", "content": []}
+            section_type, title = heading
+            current_section = {"title": title, "type": section_type, "content": []}
         else:
             current_section['content'].append(line)
             
@@ -231,12 +228,26 @@ def add_certificate(doc):
             
     doc.add_page_break()
 
-def generate_docx():
+def generate_docx(md_content=None):
+    """Builds the DOCX from md_content (default: SOURCE_MD_PATH) and returns its path."""
+    if md_content is None:
+        with open(SOURCE_MD_PATH, 'r', encoding='utf-8') as f:
+            md_content = f.read()
+    md_content = citations.resolve_markdown(md_content)
+
+    # Same source, images, diagrams, python-docx and build code as a stored build: reuse its output
+    artifacts = store.ArtifactStore()
+    images = assets.referenced_images(md_content, os.path.dirname(SOURCE_MD_PATH))
+    key = store.input_key(md_content, docx.__version__, assets.ASSET_VERSION, *store.read_files(images),
+                          *store.read_files(sorted(glob.glob(os.path.join(DIAGRAMS_MARKDOWN_DIR, "*.md")))),
+                          *store.read_files(store.code_files(__file__, skip=store.HANDOFF_MODULES)))
+    if artifacts.checkout(key):
+        print(f"Inputs unchanged; restored {OUTPUT_DOCX} from the artifact store")
+        return OUTPUT_DOCX
+    store.detach([OUTPUT_DOCX])
+
     doc = Document()
     setup_document_styles(doc)
-    
-    with open(SOURCE_MD_PATH, 'r', encoding='utf-8') as f:
-        md_content = f.read()
         
     lines = process_markdown_content(md_content)
     structure = parse_structure(lines)
@@ -265,7 +276,10 @@ def generate_docx():
             line = line.strip()
             if not line: continue
             
-            if line.startswith("## "): 
+            image = patterns.MD_IMAGE_RE.match(line)
+            if image:
+                add_image(doc, image.group(2), image.group(1))
+            elif line.startswith("## "): 
                 # Promoted H2
                 h2_text = line.replace("##", "").strip().upper()
                 doc.add_paragraph(h2_text, style='Heading 2')
@@ -292,7 +306,7 @@ def generate_docx():
                 doc.add_paragraph(h3_text, style='Heading 3')
             elif line.startswith("- ") or line.startswith("* "):
                 p = doc.add_paragraph(line.lstrip("- *"), style='List Bullet')
-            elif bool(re.match(r'^\d+\.', line)):
+            elif patterns.NUMBERED_ITEM_RE.match(line):
                  p = doc.add_paragraph(line, style='List Number') # This often needs cleaner parsing for just the text
             else:
                  # Standard Paragraph
@@ -316,8 +330,13 @@ def generate_docx():
                           doc.add_paragraph(dia_text, style='CodeBlock')
         
     
-    doc.save(OUTPUT_DOCX)
+    os.makedirs(os.path.dirname(OUTPUT_DOCX), exist_ok=True)
+    reproducible.save_docx(doc, OUTPUT_DOCX)
     print(f"DOCX Generated: {OUTPUT_DOCX}")
+    artifacts.commit(key, [OUTPUT_DOCX])
+    return OUTPUT_DOCX
 
 if __name__ == "__main__":
-    generate_docx()
+    # Hand the build to a running render daemon (report_gen/daemon.py) if there is one
+    if daemon.try_submit({"format": "docx"}) is None:
+        generate_docx()
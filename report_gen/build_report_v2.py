@@ -1,13 +1,19 @@
 import os
-import markdown
-import re
-from weasyprint import HTML, CSS
+
+import sys
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from report_gen import citations, patterns, pdfopt, renderer, store, thumbnails
+from report_gen.sections import classify_line
 
 # Configuration
 OUTPUT_DIR = "report_gen/output"
 CONTENT_DIR = "report_gen/content"
 SOURCE_MD_PATH = "project-report/ATTENDRO_PROJECT_REPORT.md"
 
+# One parser (default engine, see renderer.py) for all sections, with rendered blocks memoized
+MARKDOWN_ENGINE = renderer.default_engine()
+MARKDOWN = renderer.get_renderer(MARKDOWN_ENGINE)
+
 CSS_STYLES = """
 @page {
     size: A4;
@@ -158,9 +164,9 @@ def process_markdown_content(md_content):
     for line in lines:
         # Regex to find "### X.X " but NOT "### X.X.X"
         # If it matches ### X.X, change to ## X.X
-        if re.match(r'^###\s+\d+\.\d+\s+', line):
+        if patterns.SECTION_HEADING_RE.match(line):
             line = line.replace('###', '##', 1)
-        elif re.match(r'^###\s+\d+\.\d+\.\d+\s+', line):
+        elif patterns.SUBSECTION_HEADING_RE.match(line):
             # It is a subsection, keep as ### (H3)
             pass
         
@@ -187,50 +193,19 @@ def parse_sections(md_text):
     pass_intro = False
     
     for line in lines:
-        # Front Matter Markers
-        if "## Title Page" in line:
-            flush(current_title, current_content) 
-            current_title = "Title Page"
-            current_content = []
+        # Section markers come from the table in report_gen/sections.py
+        heading = classify_line(line)
+        if heading and heading[1] == "Title Page":
             pass_intro = True
-            continue # Don't include the marker line
             
         if not pass_intro:
             continue
             
-        if line.startswith("## Certificate"):
-            flush(current_title, current_content)
-            current_title = "Certificate"
-            current_content = []
-        elif line.startswith("## Acknowledgement"):
-            flush(current_title, current_content)
-            current_title = "Acknowledgement"
-            current_content = []
-        elif line.startswith("## Index") or line.startswith("## Table of Contents"):
+        if heading:
+            # Don't include the marker line; the H1 is added manually from the title
             flush(current_title, current_content)
-            current_title = "Table of Contents"
+            current_title = heading[1]
             current_content = []
-        elif line.startswith("## Abstract"):
-            flush(current_title, current_content)
-            current_title = "Abstract"
-            current_content = []
-        elif line.startswith("## List of Figures"):
-            flush(current_title, current_content)
-            current_title = "List of Figures"
-            current_content = []
-        elif line.startswith("## List of Tables"):
-             flush(current_title, current_content)
-             current_title = "List of Tables"
-             current_content = []
-        # Chapters (Using single #)
-        elif line.startswith("# Chapter"):
-            flush(current_title, current_content)
-            current_title = line.strip("# ").strip()
-            current_content = [] # Don't include the H1 line in content, we'll add it manually as H1
-        elif line.startswith("# References"):
-             flush(current_title, current_content)
-             current_title = "References"
-             current_content = []
         else:
             current_content.append(line)
             
@@ -280,6 +255,18 @@ def create_certificate_html():
 def generate():
     with open(SOURCE_MD_PATH, 'r', encoding='utf-8') as f:
         raw = f.read()
+    # [@key] citations numbered and the References list generated, as in build_report_v3
+    raw = citations.resolve_markdown(raw)
+
+    pdf_path = os.path.join(OUTPUT_DIR, "Attendro_Final_Report.pdf")
+    artifacts = store.ArtifactStore()
+    key = store.input_key(raw, CSS_STYLES, MARKDOWN_ENGINE, store.package_version("weasyprint"), pdfopt.image_quality(),
+                          *store.read_files(store.code_files(__file__, skip=store.HANDOFF_MODULES)))
+    if artifacts.checkout(key):
+        print(f"Inputs unchanged; restored {pdf_path} and {CONTENT_DIR} from the artifact store")
+        return
+    store.detach([pdf_path, CONTENT_DIR])
+    outputs = [pdf_path]
         
     refined_md = process_markdown_content(raw)
     sections = parse_sections(refined_md)
@@ -291,7 +278,7 @@ def generate():
         content = sec['content']
         
         # Generate HTML from MD
-        html_content = markdown.markdown(content, extensions=['tables'])
+        html_content = MARKDOWN.render(content)
         
         # Logic for Special Pages
         if "Title Page" in title:
@@ -316,15 +303,18 @@ def generate():
         
         with open(fpath, 'w', encoding='utf-8') as f:
             f.write(page_html)
+        outputs.append(fpath)
             
         full_body_html += f"\n<div class='section-wrapper'>{final_section}</div>\n"
 
     # Final PDF
-    pdf_path = os.path.join(OUTPUT_DIR, "Attendro_Final_Report.pdf")
     final_doc = f"""<!DOCTYPE html><html><head><meta charset="UTF-8"><style>{CSS_STYLES}</style></head><body>{full_body_html}</body></html>"""
     
-    HTML(string=final_doc).write_pdf(pdf_path)
+    from weasyprint import HTML  # heavy (Pango/cairo); imported only when a PDF is built
+    # Same writer as build_report_v3: pinned dates under SOURCE_DATE_EPOCH, then pdfopt.py
+    thumbnails.write_outputs(HTML(string=final_doc).render(), pdf_path, thumbs=False)
     print("PDF Generated Successfully.")
+    artifacts.commit(key, outputs)
 
 if __name__ == "__main__":
     generate()
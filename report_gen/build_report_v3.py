@@ -1,7 +1,10 @@
 import os
-import markdown
-import re
-from weasyprint import HTML, CSS
+
+import sys
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from report_gen import assets, citations, daemon, figures, patterns, pdfopt, renderer, reproducible, store, thumbnails, toc
+from report_gen.figures import FigurePlan
+from report_gen.sections import classify_line
 
 # Configuration
 OUTPUT_DIR = "report_gen/output"
@@ -9,6 +12,16 @@ CONTENT_DIR = "report_gen/content"
 SOURCE_MD_PATH = "project-report/ATTENDRO_PROJECT_REPORT.md"
 DIAGRAMS_DIR = "project-report/diagrams"
 
+# One parser (default engine, see renderer.py) for all sections, with rendered blocks memoized
+MARKDOWN_ENGINE = renderer.default_engine()
+MARKDOWN = renderer.get_renderer(MARKDOWN_ENGINE)
+
+# Files besides the markdown source that shape the output (artifact store key)
+DIAGRAM_FILES = [os.path.join(DIAGRAMS_DIR, row[3]) for row in figures.FIGURE_TABLE]
+# This script and every repo module it imports (renderer, patterns, sections, thumbnails, ...);
+# daemon.py only hands builds over, and reaches the other builders
+BUILD_FILES = store.code_files(__file__, skip=store.HANDOFF_MODULES)
+
 # Base CSS
 BASE_CSS = """
 @page {
@@ -162,6 +175,32 @@ th, td {
 
 """
 
+# Draft mode (generate(draft=True)) for proofreading: generic fonts, ragged
+# right, single spacing, and fixed-size boxes in place of diagrams and images,
+# so layout skips font matching, justification and the diagram flexboxes.
+DRAFT_CSS = """
+@page {
+    size: A4;
+    margin: 2cm;
+    @bottom-center { content: counter(page); font-size: 9pt; }
+    @top-right { content: "DRAFT"; font-size: 9pt; color: #999; }
+}
+body { font-family: serif; font-size: 11pt; line-height: 1.3; margin: 0; }
+h1 { font-size: 14pt; page-break-before: always; margin-top: 0; }
+h2, h3 { font-size: 12pt; margin: 12pt 0 6pt; }
+p, li { margin: 0 0 6pt; }
+table { width: 100%; border-collapse: collapse; margin-bottom: 6pt; }
+th, td { border: 1px solid #999; padding: 3pt; vertical-align: top; text-align: left; }
+.draft-box { border: 1px dashed #999; color: #666; font-size: 9pt; text-align: center; margin: 6pt 0; }
+.draft-figure { height: 8cm; line-height: 8cm; }
+.draft-image { height: 4cm; line-height: 4cm; }
+"""
+DRAFT_PDF_NAME = "Attendro_Final_Report_Draft.pdf"
+
+# Filled in after layout, once page numbers are known
+TOC_MARKER = "<!--TABLE-OF-CONTENTS-->"
+LOF_MARKER = "<!--LIST-OF-FIGURES-->"
+
 def get_diagram_html(filename):
     """
     Extracts the inner HTML of the diagram-wrap div
@@ -173,7 +212,7 @@ def get_diagram_html(filename):
     with open(path, 'r', encoding='utf-8') as f:
         content = f.read()
         
-    match = re.search(r'<div class="diagram-wrap" id="diagram">(.*?)</div>\s*</body>', content, re.DOTALL)
+    match = patterns.DIAGRAM_WRAP_BODY_RE.search(content)
     if match:
         # Wrap it back in diagram-wrap but remove id to avoid duplicates if multiple
         inner = match.group(1)
@@ -181,18 +220,28 @@ def get_diagram_html(filename):
         return f'<div class="report-diagram"><div class="diagram-wrap">{inner}</div></div>'
         
     # Fallback: look for just diagram-wrap
-    match = re.search(r'<div class="diagram-wrap.*?>(.*?)</div>', content, re.DOTALL)
+    match = patterns.DIAGRAM_WRAP_RE.search(content)
     if match:
         inner = match.group(1)
         return f'<div class="report-diagram"><div class="diagram-wrap">{inner}</div></div>'
         
     return None
 
+def draft_diagram_html(filename):
+    """Stands in for get_diagram_html() in draft mode: a box the size of a typical diagram."""
+    if not os.path.exists(os.path.join(DIAGRAMS_DIR, filename)):
+        return None
+    return f'<div class="draft-box draft-figure">[diagram: {filename}]</div>'
+
+def draft_images(html_text):
+    """Replaces <img> tags with fixed-size boxes so no image is fetched or decoded."""
+    return patterns.IMG_TAG_RE.sub('<div class="draft-box draft-image">[image]</div>', html_text)
+
 def process_markdown_content(md_content):
     lines = md_content.split('\n')
     processed_lines = []
     for line in lines:
-        if re.match(r'^###\s+\d+\.\d+\s+', line):
+        if patterns.SECTION_HEADING_RE.match(line):
             line = line.replace('###', '##', 1)
         if line.startswith("# Chapter"):
             line = line.replace("–", " ").replace("-", " ")
@@ -211,46 +260,15 @@ def parse_sections(md_text):
     
     pass_intro = False
     for line in lines:
-        if "## Title Page" in line:
-            flush(current_title, current_content) 
-            current_title = "Title Page"
-            current_content = []
+        heading = classify_line(line)
+        if heading and heading[1] == "Title Page":
             pass_intro = True
-            continue
         if not pass_intro: continue
             
-        if line.startswith("## Certificate"):
-            flush(current_title, current_content) 
-            current_title = "Certificate" 
-            current_content = []
-        elif line.startswith("## Acknowledgement"):
-            flush(current_title, current_content) 
-            current_title = "Acknowledgement" 
-            current_content = []
-        elif line.startswith("## Index") or line.startswith("## Table of Contents"):
-            flush(current_title, current_content) 
-            current_title = "Table of Contents" 
-            current_content = []
-        elif line.startswith("## Abstract"):
+        if heading:
             flush(current_title, current_content) 
-            current_title = "Abstract" 
+            current_title = heading[1]
             current_content = []
-        elif line.startswith("## List of Figures"):
-            flush(current_title, current_content) 
-            current_title = "List of Figures" 
-            current_content = []
-        elif line.startswith("## List of Tables"):
-             flush(current_title, current_content) 
-             current_title = "List of Tables" 
-             current_content = []
-        elif line.startswith("# Chapter"):
-            flush(current_title, current_content)
-            current_title = line.strip("# ").strip()
-            current_content = []
-        elif line.startswith("# References"):
-             flush(current_title, current_content)
-             current_title = "References"
-             current_content = []
         else:
             current_content.append(line)
     flush(current_title, current_content)
@@ -263,62 +281,120 @@ def create_title_page_html():
 def create_certificate_html():
     return """<div class="certificate-container"><div class="cert-title">CERTIFICATE</div><p>This is to certify that the project titled <strong>"ATTENDRO: Smart Biometric + App-Based Attendance Management System using AI & IoT"</strong> has been carried out by <strong>[Student Name]</strong> under my guidance and supervision in partial fulfillment of the requirements for the award of the Diploma in <strong>Applied AI & ML</strong> at <strong>Rajarambapu Institute of Technology, Islampur</strong>, during the academic year <strong>2025–2026</strong>.</p><table class="sig-table"><tr><td>___________________<br><strong>Guide</strong></td><td>___________________<br><strong>H.O.D.</strong></td><td>___________________<br><strong>Principal</strong></td></tr><tr><td colspan="3" style="text-align:left; padding-top:1cm;">Date: _______________<br>Place: Islampur</td></tr></table></div>"""
 
-def generate():
-    with open(SOURCE_MD_PATH, 'r', encoding='utf-8') as f:
-        raw = f.read()
-    refined = process_markdown_content(raw)
+def render_sections(md_text, draft=False):
+    """
+    Renders the report sections to HTML. Returns (front_body, main_body, figures):
+    the front matter, everything from the first chapter on, and the FigurePlan.
+    """
+    refined = process_markdown_content(md_text)
     sections = parse_sections(refined)
     
-    full_body = ""
+    front_body = ""
+    main_body = ""
     
-    # Pre-load diagrams
-    dia_arch = get_diagram_html("01-system-architecture.html")
-    dia_db = get_diagram_html("02-database-schema.html")
-    dia_flow = get_diagram_html("03-user-workflow.html")
-    dia_device = get_diagram_html("04-device-interface.html")
-    dia_sec = get_diagram_html("05-security-model.html")
-    # dia_usecase = get_diagram_html("06-usecase-diagram.html") # Assuming 06 exist or similar
+    # Decide figure placement and numbering once from the parsed document;
+    # each rendered section is then rewritten in a single pass.
+    figures = FigurePlan(loader=draft_diagram_html if draft else get_diagram_html)
+    figures.assign(sections)
     
     for sec in sections:
         title = sec['title']
         content = sec['content']
-        html_part = markdown.markdown(content, extensions=['tables'])
+        html_part = MARKDOWN.render(content)
+        if draft:
+            html_part = draft_images(html_part)
+        else:
+            html_part = assets.use_variants(html_part, os.path.dirname(SOURCE_MD_PATH), "print")
         
         final_part = ""
         if title == "Title Page": final_part = create_title_page_html()
         elif title == "Certificate": final_part = create_certificate_html()
+        elif title == "Table of Contents":
+            final_part = f"<h1>{title}</h1>\n{TOC_MARKER}"
+        elif title == "List of Figures":
+            final_part = f"<h1>{title}</h1>\n{LOF_MARKER}"
         else:
-            final_part = f"<h1>{title}</h1>\n{html_part}"
-            
-            # Inject Diagrams Logic
-            if "Chapter 4" in title: 
-                # Methodology
-                if dia_arch: 
-                     final_part = final_part.replace("<h3>4.1 System Overview</h3>", f"<h3>4.1 System Overview</h3>\n{dia_arch}\n<p style='text-align:center;font-style:italic;'>Figure 1: System Architecture</p>")
-                if dia_flow:
-                     # Inject flow near Device Logic
-                     final_part = final_part.replace("<h3>4.2 Device Logic & Workflow</h3>", f"<h3>4.2 Device Logic & Workflow</h3>\n{dia_flow}\n<p style='text-align:center;font-style:italic;'>Figure 3: User Workflow</p>")
-                     
-            if "Chapter 5" in title:
-                # Design
-                if dia_device:
-                    final_part = final_part.replace("<h3>5.1 Hardware Design</h3>", f"<h3>5.1 Hardware Design</h3>\n{dia_device}\n<p style='text-align:center;font-style:italic;'>Figure 4: Device Interface</p>")
-                if dia_db:
-                    final_part = final_part.replace("<h3>5.2 Database Description (Supabase)</h3>", f"<h3>5.2 Database Description (Supabase)</h3>\n{dia_db}\n<p style='text-align:center;font-style:italic;'>Figure 2: Database Schema</p>")
-                if dia_sec:
-                    final_part = final_part.replace("<h3>5.3 Session & Context Rules (The Verification Logic)</h3>", f"<h3>5.3 Session & Context Rules</h3>\n{dia_sec}\n<p style='text-align:center;font-style:italic;'>Figure 5: Security Model</p>")
-
-        full_body += f"<div class='section-wrapper'>{final_part}</div>\n"
-        
-    final_doc = f"""<!DOCTYPE html><html><head><meta charset="UTF-8"><style>{BASE_CSS}</style></head><body>{full_body}</body></html>"""
+            final_part = figures.apply(f"<h1>{title}</h1>\n{html_part}")
+
+        # Everything before the first chapter is front matter
+        if main_body or title.startswith("Chapter"):
+            main_body += f"<div class='section-wrapper'>{final_part}</div>\n"
+        else:
+            front_body += f"<div class='section-wrapper'>{final_part}</div>\n"
+    return front_body, main_body, figures
+
+def wrap_html(body, draft=False):
+    css = DRAFT_CSS if draft else BASE_CSS
+    return f"""<!DOCTYPE html><html><head><meta charset="UTF-8"><style>{css}{toc.TOC_CSS}</style></head><body>{body}</body></html>"""
+
+def generate(md_text=None, html_cls=None, draft=False):
+    """
+    Builds the PDF from md_text (default: SOURCE_MD_PATH) and returns its path.
+    html_cls stands in for weasyprint.HTML; the render daemon passes one that
+    reuses its font configuration. draft=True writes a quick proofreading PDF
+    (DRAFT_CSS, placeholder diagrams and images, no thumbnails) to DRAFT_PDF_NAME.
+    """
+    if md_text is None:
+        with open(SOURCE_MD_PATH, 'r', encoding='utf-8') as f:
+            md_text = f.read()
+    # [@key] citations numbered and the References list generated (a no-op without them)
+    md_text = citations.resolve_markdown(md_text)
+
+    if draft:
+        pdf_path = os.path.join(OUTPUT_DIR, DRAFT_PDF_NAME)
+        outputs = [pdf_path]
+    else:
+        pdf_path = os.path.join(OUTPUT_DIR, "Attendro_Final_Report.pdf")
+        html_path = os.path.join(OUTPUT_DIR, "Attendro_Final_Report_With_Diagrams.html")
+        outputs = [pdf_path, html_path, thumbnails.thumbnails_dir(pdf_path)]
+
+    # Same source, images, diagrams, CSS, engine and build code as a stored build: reuse its outputs
+    artifacts = store.ArtifactStore()
+    images = assets.referenced_images(md_text, os.path.dirname(SOURCE_MD_PATH))
+    key = store.input_key(md_text, DRAFT_CSS if draft else BASE_CSS, toc.TOC_CSS, MARKDOWN_ENGINE,
+                          store.package_version("weasyprint"), assets.ASSET_VERSION, pdfopt.image_quality(),
+                          *store.read_files(images),
+                          *store.read_files(DIAGRAM_FILES), *store.read_files(BUILD_FILES))
+    if artifacts.checkout(key):
+        print(f"Inputs unchanged; restored {pdf_path} from the artifact store")
+        return pdf_path
+    store.detach(outputs)
+
+    front_body, main_body, figures = render_sections(md_text, draft)
+    front_body, front_entries = toc.number_headings(front_body)
+    main_body, main_entries = toc.number_headings(main_body, start=len(front_entries))
+    toc_entries = [e for e in front_entries + main_entries if e[2] != "Table of Contents"]
+    
+    def compose(page_numbers):
+        front = front_body.replace(TOC_MARKER, toc.toc_html(toc_entries, page_numbers))
+        front = front.replace(LOF_MARKER, toc.toc_html(figures.entries(), page_numbers))
+        return wrap_html(front, draft), wrap_html(front + main_body, draft)
+    
+    # One full layout; only the front matter is laid out again with real page numbers
+    if html_cls is None:
+        from weasyprint import HTML as html_cls  # heavy (Pango/cairo); imported only when a PDF is built
+    # No numbered main heading (e.g. a report that is all front matter): nothing to split the layout at
+    boundary = main_entries[0][0] if main_entries else None
+    document = toc.render_with_toc(html_cls, compose, boundary)
+    if draft:
+        document.write_pdf(pdf_path, **reproducible.pdf_options(document))
+        print(f"Draft PDF Generated: {pdf_path}")
+        artifacts.commit(key, outputs)
+        return pdf_path
     
-    pdf_path = os.path.join(OUTPUT_DIR, "Attendro_Final_Report.pdf")
-    HTML(string=final_doc).write_pdf(pdf_path)
+    # PDF and page thumbnails both come from that one layout
+    thumbnails.write_outputs(document, pdf_path)
     print("PDF with Diagrams Generated Successfully.")
     
     # Also save the HTML used for PDF for inspection
-    with open(os.path.join(OUTPUT_DIR, "Attendro_Final_Report_With_Diagrams.html"), 'w') as f:
+    _, final_doc = compose(toc.page_numbers(document))
+    with open(html_path, 'w') as f:
         f.write(final_doc)
+    artifacts.commit(key, outputs)
+    return pdf_path
 
 if __name__ == "__main__":
-    generate()
+    # Hand the build to a running render daemon (report_gen/daemon.py) if there is one
+    draft = "--draft" in sys.argv
+    if daemon.try_submit({"format": "pdf", "draft": draft}) is None:
+        generate(draft=draft)
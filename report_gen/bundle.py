@@ -0,0 +1,217 @@
+import base64
+import hashlib
+import mimetypes
+import os
+import posixpath
+import re
+import urllib.parse
+import urllib.request
+
+from report_gen import mermaid, store
+
+# Remote scripts/fonts are downloaded once at bundle time and kept here, so only
+# the very first bundle needs the network - the bundle itself never does.
+CACHE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), ".cache", "assets")
+
+SCRIPT_SRC_RE = re.compile(r'<script([^>]*)\ssrc="([^"]+)"([^>]*)>\s*</script>', re.DOTALL)
+ESM_IMPORT_RE = re.compile(r'import\s+(\w+)\s+from\s+[\'"]([^\'"]+\.esm(?:\.min)?\.mjs)[\'"];?')
+MODULE_SCRIPT_RE = re.compile(r'<script type="module">(.*?)</script>', re.DOTALL)
+STYLESHEET_RE = re.compile(r'<link[^>]*rel="stylesheet"[^>]*href="([^"]+)"[^>]*>')
+STYLE_RE = re.compile(r'<style>(.*?)</style>', re.DOTALL)
+CSS_URL_RE = re.compile(r'url\(\s*[\'"]?([^\'")]+)[\'"]?\s*\)')
+IMG_SRC_RE = re.compile(r'<img([^>]*?)\ssrc="([^"]+)"')
+CSS_COMMENT_RE = re.compile(r'/\*.*?\*/', re.DOTALL)
+CSS_SPACE_RE = re.compile(r'\s+')
+CSS_PUNCT_RE = re.compile(r'\s*([{};,>])\s*')
+# Part of every bundle key; bump when the bundling itself changes
+BUNDLE_VERSION = "3"
+
+
+def minify_css(css):
+    css = CSS_COMMENT_RE.sub('', css)
+    css = CSS_SPACE_RE.sub(' ', css)
+    css = CSS_PUNCT_RE.sub(r'\1', css)
+    return css.replace(';}', '}').strip()
+
+
+def is_remote(ref):
+    return ref.startswith(("http://", "https://", "//"))
+
+
+def read_asset(ref, base_dir):
+    """
+    Returns the bytes behind a script/style/image reference, or None if it can't
+    be resolved. Remote assets are fetched once and cached by URL.
+    """
+    if ref.startswith("data:"):
+        return None
+    if is_remote(ref):
+        url = "https:" + ref if ref.startswith("//") else ref
+        cache_path = os.path.join(CACHE_DIR, hashlib.sha256(url.encode("utf-8")).hexdigest())
+        if not os.path.exists(cache_path):
+            try:
+                with urllib.request.urlopen(url, timeout=30) as resp:
+                    data = resp.read()
+            except OSError as e:
+                print(f"Warning: could not fetch {url} ({e})")
+                return None
+            os.makedirs(CACHE_DIR, exist_ok=True)
+            with open(cache_path, 'wb') as f:
+                f.write(data)
+        with open(cache_path, 'rb') as f:
+            return f.read()
+
+    path = os.path.join(base_dir, ref.split('?')[0].split('#')[0])
+    if not os.path.exists(path):
+        print(f"Warning: asset not found {path}")
+        return None
+    with open(path, 'rb') as f:
+        return f.read()
+
+
+def rebase_url(url, stylesheet):
+    """A url() found in a stylesheet, rewritten relative to the page that links the stylesheet."""
+    if url.startswith(("data:", "#")):
+        return url
+    if is_remote(stylesheet):
+        return urllib.parse.urljoin("https:" + stylesheet if stylesheet.startswith("//") else stylesheet, url)
+    if is_remote(url) or url.startswith("/"):
+        return url
+    return posixpath.normpath(posixpath.join(posixpath.dirname(stylesheet), url))
+
+
+def data_uri(ref, data):
+    mime = mimetypes.guess_type(ref.split('?')[0])[0] or "application/octet-stream"
+    return f"data:{mime};base64,{base64.b64encode(data).decode('ascii')}"
+
+
+class Bundler:
+    """
+    Inlines the scripts, stylesheets, fonts and images a report page references.
+    Each distinct asset is read and encoded once (keyed by content hash), and
+    identical <script>/<style> blocks are emitted only once.
+    """
+
+    def __init__(self, base_dir):
+        self.base_dir = base_dir
+        self.uris = {}        # ref -> data URI
+        self.seen_blocks = set()
+
+    def uri_for(self, ref):
+        if ref not in self.uris:
+            data = read_asset(ref, self.base_dir)
+            self.uris[ref] = data_uri(ref, data) if data is not None else None
+        return self.uris[ref]
+
+    def once(self, block):
+        digest = hashlib.sha256(block.encode("utf-8")).hexdigest()
+        if digest in self.seen_blocks:
+            return ""
+        self.seen_blocks.add(digest)
+        return block
+
+    def inline_script(self, match):
+        attrs = (match.group(1) + match.group(3)).strip()
+        data = read_asset(match.group(2), self.base_dir)
+        if data is None:
+            return match.group(0)
+        # Inlined text must not close the element early
+        code = data.decode("utf-8").replace("</script", "<\\/script")
+        return self.once(f"<script{' ' + attrs if attrs else ''}>{code}</script>")
+
+    def inline_module(self, match):
+        # An ES module import can't be inlined as-is; swap the mermaid ESM build
+        # for its classic UMD build, which exposes the same global.
+        body = match.group(1)
+        imp = ESM_IMPORT_RE.search(body)
+        if not imp:
+            return match.group(0)
+        umd_url = re.sub(r'\.esm(\.min)?\.mjs$', r'\1.js', imp.group(2))
+        data = read_asset(umd_url, self.base_dir)
+        if data is None:
+            return match.group(0)
+        code = data.decode("utf-8").replace("</script", "<\\/script")
+        rest = ESM_IMPORT_RE.sub('', body).strip()
+        return self.once(f"<script>{code}</script>") + f"<script>{rest}</script>"
+
+    def inline_stylesheet(self, match):
+        ref = match.group(1)
+        data = read_asset(ref, self.base_dir)
+        if data is None:
+            return match.group(0)
+        # Its url()s are relative to the stylesheet; inline_style resolves them against the page
+        css = CSS_URL_RE.sub(lambda m: f'url("{rebase_url(m.group(1), ref)}")', data.decode('utf-8'))
+        return f"<style>{css}</style>"
+
+    def inline_style(self, match):
+        def url(m):
+            uri = self.uri_for(m.group(1))
+            return f'url("{uri}")' if uri else m.group(0)
+        css = minify_css(CSS_URL_RE.sub(url, match.group(1)))
+        return self.once(f"<style>{css}</style>")
+
+    def bundle(self, html_text):
+        html_text, _ = mermaid.prerender(html_text)
+        if not mermaid.MERMAID_BLOCK_RE.search(html_text):
+            html_text = mermaid.strip_loader(html_text)
+
+        html_text = SCRIPT_SRC_RE.sub(self.inline_script, html_text)
+        html_text = MODULE_SCRIPT_RE.sub(self.inline_module, html_text)
+        html_text = STYLESHEET_RE.sub(self.inline_stylesheet, html_text)
+        html_text = STYLE_RE.sub(self.inline_style, html_text)
+
+        # Every <img> keeps a real src, so images show with JS disabled and in print;
+        # an image used twice is encoded once but its data URI is repeated
+        def image(match):
+            uri = self.uri_for(match.group(2))
+            return f'<img{match.group(1)} src="{uri}"' if uri else match.group(0)
+
+        return IMG_SRC_RE.sub(image, html_text)
+
+
+def local_refs(html_text, base_dir):
+    """Local files a page pulls into its bundle, including url()s in its local stylesheets."""
+    refs = [m.group(2) for m in SCRIPT_SRC_RE.finditer(html_text)]
+    refs += STYLESHEET_RE.findall(html_text) + CSS_URL_RE.findall(html_text)
+    refs += [m.group(2) for m in IMG_SRC_RE.finditer(html_text)]
+    paths = []
+    for ref in refs:
+        if ref.startswith("data:") or is_remote(ref):
+            continue
+        path = os.path.join(base_dir, ref.split('?')[0].split('#')[0])
+        if path.endswith(".css") and os.path.exists(path):
+            with open(path, 'r', encoding='utf-8', errors='replace') as f:
+                refs += [rebase_url(r, ref) for r in CSS_URL_RE.findall(f.read())]
+        paths.append(os.path.normpath(path))
+    return sorted(set(paths))
+
+
+def bundle_key(html_text, base_dir):
+    """Key over the page, the local assets it references and the bundling code."""
+    # Remote assets are cached by URL (see read_asset), so their URLs in the page stand in for them
+    paths = local_refs(html_text, base_dir)
+    return store.input_key(BUNDLE_VERSION, html_text, *paths, *store.read_files(paths),
+                           *store.read_files([__file__, mermaid.__file__]))
+
+
+def write_bundle(html_text, base_dir, output_path):
+    """
+    Bundles a page into a single offline file named after the key of its
+    inputs (e.g. Attendro_Full_Report.3f2a9c1b04de.html) next to output_path.
+    When a bundle with that key exists nothing is read or encoded; bundles
+    left from earlier inputs are removed.
+    """
+    stem, ext = os.path.splitext(output_path)
+    bundle_path = f"{stem}.{bundle_key(html_text, base_dir)[:12]}{ext}"
+    if not os.path.exists(bundle_path):
+        bundled = Bundler(base_dir).bundle(html_text)
+        tmp = f"{bundle_path}.{os.getpid()}.tmp"
+        with open(tmp, 'w', encoding='utf-8') as f:
+            f.write(bundled)
+        os.replace(tmp, bundle_path)
+    stale_re = re.compile(re.escape(os.path.basename(stem)) + r'\.[0-9a-f]{12}' + re.escape(ext) + '$')
+    directory = os.path.dirname(bundle_path) or "."
+    for name in os.listdir(directory):
+        if stale_re.match(name) and name != os.path.basename(bundle_path):
+            os.remove(os.path.join(directory, name))
+    return bundle_path
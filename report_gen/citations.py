@@ -0,0 +1,302 @@
+"""
+Citation stage. Chapters cite by key, [@ross2004] or [@ross2004; @supabase-docs],
+instead of typing numbers; one pass over the document in reading order
+numbers the keys by first use, rewrites the citations as [1], [1, 2] and
+generates the numbered reference list in the References section.
+
+Keys resolve through one index over ATTENDRO-REPORT/references.json (the
+reference PDFs, see references.py) and ATTENDRO-REPORT/bibliography.json
+(hand-kept entries for sources without a PDF, in the same fields plus
+publisher, note and url). The markdown source is resolved where split_report,
+build_report_v2/v3 and build_docx read it, so the HTML, PDF and DOCX lists
+always agree; combine_report does the same for the ATTENDRO-REPORT chapters.
+A document with no [@key] citations is left exactly as written.
+
+The keys each section cites are cached by section hash, so only edited
+sections are scanned again.
+
+    python report_gen/citations.py    # numbering, unknown keys and hand-typed numbers per document
+"""
+import hashlib
+import html
+import json
+import os
+import re
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from report_gen import references
+from report_gen.sections import classify_line
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SOURCE_MD = "project-report/ATTENDRO_PROJECT_REPORT.md"
+BIBLIOGRAPHY = "ATTENDRO-REPORT/bibliography.json"
+CACHE_FILE = os.path.join(REPO_ROOT, "report_gen", ".cache", "citations.json")
+CITATIONS_VERSION = "2"
+CITE_RE = re.compile(r'\[(@[\w:.-]+(?:\s*;\s*@[\w:.-]+)*)\]')
+CITE_KEY_RE = re.compile(r'@([\w:.-]+)')
+# Code is shown as written: decorators and e-mail addresses in it are not citations
+CODE_RE = re.compile(r'(```.*?```|<pre\b.*?</pre>|<code\b.*?</code>)', re.DOTALL)
+# Numbers typed by hand, [3] or [1, 2]; reported by the command line so they can move to keys
+TYPED_RE = re.compile(r'(?<![\w\]])\[\d+(?:\s*[,–-]\s*\d+)*\](?!\()')
+MD_REF_ITEM_RE = re.compile(r'^\[\d+\]')
+REF_LIST_OPEN_RE = re.compile(r'<div class="reference-list">')
+DIV_TAG_RE = re.compile(r'<div\b|</div>')
+# IEEE style: more authors than this are cut to the first one, "et al."
+MAX_AUTHORS = 6
+
+
+def bibliography():
+    """key -> entry over the PDF dataset and the hand-kept bibliography. Raises ValueError on a duplicate key."""
+    entries = {}
+    with open(os.path.join(REPO_ROOT, BIBLIOGRAPHY), 'r', encoding='utf-8') as f:
+        manual = json.load(f)["references"]
+    for entry in references.load() + manual:
+        if entry["key"] in entries:
+            raise ValueError(f"citation key {entry['key']} is defined twice")
+        entries[entry["key"]] = entry
+    return entries
+
+
+def abbreviate(name):
+    """IEEE author form: "Hanis Syuhada Harrun" -> "H. S. Harrun", "Ramgopal A." -> "A. Ramgopal"."""
+    words = name.split()
+    trailing = []
+    # Surname-first names with the initials after them
+    while len(words) > 1 and len(words[-1].strip(".")) == 1:
+        trailing.insert(0, words.pop().strip(".") + ".")
+    if trailing:
+        return " ".join(trailing + words)
+    given = [w if len(w.strip(".")) == 1 and w.endswith(".") else w[0] + "." for w in words[:-1]]
+    return " ".join(given + words[-1:])
+
+
+def author_list(authors):
+    names = [abbreviate(a) for a in authors]
+    if len(names) > MAX_AUTHORS:
+        return f"{names[0]} et al."
+    if len(names) <= 2:
+        return " and ".join(names)
+    return ", ".join(names[:-1]) + ", and " + names[-1]
+
+
+def format_entry(entry, italic=lambda text: f"*{text}*", escape=lambda text: text):
+    """One reference in IEEE style, as markdown by default; pass italic/escape for other markups."""
+    lead = author_list(entry["authors"]) if entry.get("authors") else entry.get("publisher", "")
+    head = f'{escape(lead)}, "{escape(entry["title"])},"' if lead else f'"{escape(entry["title"])},"'
+    details = [
+        italic(escape(entry["venue"])) if entry.get("venue") else None,
+        f"vol. {entry['volume']}" if entry.get("volume") else None,
+        f"no. {entry['issue']}" if entry.get("issue") else None,
+        f"pp. {entry['pages']}" if entry.get("pages") else None,
+        escape(entry["note"]) if entry.get("note") else None,
+        str(entry["year"]) if entry.get("year") else None,
+    ]
+    details = ", ".join(d for d in details if d)
+    # Nothing after the title: its closing comma becomes the full stop
+    text = f"{head} {details}." if details else head[:-2] + '."'
+    if entry.get("doi"):
+        text += f" doi: {escape(entry['doi'])}."
+    if entry.get("url"):
+        text += f" [Online]. Available: {escape(entry['url'])}"
+    return text
+
+
+def load_cache(document):
+    try:
+        with open(CACHE_FILE, 'r', encoding='utf-8') as f:
+            cache = json.load(f)
+    except (FileNotFoundError, ValueError):
+        return {}
+    if cache.get("version") != CITATIONS_VERSION:
+        return {}
+    return cache["documents"].get(document, {})
+
+
+def save_cache(document, scans):
+    try:
+        with open(CACHE_FILE, 'r', encoding='utf-8') as f:
+            cache = json.load(f)
+    except (FileNotFoundError, ValueError):
+        cache = {}
+    if cache.get("version") != CITATIONS_VERSION:
+        cache = {"version": CITATIONS_VERSION, "documents": {}}
+    # Only the document's current sections are kept, so the cache doesn't grow with every edit
+    cache["documents"][document] = scans
+    os.makedirs(os.path.dirname(CACHE_FILE), exist_ok=True)
+    tmp = f"{CACHE_FILE}.{os.getpid()}.tmp"
+    with open(tmp, 'w', encoding='utf-8') as f:
+        json.dump(cache, f, indent=1, sort_keys=True)
+    os.replace(tmp, CACHE_FILE)
+
+
+def scan(texts, document):
+    """
+    Citation keys of each text (section) in order of appearance, from the
+    cache for sections seen before.
+    """
+    cached, scans, per_text = load_cache(document), {}, []
+    for text in texts:
+        digest = hashlib.sha256(text.encode("utf-8")).hexdigest()
+        keys = cached.get(digest)
+        if keys is None:
+            keys = [key for m in CITE_RE.finditer(CODE_RE.sub("", text)) for key in CITE_KEY_RE.findall(m.group(1))]
+        scans[digest] = keys
+        per_text.append(keys)
+    if scans != cached:
+        save_cache(document, scans)
+    return per_text
+
+
+def number(per_text, entries, document):
+    """key -> number by first use across the texts. Unknown keys get no number and a warning."""
+    order, unknown = {}, []
+    for key in (key for keys in per_text for key in keys):
+        if key in entries:
+            order.setdefault(key, len(order) + 1)
+        elif key not in unknown:
+            unknown.append(key)
+    if unknown:
+        print(f"Warning: {document}: unknown citation key(s) {', '.join(unknown)} (not in {references.DATASET} "
+              f"or {BIBLIOGRAPHY})")
+    return order
+
+
+def renumber(text, order, entries, link=False):
+    """Replaces every [@key; ...] outside code in text with its numbers; unknown keys show as [key?]."""
+    def replace(m):
+        labels = []
+        for key in CITE_KEY_RE.findall(m.group(1)):
+            if key not in entries:
+                labels.append(f"{key}?")
+            elif link:
+                labels.append(f'<a class="citation" href="#ref-{order[key]}">{order[key]}</a>')
+            else:
+                labels.append(str(order[key]))
+        return "[" + ", ".join(labels) + "]"
+    # CODE_RE.split alternates prose and code, starting with prose
+    parts = CODE_RE.split(text)
+    return "".join(part if i % 2 else CITE_RE.sub(replace, part) for i, part in enumerate(parts))
+
+
+def markdown_sections(md_text):
+    """(type, start line, end line) for each run of lines up to the next report section heading."""
+    lines = md_text.split('\n')
+    bounds, current = [], (None, 0)
+    for i, line in enumerate(lines):
+        heading = classify_line(line)
+        if heading:
+            # A heading on the first line starts the first section; there is no empty one before it
+            if i:
+                bounds.append((current[0], current[1], i))
+            current = (heading[0], i)
+    bounds.append((current[0], current[1], len(lines)))
+    return lines, bounds
+
+
+def resolve_markdown(md_text, document="project-report"):
+    """md_text with citations numbered and the References section's list generated from them."""
+    lines, bounds = markdown_sections(md_text)
+    texts = ["\n".join(lines[start:end]) for _, start, end in bounds]
+    per_text = scan(texts, document)
+    if not any(per_text):
+        return md_text
+    entries = bibliography()
+    order = number(per_text, entries, document)
+
+    out = []
+    for (section_type, start, end), text in zip(bounds, texts):
+        if section_type != "ref":
+            out.append(renumber(text, order, entries))
+            continue
+        # Keep the heading and anything after the hand-typed list (notes, rules); the list itself is generated
+        body = lines[start + 1:end]
+        first = next((i for i, line in enumerate(body) if line.strip()), len(body))
+        rest = first
+        while rest < len(body) and MD_REF_ITEM_RE.match(body[rest]):
+            rest += 1
+        generated = [f"[{order[key]}] {format_entry(entries[key])}  " for key in order]
+        # A blank line ends the list's paragraph, or a following --- would make it a heading
+        if rest < len(body) and body[rest].strip():
+            generated.append("")
+        out.append("\n".join([lines[start], *body[:first], *generated, *body[rest:]]))
+    return "\n".join(out)
+
+
+def replace_div_contents(page, open_re, inner):
+    """page with the contents of the first <div> open_re matches set to inner (nested divs allowed)."""
+    opening = open_re.search(page)
+    if not opening:
+        return None
+    depth = 1
+    for tag in DIV_TAG_RE.finditer(page, opening.end()):
+        depth += 1 if tag.group() == "<div" else -1
+        if depth == 0:
+            return page[:opening.end()] + inner + page[tag.start():]
+    return None
+
+
+def resolve_html_parts(parts, ref_part, document):
+    """
+    (name, html) parts in reading order with citations numbered (linked to the
+    list) and the <div class="reference-list"> of the ref_part part generated.
+    """
+    per_text = scan([page for _, page in parts], document)
+    if not any(per_text):
+        return parts
+    entries = bibliography()
+    order = number(per_text, entries, document)
+    items = "".join(
+        f'\n<div class="reference-item" id="ref-{order[key]}"><span class="ref-number">[{order[key]}]</span>'
+        f'<span class="ref-text">{format_entry(entries[key], lambda t: f"<em>{t}</em>", html.escape)}</span></div>'
+        for key in order) + "\n"
+
+    resolved = []
+    for name, page in parts:
+        page = renumber(page, order, entries, link=True)
+        if name == ref_part:
+            generated = replace_div_contents(page, REF_LIST_OPEN_RE, items)
+            if generated is None:
+                print(f"Warning: {document}: no reference-list in {name}; reference list not generated")
+            else:
+                page = generated
+        resolved.append((name, page))
+    return resolved
+
+
+def report(document, texts, labels):
+    """Prints a document's citation numbering, unknown keys and hand-typed numbers. Returns the cited keys."""
+    entries = bibliography()
+    order = number(scan(texts, document), entries, document)
+    print(f"{document}: {len(order)} cited keys")
+    for key, n in order.items():
+        print(f"  [{n}] {key:<24} {entries[key]['title'][:60]}")
+    for label, text in zip(labels, texts):
+        typed = TYPED_RE.findall(CITE_RE.sub("", CODE_RE.sub("", text)))
+        if typed and not label.startswith("References"):
+            print(f"  typed by hand in {label}: {' '.join(typed)}")
+    return set(order)
+
+
+def main():
+    with open(os.path.join(REPO_ROOT, SOURCE_MD), 'r', encoding='utf-8') as f:
+        md_text = f.read()
+    lines, bounds = markdown_sections(md_text)
+    cited = report("project-report", ["\n".join(lines[start:end]) for _, start, end in bounds],
+                   [lines[start].strip("# ") for _, start, _ in bounds])
+
+    combine_dir = os.path.join(REPO_ROOT, "ATTENDRO-REPORT")
+    names = [name for name in sorted(os.listdir(combine_dir)) if re.match(r'(Chapter-|Abstract|References)', name)]
+    texts = []
+    for name in names:
+        with open(os.path.join(combine_dir, name), 'r', encoding='utf-8') as f:
+            texts.append(f.read())
+    cited |= report("combined", texts, names)
+
+    entries = bibliography()
+    unused = sorted(set(entries) - cited)
+    print(f"bibliography: {len(entries)} entries" + (f", not cited: {', '.join(unused)}" if unused else ""))
+
+
+if __name__ == "__main__":
+    main()
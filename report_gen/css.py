@@ -0,0 +1,123 @@
+import hashlib
+import re
+from collections import OrderedDict
+
+STYLE_BLOCK_RE = re.compile(r'<style[^>]*>(.*?)</style>\s*', re.DOTALL)
+# Diagram styles are hoisted into the chapter <head> under this id, so the merge
+# scripts (which otherwise only keep <body>) can pick them up again.
+SHARED_STYLE_RE = re.compile(r'<style id="shared-styles">(.*?)</style>', re.DOTALL)
+CSS_COMMENT_RE = re.compile(r'/\*.*?\*/', re.DOTALL)
+
+# At-rules whose body is a list of rules that need scoping too
+NESTED_AT_RULES = ("@media", "@supports")
+ROOT_SELECTORS = ("html", "body", ":root")
+
+
+def split_rules(css):
+    """
+    Splits a stylesheet into its top-level rules as (prelude, body) pairs,
+    keeping nested at-rule bodies intact. Comments are dropped.
+    """
+    css = CSS_COMMENT_RE.sub('', css)
+    rules = []
+    depth = 0
+    start = 0
+    prelude = ""
+    for i, ch in enumerate(css):
+        if ch == '{':
+            if depth == 0:
+                prelude = css[start:i].strip()
+                start = i + 1
+            depth += 1
+        elif ch == '}':
+            depth -= 1
+            if depth == 0:
+                rules.append((prelude, css[start:i].strip()))
+                start = i + 1
+        elif ch == ';' and depth == 0:
+            # Statement at-rules such as @import / @charset
+            rules.append((css[start:i].strip(), None))
+            start = i + 1
+    return [r for r in rules if r[0] or r[1]]
+
+
+def join_rules(rules):
+    return "\n".join(p + ";" if body is None else f"{p} {{ {body} }}" for p, body in rules)
+
+
+def scope_selector(selector, scope):
+    selector = selector.strip()
+    for root in ROOT_SELECTORS:
+        if selector == root:
+            return scope
+        if selector.startswith(root + " "):
+            return scope + selector[len(root):]
+    return f"{scope} {selector}"
+
+
+def scope_css(css, scope):
+    """
+    Prefixes every selector with `scope` so a diagram's stylesheet can't leak
+    into the rest of the report. html/body rules are retargeted at the scope
+    element itself; @page, @font-face and @keyframes are left alone.
+    """
+    scoped = []
+    for prelude, body in split_rules(css):
+        if body is None:
+            scoped.append((prelude, body))
+        elif prelude.startswith(NESTED_AT_RULES):
+            scoped.append((prelude, scope_css(body, scope)))
+        elif prelude.startswith("@"):
+            scoped.append((prelude, body))
+        else:
+            selectors = ", ".join(scope_selector(s, scope) for s in prelude.split(","))
+            scoped.append((selectors, body))
+    return join_rules(scoped)
+
+
+class StyleCollector:
+    """
+    Gathers CSS from any number of sources and emits it as one stylesheet.
+    Rules are deduplicated by hash, so a reset or a diagram stylesheet that is
+    pulled in by several chapters is parsed only once by the browser/WeasyPrint.
+    A repeated rule keeps its last position: with A, B, A in the sources, A
+    still overrides B as it did in the chapter that repeated it. Statement
+    at-rules (@import, @charset) keep their first position, since they only
+    work ahead of the other rules.
+    """
+
+    def __init__(self):
+        self.rules = OrderedDict()  # hash -> (prelude, body)
+
+    def add(self, css, scope=None):
+        if scope:
+            css = scope_css(css, scope)
+        for prelude, body in split_rules(css):
+            key = hashlib.sha1(f"{prelude}\0{body}".encode("utf-8")).hexdigest()
+            if key in self.rules:
+                if body is None:
+                    continue
+                self.rules.move_to_end(key)
+            else:
+                self.rules[key] = (prelude, body)
+
+    def extract(self, html_text):
+        """Collects every <style> block in html_text and returns the html without them."""
+        def take(match):
+            self.add(match.group(1))
+            return ""
+        return STYLE_BLOCK_RE.sub(take, html_text)
+
+    def extract_shared(self, html_text):
+        """Collects the hoisted <style id="shared-styles"> block of a generated page."""
+        for css in SHARED_STYLE_RE.findall(html_text):
+            self.add(css)
+
+    def css(self):
+        return join_rules(self.rules.values())
+
+    def render(self, style_id=None):
+        if not self.rules:
+            return ""
+        attr = f' id="{style_id}"' if style_id else ""
+        return f"<style{attr}>\n{self.css()}\n</style>"
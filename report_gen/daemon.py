@@ -0,0 +1,206 @@
+"""
+Warm render daemon. Keeps WeasyPrint, python-docx, the font configuration and
+the markdown block cache loaded between builds and takes render jobs over a
+local HTTP endpoint (next to the research paper server on 8082).
+
+    python report.py daemon                                   # start it
+    curl -s localhost:8083/render -d '{"format": "pdf"}'       # submit a job
+
+A job is JSON: {"format": "pdf" | "docx" | "paper", "markdown": source text,
+"source": path, "priority": "interactive" | "batch", "wait": true | false,
+"draft": true | false}. markdown and source are optional for pdf/docx (default:
+the report source file); draft asks for the quick proofreading PDF;
+"paper" renders the HTML file at source to a PDF plus page thumbnails next to it.
+With wait (the default) the reply is {"path": output file, "seconds": render time,
+"job": id}; otherwise it is 202 {"job": id, "status": ...}, polled at GET /jobs/<id>.
+
+Jobs go through a JobQueue (jobs.py): repeated jobs for the same output that
+are still waiting collapse into one, and interactive jobs jump batch ones.
+`report.py pdf|docx` and the build scripts submit here when the daemon is
+running and build in-process otherwise.
+"""
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from report_gen import jobs
+
+HOST = "127.0.0.1"
+PORT = 8083
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+FORMATS = ("pdf", "docx", "paper")
+# Long enough for a cold full-report layout
+JOB_TIMEOUT = 600
+
+
+class DaemonUnavailable(Exception):
+    pass
+
+
+def submit(job, port=PORT, timeout=JOB_TIMEOUT):
+    """Sends a render job and returns the reply. Raises DaemonUnavailable if nothing is listening."""
+    import urllib.error
+    import urllib.request
+    request = urllib.request.Request(f"http://{HOST}:{port}/render", data=json.dumps(job).encode("utf-8"),
+                                     headers={"Content-Type": "application/json"})
+    try:
+        with urllib.request.urlopen(request, timeout=timeout) as response:
+            return json.load(response)
+    except urllib.error.HTTPError as e:
+        # The daemon answers with JSON; send_error() pages and proxies don't
+        try:
+            message = json.load(e).get("error", str(e))
+        except (ValueError, AttributeError):
+            message = str(e)
+        raise RuntimeError(message) from None
+    except urllib.error.URLError as e:
+        if isinstance(e.reason, ConnectionRefusedError):
+            raise DaemonUnavailable(f"no render daemon on port {port}") from None
+        raise
+
+
+def try_submit(job, port=PORT):
+    """submit() for thin clients: the reply, or None when no daemon is running."""
+    try:
+        reply = submit(job, port)
+    except DaemonUnavailable:
+        return None
+    print(f"Rendered by daemon in {reply['seconds']:.2f}s: {reply['path']}")
+    return reply
+
+
+def job_target(job):
+    """The output a job writes; queued jobs with the same target are coalesced."""
+    fmt = job.get("format", "pdf")
+    if fmt not in FORMATS:
+        raise ValueError(f"format must be one of {', '.join(FORMATS)}")
+    if fmt == "paper":
+        if not job.get("source"):
+            raise ValueError("paper jobs need a source HTML file")
+        return f"paper:{os.path.abspath(job['source'])}"
+    if fmt == "pdf" and job.get("draft"):
+        return "pdf-draft"
+    return fmt
+
+
+class Worker:
+    """The warm state: build modules and WeasyPrint's font configuration, loaded once."""
+
+    def __init__(self):
+        from weasyprint import HTML
+        from weasyprint.text.fonts import FontConfiguration
+        from report_gen import build_docx, build_report_v3, thumbnails
+
+        font_config = FontConfiguration()
+
+        class WarmHTML(HTML):
+            def render(self, *args, **kwargs):
+                kwargs.setdefault("font_config", font_config)
+                return super().render(*args, **kwargs)
+
+        self.html_cls = WarmHTML
+        self.build_report_v3 = build_report_v3
+        self.build_docx = build_docx
+        self.thumbnails = thumbnails
+
+    def run(self, job):
+        # Called on the queue's single worker thread, so the build modules'
+        # module-level state (markdown cache, output paths) is never shared.
+        fmt = job.get("format", "pdf")
+        start = time.perf_counter()
+        if fmt == "paper":
+            path = os.path.splitext(job["source"])[0] + ".pdf"
+            document = self.html_cls(filename=job["source"]).render()
+            self.thumbnails.write_outputs(document, path)
+        else:
+            md_text = job.get("markdown")
+            if md_text is None and job.get("source"):
+                with open(job["source"], 'r', encoding='utf-8') as f:
+                    md_text = f.read()
+            if fmt == "pdf":
+                path = self.build_report_v3.generate(md_text, html_cls=self.html_cls, draft=bool(job.get("draft")))
+            else:
+                path = self.build_docx.generate_docx(md_text)
+        return {"path": os.path.abspath(path), "seconds": round(time.perf_counter() - start, 3)}
+
+
+def make_handler(queue):
+    import http.server
+
+    class RequestHandler(http.server.BaseHTTPRequestHandler):
+        def send_json(self, status, payload):
+            body = json.dumps(payload).encode("utf-8")
+            self.send_response(status)
+            self.send_header('Content-type', 'application/json')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def do_GET(self):
+            if self.path == '/health':
+                self.send_json(200, {"status": "ok", "completed": queue.completed,
+                                     "queued": len(queue.pending), "coalesced": queue.coalesced})
+            elif self.path.startswith('/jobs/'):
+                status = queue.status(self.path[len('/jobs/'):])
+                if status is None:
+                    self.send_json(404, {"error": "unknown job"})
+                else:
+                    self.send_json(200, status)
+            else:
+                self.send_error(404, "Endpoint not found")
+
+        def do_POST(self):
+            if self.path != '/render':
+                self.send_error(404, "Endpoint not found")
+                return
+            try:
+                length = int(self.headers.get('Content-Length', 0))
+                job = json.loads(self.rfile.read(length) or b"{}")
+            except ValueError:
+                self.send_json(400, {"error": "job must be a JSON object"})
+                return
+            try:
+                target = job_target(job)
+                priority = jobs.PRIORITIES[job.get("priority", "batch")]
+            except KeyError:
+                self.send_json(400, {"error": f"priority must be one of {', '.join(jobs.PRIORITIES)}"})
+                return
+            except (ValueError, AttributeError) as e:
+                self.send_json(400, {"error": str(e)})
+                return
+
+            future = queue.submit(target, job, priority)
+            if not job.get("wait", True):
+                self.send_json(202, queue.status(future.job_id))
+                return
+            try:
+                self.send_json(200, dict(future.result(), job=future.job_id))
+            except OSError as e:
+                self.send_json(400, {"error": str(e)})
+            except Exception as e:
+                print(f"Render failed: {e}")
+                self.send_json(500, {"error": str(e)})
+
+    return RequestHandler
+
+
+def main(port=PORT):
+    import http.server
+
+    # The build modules use paths relative to the repository root
+    os.chdir(REPO_ROOT)
+    print("Loading WeasyPrint, python-docx and fonts...")
+    queue = jobs.JobQueue(Worker().run)
+    http.server.ThreadingHTTPServer.allow_reuse_address = True
+    try:
+        with http.server.ThreadingHTTPServer((HOST, port), make_handler(queue)) as httpd:
+            print(f"Render daemon on http://{HOST}:{port}/ (POST /render, GET /health)")
+            httpd.serve_forever()
+    except KeyboardInterrupt:
+        print("\nRender daemon stopped.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+import re
+
+# Report figures. Each row: (key, label used in the source text, caption,
+# diagram file, section number the figure is anchored under).
+# Figures are numbered automatically in order of appearance; "Figure N" in the
+# source refers to the label column and is rewritten to the final number.
+# A figure can also be placed explicitly with <!-- figure: key --> in the markdown,
+# which takes precedence over its section anchor.
+FIGURE_TABLE = [
+    ("system-architecture", "Figure 1", "System Architecture", "01-system-architecture.html", "4.1"),
+    ("database-schema", "Figure 2", "Database Schema", "02-database-schema.html", "5.2"),
+    ("user-workflow", "Figure 3", "User Workflow", "03-user-workflow.html", "4.2"),
+    ("device-interface", "Figure 4", "Device Interface", "04-device-interface.html", "5.1"),
+    ("security-model", "Figure 5", "Security Model", "05-security-model.html", "5.3"),
+]
+
+MD_ANCHOR_RE = re.compile(r'^#{2,3}\s+(\d+(?:\.\d+)+)\s|^<!--\s*figure:\s*([\w-]+)\s*-->')
+HTML_TOKEN_RE = re.compile(
+    r'(?P<heading><h(?P<level>[23])>(?P<number>\d+(?:\.\d+)+)\s[^<]*</h(?P=level)>)'
+    r'|<!--\s*figure:\s*(?P<marker>[\w-]+)\s*-->'
+    # Links and tags are consumed whole so "Figure N" is only rewritten in text, never
+    # inside an attribute (alt, title) or a link that is already there
+    r'|(?P<skip><a\b[^>]*>[\s\S]*?</a>|<[^>]*>)'
+    r'|\b(?P<ref>Figure \d+)\b'
+)
+
+
+class FigurePlan:
+    """
+    Places, numbers and cross-references the report figures.
+
+    assign() walks the parsed sections once to decide where each figure goes
+    and what number it gets; apply() then rewrites a rendered section in a
+    single regex pass. Total cost is linear in the document size, independent
+    of how many figures there are.
+    """
+
+    def __init__(self, table=FIGURE_TABLE, loader=None):
+        self.table = {row[0]: row for row in table}
+        self.by_label = {row[1]: row[0] for row in table}
+        self.loader = loader
+        self.diagrams = {}     # key -> diagram html, loaded once
+        self.numbers = {}      # key -> assigned figure number
+        self.at_section = {}   # section number -> [keys placed under that heading]
+        self.at_marker = set() # keys placed by an explicit marker
+
+    def assign(self, sections):
+        marked = set()
+        for sec in sections:
+            for line in sec['content'].split('\n'):
+                m = MD_ANCHOR_RE.match(line)
+                if m and m.group(2) in self.table:
+                    marked.add(m.group(2))
+
+        anchored = {}
+        for key, row in self.table.items():
+            if key not in marked:
+                anchored.setdefault(row[4], []).append(key)
+
+        for sec in sections:
+            for line in sec['content'].split('\n'):
+                m = MD_ANCHOR_RE.match(line)
+                if not m:
+                    continue
+                keys = anchored.get(m.group(1), []) if m.group(1) else [m.group(2)]
+                for key in keys:
+                    if key in self.table and key not in self.numbers:
+                        diagram = self.loader(self.table[key][3]) if self.loader else ""
+                        if diagram is None:
+                            continue
+                        self.diagrams[key] = diagram
+                        self.numbers[key] = len(self.numbers) + 1
+                        if m.group(1):
+                            self.at_section.setdefault(m.group(1), []).append(key)
+                        else:
+                            self.at_marker.add(key)
+
+    def figure_html(self, key):
+        caption = self.table[key][2]
+        return (f"<div id='fig-{key}'>{self.diagrams[key]}\n"
+                f"<p style='text-align:center;font-style:italic;'>Figure {self.numbers[key]}: {caption}</p></div>")
+
+    def apply(self, html):
+        def replace(m):
+            if m.group('heading'):
+                keys = self.at_section.get(m.group('number'), [])
+                return m.group('heading') + "".join("\n" + self.figure_html(k) for k in keys)
+            if m.group('marker'):
+                key = m.group('marker')
+                return self.figure_html(key) if key in self.at_marker else ""
+            if m.group('skip'):
+                return m.group(0)
+            key = self.by_label.get(m.group('ref'))
+            if key in self.numbers:
+                return f"<a href='#fig-{key}'>Figure {self.numbers[key]}</a>"
+            return m.group(0)
+
+        return HTML_TOKEN_RE.sub(replace, html)
+
+    def entries(self):
+        """List of Figures rows as (anchor id, level, text), for toc.toc_html()."""
+        rows = sorted(self.numbers.items(), key=lambda item: item[1])
+        return [(f"fig-{key}", 3, f"Figure {n}: {self.table[key][2]}") for key, n in rows]
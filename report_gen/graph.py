@@ -0,0 +1,272 @@
+"""
+Make-style build graph over the report scripts. Each node declares the files
+it reads and writes and the nodes it builds on; `report.py build` runs only
+the stale nodes, dependencies first, with independent nodes in parallel.
+
+    python report.py build                  # everything that is out of date
+    python report.py build merge pdf -j 4   # those targets and what they need
+    python report.py build --dry-run        # what would rebuild, and why
+
+A node is stale when it has never been built, one of its outputs is missing,
+or the content of an input (or its command) differs from the last successful
+build. Staleness is checked again when a node's dependencies have finished,
+so a rebuild that leaves its outputs unchanged doesn't cascade.
+"""
+import glob
+import hashlib
+import json
+import os
+import subprocess
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from report_gen import store
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+STATE_FILE = os.path.join(REPO_ROOT, "report_gen", ".cache", "build-graph.json")
+SOURCE_MD = "project-report/ATTENDRO_PROJECT_REPORT.md"
+DIAGRAM_GLOB = "project-report/diagrams/*.html"
+COMBINE_SCRIPT = "ATTENDRO-REPORT/combine_report.py"
+
+
+def code(script):
+    """script and every repo module it imports, as inputs: the same files the artifact store keys on."""
+    return [os.path.relpath(path, REPO_ROOT)
+            for path in store.code_files(os.path.join(REPO_ROOT, script), skip=store.HANDOFF_MODULES)]
+
+
+def nodes():
+    """
+    name -> {"command", "inputs", "outputs", "deps"}. Commands are report.py
+    argv lists run from the repository root; inputs may be glob patterns.
+    Code inputs are derived from each step's imports (code()), not listed by hand.
+    """
+    import importlib.util
+
+    import generate_pdf
+    import merge_chapters
+    import split_report
+    from report_gen import build_report_v3, citations, references, search
+
+    spec = importlib.util.spec_from_file_location("combine_report", os.path.join(REPO_ROOT, COMBINE_SCRIPT))
+    combine = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(combine)
+
+    chapters = [os.path.join(split_report.OUTPUT_DIR, name) for _, name in split_report.SECTIONS]
+    # Read by every node whose source may cite [@key]
+    cites = [references.DATASET, citations.BIBLIOGRAPHY]
+    return {
+        "diagrams": {
+            "command": ["report_gen/mermaid.py", *sorted(glob.glob(DIAGRAM_GLOB))],
+            "inputs": [DIAGRAM_GLOB, *code("report_gen/mermaid.py")],
+            "outputs": [],
+            "deps": [],
+        },
+        "split": {
+            "command": ["report.py", "split"],
+            "inputs": [SOURCE_MD, DIAGRAM_GLOB, *code("split_report.py"), *cites],
+            "outputs": chapters,
+            "deps": ["references"],
+        },
+        "merge": {
+            "command": ["report.py", "merge"],
+            "inputs": [os.path.join(merge_chapters.base_dir, name) for name in merge_chapters.files]
+                      + code("merge_chapters.py"),
+            "outputs": [merge_chapters.output_html],
+            "deps": ["split", "diagrams"],
+        },
+        "pdf-chapters": {
+            "command": ["report.py", "pdf", "--chapters"],
+            "inputs": [os.path.join(generate_pdf.base_dir, name) for name in generate_pdf.files]
+                      + code("generate_pdf.py"),
+            "outputs": [generate_pdf.output_pdf],
+            "deps": ["split", "diagrams"],
+        },
+        "combine": {
+            "command": ["report.py", "combine"],
+            "inputs": [os.path.join("ATTENDRO-REPORT", name) for name in combine.files]
+                      + code(COMBINE_SCRIPT) + cites,
+            "outputs": ["ATTENDRO-REPORT/Attendro_Full_Report.html"],
+            "deps": ["references"],
+        },
+        "pdf": {
+            "command": ["report.py", "pdf"],
+            "inputs": [SOURCE_MD, *build_report_v3.DIAGRAM_FILES, *cites,
+                       *(os.path.relpath(path, REPO_ROOT) for path in build_report_v3.BUILD_FILES)],
+            "outputs": [os.path.join(build_report_v3.OUTPUT_DIR, "Attendro_Final_Report.pdf")],
+            "deps": ["references"],
+        },
+        "docx": {
+            "command": ["report.py", "docx"],
+            "inputs": [SOURCE_MD, "docs/diagrams/*.md", *code("report_gen/build_docx.py"), *cites],
+            "outputs": ["project-report/FINAL_OUTPUT/Attendro_Final_Report.docx"],
+            "deps": ["references"],
+        },
+        "references": {
+            "command": ["report_gen/references.py"],
+            "inputs": [references.PDF_GLOB, *code("report_gen/references.py")],
+            "outputs": [references.DATASET],
+            "deps": [],
+        },
+        "search": {
+            "command": ["report_gen/search.py", "index"],
+            "inputs": [*search.SOURCES, *code("report_gen/search.py")],
+            "outputs": [os.path.relpath(search.MANIFEST, REPO_ROOT)],
+            # Shares the PDF text cache references fills in parallel
+            "deps": ["references"],
+        },
+    }
+
+
+def closure(graph, targets):
+    """The targets plus everything they depend on."""
+    wanted, stack = set(), list(targets)
+    while stack:
+        name = stack.pop()
+        if name not in wanted:
+            wanted.add(name)
+            stack.extend(graph[name]["deps"])
+    return wanted
+
+
+def topological_order(graph, names):
+    order, seen = [], set()
+
+    def visit(name):
+        if name in seen:
+            return
+        seen.add(name)
+        for dep in graph[name]["deps"]:
+            visit(dep)
+        order.append(name)
+
+    for name in sorted(names):
+        visit(name)
+    return order
+
+
+def input_digests(node):
+    """{path: sha256} for every file the node reads, globs expanded."""
+    digests = {}
+    for pattern in node["inputs"]:
+        paths = sorted(glob.glob(pattern)) if glob.has_magic(pattern) else [pattern]
+        for path in paths:
+            try:
+                with open(path, 'rb') as f:
+                    digests[path] = hashlib.sha256(f.read()).hexdigest()
+            except FileNotFoundError:
+                digests[path] = None
+    return digests
+
+
+def stale_reason(node, stamp, digests, force=False):
+    """Why the node needs building, or None if it is up to date. digests is input_digests(node)."""
+    if force:
+        return "forced"
+    if stamp is None:
+        return "never built"
+    for path in node["outputs"]:
+        if not os.path.exists(path):
+            return f"output {path} missing"
+    if stamp["command"] != node["command"]:
+        return "command changed"
+    old, new = stamp["inputs"], digests
+    changed = sorted(path for path in set(old) | set(new) if old.get(path) != new.get(path))
+    if changed:
+        more = f" (+{len(changed) - 1} more)" if len(changed) > 1 else ""
+        return f"input {changed[0]} changed{more}"
+    return None
+
+
+def load_state():
+    if os.path.exists(STATE_FILE):
+        with open(STATE_FILE, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    return {}
+
+
+def save_state(state):
+    os.makedirs(os.path.dirname(STATE_FILE), exist_ok=True)
+    tmp = f"{STATE_FILE}.{os.getpid()}.tmp"
+    with open(tmp, 'w', encoding='utf-8') as f:
+        json.dump(state, f, indent=1, sort_keys=True)
+    os.replace(tmp, STATE_FILE)
+
+
+def dry_run(graph, names, state, force=False):
+    """Prints each node that would rebuild and why; dependents of a rebuild may rebuild too."""
+    rebuilding = set()
+    for name in topological_order(graph, names):
+        reason = stale_reason(graph[name], state.get(name), input_digests(graph[name]), force)
+        if reason is None:
+            pending = [dep for dep in graph[name]["deps"] if dep in rebuilding]
+            if pending:
+                reason = f"if {', '.join(pending)} changes its outputs"
+        if reason is None:
+            print(f"  up to date  {name}")
+        else:
+            rebuilding.add(name)
+            print(f"  rebuild     {name}: {reason}")
+    return rebuilding
+
+
+def run_node(node):
+    start = time.perf_counter()
+    result = subprocess.run([sys.executable, *node["command"]], cwd=REPO_ROOT,
+                            stdout=subprocess.PIPE, stderr=subprocess.STDOUT, text=True)
+    return result.returncode, result.stdout, time.perf_counter() - start
+
+
+def build(targets=None, jobs=1, force=False, dry=False):
+    """Brings the targets (default: every node) up to date. Returns False if a node failed."""
+    os.chdir(REPO_ROOT)
+    graph = nodes()
+    unknown = sorted(set(targets or []) - set(graph))
+    if unknown:
+        raise KeyError(f"unknown target(s): {', '.join(unknown)} (have {', '.join(graph)})")
+    names = closure(graph, targets or graph)
+    state = load_state()
+    if dry:
+        dry_run(graph, names, state, force)
+        return True
+
+    waiting = {name: set(graph[name]["deps"]) & names for name in names}
+    done, failed, running, digests = set(), set(), {}, {}
+    with ThreadPoolExecutor(max_workers=max(1, jobs)) as pool:
+        while waiting or running:
+            for name in sorted(n for n, deps in waiting.items() if deps <= done | failed):
+                del waiting[name]
+                blocked = sorted(dep for dep in graph[name]["deps"] if dep in failed)
+                if blocked:
+                    print(f"  skipped     {name}: {', '.join(blocked)} failed")
+                    failed.add(name)
+                    continue
+                # Digests taken before the build, so edits made while it runs still count as changes
+                digests[name] = input_digests(graph[name])
+                reason = stale_reason(graph[name], state.get(name), digests[name], force)
+                if reason is None:
+                    print(f"  up to date  {name}")
+                    done.add(name)
+                    continue
+                print(f"  building    {name}: {reason}")
+                running[pool.submit(run_node, graph[name])] = name
+            if not running:
+                continue
+
+            finished, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in finished:
+                name = running.pop(future)
+                code, output, seconds = future.result()
+                if code == 0:
+                    state[name] = {"command": graph[name]["command"], "inputs": digests[name]}
+                    save_state(state)
+                    done.add(name)
+                    print(f"  built       {name} in {seconds:.1f}s")
+                else:
+                    failed.add(name)
+                    print(f"  FAILED      {name} (exit {code}):")
+                    print("\n".join("      " + line for line in output.rstrip().splitlines()[-15:]))
+    return not failed
+
@@ -0,0 +1,100 @@
+import heapq
+import itertools
+import secrets
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future
+
+# Lower runs first
+INTERACTIVE = 0
+BATCH = 1
+PRIORITIES = {"interactive": INTERACTIVE, "batch": BATCH}
+
+# Handles of finished jobs kept around for polling
+HISTORY_SIZE = 256
+
+
+class JobQueue:
+    """
+    Runs render jobs one at a time on a background thread, most urgent first.
+
+    submit() returns a concurrent.futures.Future: poll it with done(), block on
+    result(), or await asyncio.wrap_future(). A job submitted while an earlier
+    one for the same target is still waiting replaces that job, so only the
+    latest source is rendered and every caller gets its result. Interactive
+    jobs are taken before batch jobs; equal priorities run in submission order.
+    """
+
+    def __init__(self, run):
+        self.run = run
+        self.cond = threading.Condition()
+        self.heap = []                # (priority, seq, target); stale rows are skipped
+        self.pending = {}             # target -> {"job", "priority", "seq", "future", "id"}
+        self.handles = OrderedDict()  # job id -> Future
+        self.seq = itertools.count(1)
+        self.coalesced = 0
+        self.completed = 0
+        threading.Thread(target=self.work, name="render-queue", daemon=True).start()
+
+    def submit(self, target, job, priority=BATCH):
+        with self.cond:
+            entry = self.pending.get(target)
+            if entry is not None:
+                entry["job"] = job
+                self.coalesced += 1
+                if priority < entry["priority"]:
+                    entry["priority"] = priority
+                    entry["seq"] = next(self.seq)
+                    heapq.heappush(self.heap, (priority, entry["seq"], target))
+                return entry["future"]
+
+            seq = next(self.seq)
+            future = Future()
+            # Random, not the sequence number: ids go into /jobs/<id> URLs and shouldn't be guessable;
+            # targets (absolute paths for paper jobs) stay in here
+            future.job_id = secrets.token_hex(8)
+            self.pending[target] = {"job": job, "priority": priority, "seq": seq,
+                                    "future": future, "id": future.job_id}
+            self.handles[future.job_id] = future
+            while len(self.handles) > HISTORY_SIZE:
+                self.handles.popitem(last=False)
+            heapq.heappush(self.heap, (priority, seq, target))
+            self.cond.notify()
+            return future
+
+    def next_entry(self):
+        with self.cond:
+            while True:
+                while not self.heap:
+                    self.cond.wait()
+                _, seq, target = heapq.heappop(self.heap)
+                entry = self.pending.get(target)
+                if entry is not None and entry["seq"] == seq:
+                    del self.pending[target]
+                    return entry
+
+    def work(self):
+        while True:
+            entry = self.next_entry()
+            future = entry["future"]
+            if not future.set_running_or_notify_cancel():
+                continue
+            try:
+                future.set_result(self.run(entry["job"]))
+            except Exception as e:
+                future.set_exception(e)
+            self.completed += 1
+
+    def status(self, job_id):
+        """{"status": "queued" | "running" | "done" | "failed" | "cancelled", ...} for a job id, or None if unknown."""
+        with self.cond:
+            future = self.handles.get(job_id)
+        if future is None:
+            return None
+        if not future.done():
+            return {"job": job_id, "status": "running" if future.running() else "queued"}
+        if future.cancelled():
+            return {"job": job_id, "status": "cancelled"}
+        if future.exception() is not None:
+            return {"job": job_id, "status": "failed", "error": str(future.exception())}
+        return {"job": job_id, "status": "done", "result": future.result()}
@@ -0,0 +1,140 @@
+"""
+Lazy output mode for the combined HTML reports (`report.py merge --lazy`,
+`report.py combine --lazy`). Next to the usual single file it writes:
+
+  <name>_lazy.html       shell: head, cover and table of contents, plus one
+                         empty placeholder per chapter
+  <name>_fragments/      one HTML fragment per chapter
+
+A placeholder fetches its fragment when it scrolls near the viewport, and
+mermaid is imported on first need and run only on chapters that were shown.
+Printing through the page (its print buttons or Ctrl/Cmd+P) and #hash links,
+including the one the shell is opened with, load every chapter first.
+Fragment names carry a content hash, so server.py (/reports/<name>/) serves
+them as immutable and unchanged chapters are never rewritten. Fragments are
+fetched over HTTP; open the shell through server.py, not from disk.
+"""
+import hashlib
+import os
+import re
+
+from report_gen import mermaid
+
+MERMAID_ESM = "https://cdn.jsdelivr.net/npm/mermaid@10/dist/mermaid.esm.min.mjs"
+# Height a chapter occupies before it loads (one A4 page), so the scrollbar stays roughly right
+PLACEHOLDER_HEIGHT = "297mm"
+# Start fetching this far ahead of the viewport
+ROOT_MARGIN = "800px"
+FRAGMENT_RE = re.compile(r'^\d{2}-[\w-]+\.[0-9a-f]{12}\.html$')
+SLUG_RE = re.compile(r'[^\w-]+')
+
+LOADER_JS = """
+<script type="module">
+    let mermaidReady = null;
+    async function runMermaid(el) {
+        const nodes = el.querySelectorAll('.mermaid');
+        if (!nodes.length) return;
+        mermaidReady = mermaidReady || import('%(mermaid)s').then(m => {
+            m.default.initialize({ startOnLoad: false, theme: '%(theme)s', securityLevel: 'loose' });
+            return m.default;
+        });
+        (await mermaidReady).run({ nodes });
+    }
+    function load(el) {
+        if (!el.loading) {
+            el.loading = fetch(el.dataset.src).then(r => r.ok ? r.text() : Promise.reject(r.statusText))
+                .then(html => { el.innerHTML = html; el.style.minHeight = ''; return runMermaid(el); })
+                .catch(err => { el.textContent = 'Could not load ' + el.dataset.src + ': ' + err; });
+        }
+        return el.loading;
+    }
+    const chapters = [...document.querySelectorAll('.lazy-chapter')];
+    const observer = new IntersectionObserver(entries => {
+        for (const entry of entries) {
+            if (entry.isIntersecting) { observer.unobserve(entry.target); load(entry.target); }
+        }
+    }, { rootMargin: '%(margin)s' });
+    chapters.forEach(el => observer.observe(el));
+    // Diagrams in the cover/TOC that could not be pre-rendered (none usually: no import then)
+    runMermaid(document.body);
+    // Links into chapters that haven't loaded yet, and printing, need everything
+    const loadAll = () => Promise.all(chapters.map(load));
+    function goToHash() {
+        const id = decodeURIComponent(location.hash.slice(1));
+        if (id && !document.getElementById(id)) loadAll().then(() => document.getElementById(id)?.scrollIntoView());
+    }
+    window.addEventListener('hashchange', goToHash);
+    // hashchange doesn't fire for the hash the page was opened with
+    goToHash();
+    // Browsers don't wait for promises in beforeprint, so the print buttons and Ctrl/Cmd+P go
+    // through a print() that loads every chapter and its images first
+    const nativePrint = window.print.bind(window);
+    window.print = async () => {
+        await loadAll();
+        await Promise.all([...document.images].map(img => img.decode().catch(() => {})));
+        nativePrint();
+    };
+    window.addEventListener('keydown', e => {
+        if ((e.ctrlKey || e.metaKey) && e.key.toLowerCase() === 'p') { e.preventDefault(); window.print(); }
+    });
+    // Printing from the browser menu can't be held back; start loading anyway
+    window.addEventListener('beforeprint', loadAll);
+</script>
+"""
+
+
+def fragments_dir(output_path):
+    """project-report/Attendro_Full_Report.html -> project-report/Attendro_Full_Report_fragments"""
+    return os.path.splitext(output_path)[0] + "_fragments"
+
+
+def lazy_path(output_path):
+    return os.path.splitext(output_path)[0] + "_lazy.html"
+
+
+def write_fragment(out_dir, index, name, html):
+    """Writes a chapter fragment under a content-hashed name (unless already there) and returns the name."""
+    digest = hashlib.sha256(html.encode("utf-8")).hexdigest()[:12]
+    slug = SLUG_RE.sub('-', os.path.splitext(name)[0]).strip('-')
+    filename = f"{index:02d}-{slug}.{digest}.html"
+    path = os.path.join(out_dir, filename)
+    if not os.path.exists(path):
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write(html)
+    return filename
+
+
+def write_lazy(page_start, parts, page_end, output_path, eager=(), theme="default"):
+    """
+    Writes the lazy shell and chapter fragments for a report whose single-file
+    form is page_start + the html of every part + page_end. parts is a list of
+    (name, html) in document order; parts named in eager (cover, TOC) go into
+    the shell as is, every other one becomes a fragment. Returns the shell path.
+    """
+    out_dir = fragments_dir(output_path)
+    os.makedirs(out_dir, exist_ok=True)
+
+    body, written = [], set()
+    for index, (name, html) in enumerate(parts, start=1):
+        # Diagrams mmdc can lay out are inlined as SVG; the rest are left for the in-browser run
+        html, _ = mermaid.prerender(html)
+        if name in eager:
+            body.append(html)
+            continue
+        filename = write_fragment(out_dir, index, name, html)
+        written.add(filename)
+        src = f"{os.path.basename(out_dir)}/{filename}"
+        body.append(f'<section class="lazy-chapter" data-src="{src}" style="min-height: {PLACEHOLDER_HEIGHT}">'
+                    f'<noscript><a href="{src}">{name}</a></noscript></section>')
+    for filename in os.listdir(out_dir):
+        if filename not in written and FRAGMENT_RE.match(filename):
+            os.remove(os.path.join(out_dir, filename))
+
+    # The shell never loads mermaid up front; LOADER_JS imports it for chapters that need it
+    loader = LOADER_JS % {"mermaid": MERMAID_ESM, "theme": theme, "margin": ROOT_MARGIN}
+    shell = mermaid.strip_loader(page_start) + "\n".join(body) + loader + page_end
+    path = lazy_path(output_path)
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write(shell)
+    print(f"Lazy report: {path} + {len(written)} chapter fragments in {out_dir}")
+    return path
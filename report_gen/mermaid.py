@@ -0,0 +1,127 @@
+import hashlib
+import html
+import os
+import re
+import shutil
+import subprocess
+import sys
+import tempfile
+import textwrap
+
+# Rendered SVGs are cached by the hash of the diagram source, so each diagram
+# is laid out once no matter how many reports or rebuilds include it.
+CACHE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), ".cache", "mermaid")
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+MERMAID_BLOCK_RE = re.compile(r'<div class="mermaid">(.*?)</div>', re.DOTALL)
+# Both loader styles used by the reports: the classic <script src=".../mermaid.min.js">
+# plus its initialize() call, and the ES module import from the CDN.
+MERMAID_SCRIPT_RE = re.compile(
+    r'<script[^>]*src="[^"]*mermaid[^"]*"[^>]*>\s*</script>\s*'
+    r'|<script[^>]*>(?:(?!</script>).)*mermaid\.initialize(?:(?!</script>).)*</script>\s*',
+    re.DOTALL,
+)
+XML_PROLOG_RE = re.compile(r'^\s*<\?xml[^>]*\?>\s*')
+
+
+def find_renderer():
+    """
+    Locates the mermaid-cli binary (mmdc). MERMAID_CLI overrides the lookup,
+    otherwise PATH and the repo's node_modules are searched.
+    """
+    override = os.environ.get("MERMAID_CLI")
+    if override:
+        return override
+    on_path = shutil.which("mmdc")
+    if on_path:
+        return on_path
+    local = os.path.join(REPO_ROOT, "node_modules", ".bin", "mmdc")
+    if os.path.exists(local):
+        return local
+    return None
+
+
+def source_hash(source):
+    return hashlib.sha256(source.encode("utf-8")).hexdigest()
+
+
+def normalize_source(raw):
+    # Blocks are indented to match the surrounding HTML and may carry entities (--&gt;)
+    return textwrap.dedent(html.unescape(raw)).strip()
+
+
+def render_svg(source):
+    """
+    Returns the SVG markup for a mermaid diagram, or None if no renderer is
+    available or the diagram fails to render.
+    """
+    digest = source_hash(source)
+    cache_path = os.path.join(CACHE_DIR, f"{digest}.svg")
+    if os.path.exists(cache_path):
+        with open(cache_path, 'r', encoding='utf-8') as f:
+            return f.read()
+
+    renderer = find_renderer()
+    if not renderer:
+        return None
+
+    with tempfile.TemporaryDirectory() as tmp:
+        src_path = os.path.join(tmp, "diagram.mmd")
+        out_path = os.path.join(tmp, "diagram.svg")
+        with open(src_path, 'w', encoding='utf-8') as f:
+            f.write(source)
+        # A unique svg id keeps the generated #id-scoped styles from colliding
+        # when several diagrams are inlined into the same page.
+        cmd = [renderer, "-i", src_path, "-o", out_path, "-b", "transparent",
+               "-I", f"mermaid-{digest[:12]}", "-q"]
+        try:
+            subprocess.run(cmd, check=True, capture_output=True, timeout=120)
+        except (OSError, subprocess.SubprocessError) as e:
+            print(f"Warning: mermaid render failed ({e})")
+            return None
+        if not os.path.exists(out_path):
+            return None
+        with open(out_path, 'r', encoding='utf-8') as f:
+            svg = XML_PROLOG_RE.sub('', f.read())
+
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    with open(cache_path, 'w', encoding='utf-8') as f:
+        f.write(svg)
+    return svg
+
+
+def prerender(html_text):
+    """
+    Replaces every <div class="mermaid"> block with its pre-rendered SVG.
+    Blocks that cannot be rendered are left untouched.
+    Returns (html, number of blocks still needing the JS runtime).
+    """
+    remaining = 0
+
+    def replace(match):
+        nonlocal remaining
+        svg = render_svg(normalize_source(match.group(1)))
+        if svg is None:
+            remaining += 1
+            return match.group(0)
+        return f'<div class="mermaid-svg">{svg}</div>'
+
+    return MERMAID_BLOCK_RE.sub(replace, html_text), remaining
+
+
+def strip_loader(html_text):
+    """Removes the mermaid <script> loaders once no diagram needs them."""
+    return MERMAID_SCRIPT_RE.sub('', html_text)
+
+
+def main(paths):
+    """Lays out the mermaid blocks in the given HTML files into the SVG cache."""
+    remaining = 0
+    for path in paths:
+        with open(path, 'r', encoding='utf-8') as f:
+            remaining += prerender(f.read())[1]
+    print(f"Pre-rendered diagrams from {len(paths)} file(s); {remaining} block(s) still need the JS runtime")
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -0,0 +1,31 @@
+import re
+from functools import lru_cache
+
+# Shared, precompiled patterns for the report scripts. Compiling once at import
+# keeps the per-line loops from going through re's internal cache lookup on
+# every call.
+
+# Markdown headings
+SECTION_HEADING_RE = re.compile(r'^###\s+\d+\.\d+\s+')          # ### 1.1 Title  (promoted to ##)
+SUBSECTION_HEADING_RE = re.compile(r'^###\s+\d+\.\d+\.\d+\s+')  # ### 1.1.1 Title (stays ###)
+NUMBERED_ITEM_RE = re.compile(r'^\d+\.')
+CODE_FENCE_RE = re.compile(r'```(.*?)```', re.DOTALL)
+MD_IMAGE_RE = re.compile(r'!\[([^\]]*)\]\(([^)\s]+)[^)]*\)')       # ![alt](path "title")
+
+# HTML extraction
+BODY_RE = re.compile(r'<body[^>]*>(.*?)</body>', re.DOTALL)
+STYLE_RE = re.compile(r'<style>(.*?)</style>', re.DOTALL)
+SCRIPT_RE = re.compile(r'<script.*?</script>', re.DOTALL)
+CONTROLS_RE = re.compile(r'<div class="controls">.*?</div>', re.DOTALL)
+DIAGRAM_WRAP_BODY_RE = re.compile(r'<div class="diagram-wrap" id="diagram">(.*?)</div>\s*</body>', re.DOTALL)
+DIAGRAM_WRAP_RE = re.compile(r'<div class="diagram-wrap.*?>(.*?)</div>', re.DOTALL)
+DIAGRAM_WRAP_OUTER_RE = re.compile(r'<div class="diagram-wrap".*?</div>\s*</div>', re.DOTALL)
+IMG_TAG_RE = re.compile(r'<img\b[^>]*>')
+IMG_SRC_RE = re.compile(r'(<img\b[^>]*?\bsrc=["\'])([^"\']+)(["\'])')
+
+
+@lru_cache(maxsize=None)
+def section_title_re(title):
+    """Compiled heading pattern for a split_report section title (whitespace-tolerant)."""
+    escaped = re.escape(title).replace(r'\ ', r'\s*')
+    return re.compile(r'(^|\n)(#+)\s*' + escaped, re.IGNORECASE)
@@ -0,0 +1,140 @@
+"""
+Size post-processing for generated PDFs. thumbnails.write_outputs() runs it on
+the bytes write_pdf() returns; the command line runs it on any PDF.
+
+  - fonts: WeasyPrint is asked for subset fonts (WRITE_OPTIONS); any font
+    still embedded whole is reported
+  - images: left as they are by default, since the print variants
+    (assets.py) are lossless on purpose; with a quality set (--quality or
+    REPORT_PDF_IMAGE_QUALITY), opaque RGB and greyscale images are re-encoded
+    as JPEG when that saves at least MIN_SAVING
+  - identical objects (a logo on every page, or repeated across merged
+    reports) are stored once, and unreferenced objects are dropped
+
+Pure Python (pypdf + Pillow), no network. pypdf writes a plain xref table,
+which can make a rewritten file larger than WeasyPrint's compressed one, so
+the result is only used when it is actually smaller.
+
+    python report_gen/pdfopt.py report.pdf [more.pdf ...] [--quality 70] [--in-place]
+"""
+import argparse
+import io
+import os
+import re
+
+# JPEG quality for recompressing images, lossy and so opt-in: None (or 0) keeps
+# every image as it is; REPORT_PDF_IMAGE_QUALITY sets it for builds
+IMAGE_QUALITY = None
+QUALITY_ENV = "REPORT_PDF_IMAGE_QUALITY"
+# Keep an image as is unless re-encoding shrinks it by at least this fraction
+MIN_SAVING = 0.1
+# Extra write_pdf() options for every build
+WRITE_OPTIONS = {"full_fonts": False}
+SUBSET_TAG_RE = re.compile(r'^/?[A-Z]{6}\+')
+
+
+def image_quality():
+    value = os.environ.get(QUALITY_ENV)
+    return int(value) if value else IMAGE_QUALITY
+
+
+def full_fonts(reader):
+    """BaseFont names of fonts embedded without subsetting."""
+    names = set()
+    for page in reader.pages:
+        resources = page.get("/Resources")
+        fonts = resources.get_object().get("/Font") if resources else None
+        for font in (fonts.get_object().values() if fonts else []):
+            font = font.get_object()
+            descriptor = font.get("/FontDescriptor")
+            embedded = descriptor and any(k in descriptor.get_object()
+                                          for k in ("/FontFile", "/FontFile2", "/FontFile3"))
+            name = str(font.get("/BaseFont", ""))
+            if embedded and not SUBSET_TAG_RE.match(name):
+                names.add(name)
+    return sorted(names)
+
+
+def recompress_images(writer, quality):
+    """Re-encodes each distinct opaque RGB/greyscale image as JPEG when clearly smaller. Returns the count."""
+    seen, count = set(), 0
+    for page in writer.pages:
+        for image in page.images:
+            ref = image.indirect_reference
+            if ref is None or ref.idnum in seen:
+                continue
+            seen.add(ref.idnum)
+            xobject = ref.get_object()
+            if "/SMask" in xobject or "/Mask" in xobject or image.image.mode not in ("RGB", "L"):
+                continue
+            buf = io.BytesIO()
+            image.image.save(buf, format="JPEG", quality=quality, optimize=True)
+            # The image object as it would be written (still encoded): its size in the file
+            stored = io.BytesIO()
+            xobject.write_to_stream(stored)
+            if len(buf.getvalue()) < len(stored.getvalue()) * (1 - MIN_SAVING):
+                image.replace(image.image, quality=quality)
+                count += 1
+    return count
+
+
+def optimize(pdf_bytes, quality=None):
+    """
+    Returns (bytes, stats) for a PDF: the smaller of the input and its optimized
+    rewrite, and {"before", "after", "images", "full_fonts"}.
+    """
+    quality = image_quality() if quality is None else quality
+    stats = {"before": len(pdf_bytes), "after": len(pdf_bytes), "images": 0, "full_fonts": []}
+    try:
+        from pypdf import PdfReader, PdfWriter
+        from pypdf.errors import PyPdfError
+    except ImportError:
+        print("Warning: pypdf not installed; PDF left unoptimized")
+        return pdf_bytes, stats
+
+    try:
+        reader = PdfReader(io.BytesIO(pdf_bytes))
+        stats["full_fonts"] = full_fonts(reader)
+        writer = PdfWriter(clone_from=reader)
+        images = recompress_images(writer, quality) if quality else 0
+        for page in writer.pages:
+            page.compress_content_streams(level=9)
+        writer.compress_identical_objects(remove_duplicates=True, remove_unreferenced=True)
+        buf = io.BytesIO()
+        writer.write(buf)
+    except (PyPdfError, OSError) as e:
+        print(f"Warning: PDF left unoptimized ({e})")
+        return pdf_bytes, stats
+    if len(buf.getvalue()) < len(pdf_bytes):
+        stats.update(after=len(buf.getvalue()), images=images)
+        return buf.getvalue(), stats
+    return pdf_bytes, stats
+
+
+def describe(stats):
+    before, after = stats["before"], stats["after"]
+    line = f"PDF size {before / 1024:.0f} KB -> {after / 1024:.0f} KB ({(before - after) / max(before, 1):.0%} smaller"
+    line += f", {stats['images']} images recompressed)" if stats["images"] else ")"
+    if stats["full_fonts"]:
+        line += f"; fonts embedded in full: {', '.join(stats['full_fonts'])}"
+    return line
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Shrink PDFs: recompress images, dedupe objects, check font subsetting")
+    parser.add_argument("paths", nargs="+")
+    parser.add_argument("--quality", type=int, default=None,
+                        help="recompress images as JPEG at this quality (lossy; default: keep images as they are)")
+    parser.add_argument("--in-place", action="store_true", help="overwrite the input (default: write <name>.min.pdf)")
+    args = parser.parse_args()
+    for path in args.paths:
+        with open(path, 'rb') as f:
+            data, stats = optimize(f.read(), args.quality)
+        out = path if args.in_place else os.path.splitext(path)[0] + ".min.pdf"
+        with open(out, 'wb') as f:
+            f.write(data)
+        print(f"{out}: {describe(stats)}")
+
+
+if __name__ == "__main__":
+    main()
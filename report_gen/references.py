@@ -0,0 +1,264 @@
+"""
+Reference dataset from the cited papers in ATTENDRO-REPORT/*.pdf.
+
+Every PDF is parsed once per version: its page text and the metadata read
+from the first page (title, authors, year, venue, volume/issue/pages, DOI)
+are cached under .cache/references by file hash. Cache misses are extracted
+across a process pool. The result is written to ATTENDRO-REPORT/references.json,
+one entry per PDF with a citation key (first author's surname + year), for
+the References chapters to build from without touching the PDFs.
+
+Metadata is read off the title page with heuristics that fit journal-style
+first pages; entries are as good as the PDF's layout allows, so check new
+ones before citing.
+
+    python report_gen/references.py          # update references.json
+    python report_gen/references.py -j 4     # with 4 worker processes
+"""
+import argparse
+import glob
+import json
+import os
+import re
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from report_gen import store
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+CACHE_DIR = os.path.join(REPO_ROOT, "report_gen", ".cache", "references")
+PDF_GLOB = "ATTENDRO-REPORT/*.pdf"
+DATASET = "ATTENDRO-REPORT/references.json"
+# Part of every cache name; bump when extraction or the heuristics change
+EXTRACT_VERSION = "1"
+
+# Journal banner lines above the title
+HEADER_RE = re.compile(r'journal|transactions|proceedings|\bproc\.|appeared in|issn|\bvol(ume)?\b|www\.|https?:|'
+                       r'\bdoi\b|\bpage\b|©|copyright|research article|available at|homepage|^\W*\d+\W*$',
+                       re.IGNORECASE)
+# An author list: names followed by footnote marks (Idris1*, Ross1, Karandikar *), or comma separated
+AUTHOR_LINE_RE = re.compile(r'[A-Za-z.]\s?(\d+\*?|\*\d*)(,|\s|$)|,')
+# First line after the author list: affiliations, e-mail, abstract
+AFFILIATION_RE = re.compile(r'^\W*\d|department|university|college|institute|school|student|faculty|fakulti|'
+                            r'@|abstract|a b s t r a c t|received|corresponding', re.IGNORECASE)
+FOOTNOTE_RE = re.compile(r'(?<=[A-Za-z.])\s?(\d+\*?|\*\d*)(?=,|\s|$)')
+AUTHOR_SPLIT_RE = re.compile(r',|\band\b|&')
+HONORIFICS = {"dr", "prof", "mr", "mrs", "ms"}
+YEAR_RE = re.compile(r'\b(19[5-9]\d|20\d\d)\b')
+DOI_RE = re.compile(r'\b10\.\d{4,9}/[^\s"<>]+')
+VENUE_END_RE = re.compile(r',?\s*\b(vol|volume)\b|[-–]{1,2}\s*volume|\s{3,}|\be-?issn\b|,\s*$', re.IGNORECASE)
+VOLUME_RE = re.compile(r'\bvol(?:ume)?\.?\s*([0-9IVXLC]+)', re.IGNORECASE)
+ISSUE_RE = re.compile(r'(?<!ISSN )\b(?:issue|no)\.?\s*([0-9IVXLC]+)', re.IGNORECASE)
+PAGES_RE = re.compile(r'\b(?:pp|pages)\.?\s*(\d+\s*[-–]\s*\d+)', re.IGNORECASE)
+
+
+def clean(text):
+    return " ".join(text.split())
+
+
+def split_first_page(lines, meta_title):
+    """(header lines, title, author lines) of a title page's non-empty lines."""
+    i = 0
+    while i < len(lines) and HEADER_RE.search(lines[i]):
+        i += 1
+    header = lines[:i]
+    title_lines = []
+    wanted = clean(meta_title).lower()
+    while i < len(lines):
+        line = lines[i]
+        if wanted:
+            # Take lines while they spell out the title the PDF declares
+            joined = clean(" ".join(title_lines + [line])).lower()
+            if title_lines and not wanted.startswith(joined):
+                break
+        elif title_lines and AUTHOR_LINE_RE.search(line):
+            break
+        title_lines.append(line)
+        i += 1
+        if wanted and clean(" ".join(title_lines)).lower() == wanted:
+            break
+    authors = []
+    while i < len(lines) and not AFFILIATION_RE.search(lines[i]):
+        authors.append(lines[i])
+        i += 1
+    return header, clean(" ".join(title_lines)), authors
+
+
+def parse_authors(lines):
+    text = FOOTNOTE_RE.sub("", clean(" ".join(lines)))
+    names = []
+    for name in AUTHOR_SPLIT_RE.split(text):
+        words = name.strip(" *").split()
+        # "Dr. Varsha Karandikar" -> "Varsha Karandikar"; initials keep their dots
+        while words and words[0].strip(".").lower() in HONORIFICS:
+            words.pop(0)
+        if words:
+            names.append(" ".join(words))
+    return names
+
+
+def surname(author):
+    """Last word of a name that isn't an initial or a title: "Dr. Varsha Karandikar" -> "Karandikar"."""
+    words = [w for w in author.split() if len(w.strip(".")) > 2 and w.strip(".").lower() not in HONORIFICS]
+    return (words or author.split() or [""])[-1].strip(".")
+
+
+def extract_file(path):
+    """Page text and title-page metadata of one PDF. Runs in the worker processes."""
+    from pypdf import PdfReader
+
+    reader = PdfReader(path)
+    pages = [page.extract_text() or "" for page in reader.pages]
+    info = reader.metadata or {}
+    meta_title = clean(str(info.get("/Title") or ""))
+    # Word's placeholder titles are single symbols or blank
+    if sum(c.isalpha() for c in meta_title) < 10:
+        meta_title = ""
+    lines = [line.strip() for line in (pages[0] if pages else "").splitlines() if line.strip()]
+    header, title, author_lines = split_first_page(lines, meta_title)
+    banner = " ".join(header)
+
+    years = YEAR_RE.findall(banner) or YEAR_RE.findall(str(info.get("/CreationDate") or "")[2:6])
+    dois = [d.rstrip(".,;)") for d in DOI_RE.findall(pages[0] if pages else "")]
+    venue = re.sub(r'^(\d+\|\s*|appeared in\s+)', '', header[0], flags=re.IGNORECASE) if header else ""
+    venue = VENUE_END_RE.split(venue)[0].strip(" ,-–")
+
+    def first(regex):
+        m = regex.search(banner)
+        return m.group(1) if m else None
+
+    return {
+        "title": title or meta_title or os.path.splitext(os.path.basename(path))[0],
+        "authors": parse_authors(author_lines),
+        "year": int(years[0]) if years else None,
+        "venue": venue or None,
+        "volume": first(VOLUME_RE),
+        "issue": first(ISSUE_RE),
+        "pages": re.sub(r'\s*[-–]\s*', '-', first(PAGES_RE) or "") or None,
+        # The longest DOI on the title page is the article's; shorter ones are the journal prefix
+        "doi": max(dois, key=len) if dois else None,
+        "page_count": len(pages),
+        "text": pages,
+    }
+
+
+def cache_path(digest):
+    return os.path.join(CACHE_DIR, f"{digest[:32]}-v{EXTRACT_VERSION}.json")
+
+
+def extract_all(paths, jobs=None, verbose=False):
+    """
+    {path: extract_file(path)} for the given PDFs, from the cache where it has
+    the file's current hash, the rest extracted across `jobs` processes.
+    Files that fail to parse are left out with a warning.
+    """
+    digests = {path: store.file_digest(path) for path in paths}
+    results, missing = {}, []
+    for path in paths:
+        try:
+            with open(cache_path(digests[path]), 'r', encoding='utf-8') as f:
+                results[path] = json.load(f)
+        except (FileNotFoundError, ValueError):
+            missing.append(path)
+    if not missing:
+        return results
+
+    start = time.perf_counter()
+    jobs = max(1, min(jobs or os.cpu_count() or 1, len(missing)))
+    if jobs == 1:
+        # One file or one CPU: a pool would only add its start-up time
+        outcomes = [try_extract(path) for path in missing]
+    else:
+        with ProcessPoolExecutor(max_workers=jobs) as pool:
+            outcomes = list(pool.map(try_extract, missing))
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    for path, (data, error) in zip(missing, outcomes):
+        if error:
+            print(f"Warning: skipping {os.path.relpath(path, REPO_ROOT)} ({error})")
+            continue
+        tmp = f"{cache_path(digests[path])}.{os.getpid()}.tmp"
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump(data, f)
+        os.replace(tmp, cache_path(digests[path]))
+        results[path] = data
+    if verbose:
+        print(f"  extracted {len(missing)} PDFs in {time.perf_counter() - start:.2f}s ({jobs} processes)")
+    return results
+
+
+def try_extract(path):
+    """(data, None) or (None, error message): worker exceptions don't cross the pool well."""
+    try:
+        return extract_file(path), None
+    except Exception as e:
+        return None, f"{type(e).__name__}: {e}"
+
+
+def pdf_paths():
+    return sorted(glob.glob(os.path.join(REPO_ROOT, PDF_GLOB)))
+
+
+def build_dataset(jobs=None, verbose=False):
+    """Extracts (or reuses) every reference PDF and writes DATASET. Returns its entries."""
+    paths = pdf_paths()
+    extracted = extract_all(paths, jobs, verbose)
+    entries, keys = [], {}
+    for path in paths:
+        if path not in extracted:
+            continue
+        data = extracted[path]
+        base = re.sub(r'\W+', '', surname(data["authors"][0]).lower()) if data["authors"] else ""
+        base = (base or re.sub(r'\W+', '', os.path.splitext(os.path.basename(path))[0].lower())) + str(data["year"] or "")
+        keys[base] = keys.get(base, 0) + 1
+        entry = {"key": base, "file": os.path.relpath(path, REPO_ROOT),
+                 "sha256": store.file_digest(path)}
+        entry.update((k, v) for k, v in data.items() if k != "text")
+        entries.append(entry)
+    # Same author and year twice: idris2025a, idris2025b
+    seen = {}
+    for entry in entries:
+        if keys[entry["key"]] > 1:
+            seen[entry["key"]] = seen.get(entry["key"], 0) + 1
+            entry["key"] += "abcdefghijklmnopqrstuvwxyz"[seen[entry["key"]] - 1]
+
+    dataset = os.path.join(REPO_ROOT, DATASET)
+    text = json.dumps({"version": 1, "references": entries}, indent=2, ensure_ascii=False) + "\n"
+    try:
+        with open(dataset, 'r', encoding='utf-8') as f:
+            unchanged = f.read() == text
+    except FileNotFoundError:
+        unchanged = False
+    # Left alone when nothing changed, so its mtime only moves with its content
+    if not unchanged:
+        with open(dataset, 'w', encoding='utf-8') as f:
+            f.write(text)
+    if verbose:
+        print(f"{DATASET}: {len(entries)} references" + (" (unchanged)" if unchanged else ""))
+    return entries
+
+
+def load(path=None):
+    """The entries of the references dataset, without opening any PDF."""
+    with open(path or os.path.join(REPO_ROOT, DATASET), 'r', encoding='utf-8') as f:
+        return json.load(f)["references"]
+
+
+def page_text(entry):
+    """Cached page texts of a dataset entry's PDF (extracting it if the cache was cleared)."""
+    path = os.path.join(REPO_ROOT, entry["file"])
+    return extract_all([path]).get(path, {}).get("text", [])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build the references dataset from the reference PDFs")
+    parser.add_argument("-j", "--jobs", type=int, default=None, help="worker processes (default: CPU count)")
+    args = parser.parse_args()
+    for entry in build_dataset(args.jobs, verbose=True):
+        authors = ", ".join(entry["authors"][:3]) + (" et al." if len(entry["authors"]) > 3 else "")
+        print(f"  {entry['key']:<16} {authors[:40]:<40} {entry['title'][:60]}")
+
+
+if __name__ == "__main__":
+    main()
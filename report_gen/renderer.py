@@ -0,0 +1,190 @@
+import hashlib
+import json
+import os
+import re
+from collections import OrderedDict
+
+# Rendered blocks kept per renderer (a block is a paragraph, table, list, ...)
+CACHE_SIZE = 1024
+
+# Engine choice recorded by `python report_gen/bench.py engines`; the
+# REPORT_MARKDOWN_ENGINE environment variable overrides it.
+ENGINE_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), ".cache", "markdown-engine.json")
+ENGINE_ENV = "REPORT_MARKDOWN_ENGINE"
+# The engine the PDF/DOCX builds were written against; others must match it
+REFERENCE_ENGINE = "python-markdown"
+# Documents the engines are checked and timed on
+CONFORMANCE_SOURCES = [
+    "project-report/ATTENDRO_PROJECT_REPORT.md",
+    "docs/ATTENDRO_COMPREHENSIVE_REPORT.md",
+    "docs/START_HERE.md",
+    "docs/DELIVERY_SUMMARY.md",
+]
+
+FENCE_RE = re.compile(r'^\s{0,3}(```|~~~)')
+LIST_ITEM_RE = re.compile(r'^\s{0,3}([-*+]|\d+[.)])\s')
+CONTINUATION_RE = re.compile(r'^(\s{4}|\t)')
+# Reference-style link definitions resolve across blocks, so a document that
+# uses them is rendered in one piece.
+LINK_DEF_RE = re.compile(r'^\s{0,3}\[[^\]]+\]:\s', re.MULTILINE)
+
+
+def split_blocks(text):
+    """
+    Splits markdown into top-level blocks at blank lines. Fenced code stays in
+    one block, and indented continuations and further list items are kept with
+    the list they belong to, so each block renders the same on its own.
+    """
+    blocks = []
+    current = []
+    in_fence = False
+    for line in text.split('\n'):
+        if FENCE_RE.match(line):
+            in_fence = not in_fence
+        if in_fence or line.strip():
+            if not current and blocks and (CONTINUATION_RE.match(line) or
+                                           (LIST_ITEM_RE.match(line) and any(map(LIST_ITEM_RE.match, blocks[-1])))):
+                # Reopen the previous block (blank line inside a list / indented code); the list
+                # may start under a heading or paragraph line, so any item in the block counts
+                current = blocks.pop()
+                current.append('')
+            current.append(line)
+        elif current:
+            blocks.append(current)
+            current = []
+    if current:
+        blocks.append(current)
+    return ['\n'.join(b) for b in blocks]
+
+
+class BlockRenderer:
+    """
+    Renders markdown with a parser built once, memoizing HTML per top-level
+    block by content hash in a bounded LRU. Re-rendering a document after
+    editing one paragraph only converts that paragraph again.
+    """
+
+    def __init__(self, convert, joiner="\n", cache_size=CACHE_SIZE):
+        self.convert = convert
+        self.joiner = joiner
+        self.cache_size = cache_size
+        self.cache = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def render_block(self, block):
+        key = hashlib.sha1(block.encode("utf-8")).digest()
+        html = self.cache.get(key)
+        if html is not None:
+            self.hits += 1
+            self.cache.move_to_end(key)
+            return html
+        self.misses += 1
+        html = self.convert(block)
+        self.cache[key] = html
+        if len(self.cache) > self.cache_size:
+            self.cache.popitem(last=False)
+        return html
+
+    def render(self, text):
+        if LINK_DEF_RE.search(text):
+            return self.convert(text)
+        return self.joiner.join(self.render_block(b) for b in split_blocks(text))
+
+
+def python_markdown(extensions=('tables',)):
+    """python-markdown (report_gen scripts): one Markdown instance, reset() between blocks."""
+    import markdown
+    md = markdown.Markdown(extensions=list(extensions))
+
+    def convert(text):
+        md.reset()
+        return md.convert(text)
+
+    return BlockRenderer(convert, joiner="\n")
+
+
+def markdown_it():
+    """markdown-it-py: one parser instance; render() keeps no state. Tables on, as in python-markdown."""
+    from markdown_it import MarkdownIt
+    md = MarkdownIt("commonmark").enable("table")
+    return BlockRenderer(md.render, joiner="")
+
+
+ENGINES = {
+    "python-markdown": python_markdown,
+    "markdown-it": markdown_it,
+}
+
+SELF_CLOSING_RE = re.compile(r'<(\w+)([^>]*?)\s*/>')
+INTER_TAG_SPACE_RE = re.compile(r'>\s+<')
+TRAILING_SPACE_RE = re.compile(r'\s+</')
+STYLE_SPACE_RE = re.compile(r'style="([^"]*)"')
+
+
+def normalize_html(html):
+    """
+    Canonical form for comparing engines: ignores whitespace between tags,
+    <br /> vs <br>, optional quote escaping and spacing inside style attributes.
+    """
+    html = SELF_CLOSING_RE.sub(r'<\1\2>', html.strip())
+    html = INTER_TAG_SPACE_RE.sub('><', html)
+    html = TRAILING_SPACE_RE.sub('</', html)
+    html = STYLE_SPACE_RE.sub(lambda m: 'style="%s"' % m.group(1).replace(' ', '').rstrip(';'), html)
+    return html.replace('&quot;', '"').replace('&#x27;', "'").replace('&#39;', "'")
+
+
+def load_sources(paths=CONFORMANCE_SOURCES):
+    texts = []
+    for path in paths:
+        if os.path.exists(path):
+            with open(path, 'r', encoding='utf-8') as f:
+                texts.append(f.read())
+    return texts
+
+
+def conformance(engine, texts, reference=REFERENCE_ENGINE):
+    """
+    Renders every block of texts with engine and the reference engine.
+    Returns the mismatches as (block, reference html, engine html); empty means conformant.
+    """
+    ours, theirs = ENGINES[engine](), ENGINES[reference]()
+    mismatches = []
+    for text in texts:
+        for block in split_blocks(text):
+            expected, got = theirs.render_block(block), ours.render_block(block)
+            if normalize_html(expected) != normalize_html(got):
+                mismatches.append((block, expected, got))
+    return mismatches
+
+
+def save_selection(results):
+    """
+    results: {engine: {"throughput": bytes/s, "mismatches": n}}. Records the
+    fastest engine with no mismatches as the pipeline default.
+    """
+    passing = [name for name, r in results.items() if r["mismatches"] == 0]
+    engine = max(passing, key=lambda name: results[name]["throughput"]) if passing else REFERENCE_ENGINE
+    os.makedirs(os.path.dirname(ENGINE_FILE), exist_ok=True)
+    with open(ENGINE_FILE, 'w', encoding='utf-8') as f:
+        json.dump({"engine": engine, "results": results}, f, indent=2)
+    return engine
+
+
+def default_engine():
+    engine = os.environ.get(ENGINE_ENV)
+    if engine:
+        if engine not in ENGINES:
+            raise ValueError(f"Unknown markdown engine {engine!r} (choose from {', '.join(ENGINES)})")
+        return engine
+    try:
+        with open(ENGINE_FILE, 'r', encoding='utf-8') as f:
+            engine = json.load(f).get("engine")
+    except (OSError, ValueError):
+        engine = None
+    return engine if engine in ENGINES else REFERENCE_ENGINE
+
+
+def get_renderer(engine=None):
+    """A BlockRenderer for engine, or for the benchmarked default when engine is None."""
+    return ENGINES[engine or default_engine()]()
@@ -0,0 +1,131 @@
+"""
+Reproducible builds. With SOURCE_DATE_EPOCH set (seconds since 1970, as in
+https://reproducible-builds.org/specs/source-date-epoch/), identical inputs
+give byte-identical PDF and DOCX files:
+
+  - PDF: creation/modification dates pinned to SOURCE_DATE_EPOCH, and the
+    file /ID derived from the content instead of left out
+  - DOCX: core properties dated SOURCE_DATE_EPOCH, zip entries in a fixed
+    order with fixed timestamps and permissions
+
+    SOURCE_DATE_EPOCH=$(git log -1 --format=%ct) python report.py pdf
+    python report_gen/reproducible.py check pdf docx   # build twice, compare hashes
+"""
+import argparse
+import hashlib
+import io
+import os
+import subprocess
+import sys
+import zipfile
+from datetime import datetime, timezone
+
+EPOCH_ENV = "SOURCE_DATE_EPOCH"
+# Zip timestamps can't go below 1980-01-01
+ZIP_MIN_EPOCH = 315532800
+# Used by `check` when SOURCE_DATE_EPOCH isn't set
+DEFAULT_EPOCH = ZIP_MIN_EPOCH
+# OPC readers expect the content types part first
+ZIP_FIRST = "[Content_Types].xml"
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# Target -> (command building it, output file), run from the repository root
+CHECK_TARGETS = {
+    "pdf": (["report.py", "pdf", "--local"], "report_gen/output/Attendro_Final_Report.pdf"),
+    "pdf-v2": (["report_gen/build_report_v2.py"], "report_gen/output/Attendro_Final_Report.pdf"),
+    "chapters-pdf": (["report.py", "pdf", "--chapters"], "project-report/Attendro_Final_Report.pdf"),
+    "docx": (["report.py", "docx", "--local"], "project-report/FINAL_OUTPUT/Attendro_Final_Report.docx"),
+}
+
+
+def source_date():
+    """The pinned build time as an aware UTC datetime, or None for a normal build."""
+    value = os.environ.get(EPOCH_ENV)
+    if not value:
+        return None
+    return datetime.fromtimestamp(int(value), tz=timezone.utc)
+
+
+def pdf_options(document):
+    """
+    Pins a laid-out WeasyPrint Document's dates and returns the extra
+    write_pdf() options for a reproducible file ({} for a normal build).
+    """
+    date = source_date()
+    if date is None:
+        return {}
+    stamp = date.strftime("%Y-%m-%dT%H:%M:%SZ")
+    document.metadata.created = stamp
+    document.metadata.modified = stamp
+    # True makes pydyf derive the /ID pair from the file content
+    return {"pdf_identifier": True}
+
+
+def normalize_zip(data, date):
+    """Rewrites a zip with entries in a fixed order, one timestamp and fixed permissions."""
+    stamp = max(date, datetime.fromtimestamp(ZIP_MIN_EPOCH, tz=timezone.utc)).timetuple()[:6]
+    src = zipfile.ZipFile(io.BytesIO(data))
+    names = sorted(src.namelist(), key=lambda name: (name != ZIP_FIRST, name))
+    out = io.BytesIO()
+    with zipfile.ZipFile(out, 'w', zipfile.ZIP_DEFLATED) as dest:
+        for name in names:
+            info = zipfile.ZipInfo(name, date_time=stamp)
+            info.compress_type = zipfile.ZIP_DEFLATED
+            info.external_attr = 0o644 << 16
+            info.create_system = 3
+            dest.writestr(info, src.read(name))
+    return out.getvalue()
+
+
+def save_docx(doc, path):
+    """python-docx Document.save(), made byte-reproducible when SOURCE_DATE_EPOCH is set."""
+    date = source_date()
+    if date is None:
+        doc.save(path)
+        return
+    doc.core_properties.created = date.replace(tzinfo=None)
+    doc.core_properties.modified = date.replace(tzinfo=None)
+    buf = io.BytesIO()
+    doc.save(buf)
+    with open(path, 'wb') as f:
+        f.write(normalize_zip(buf.getvalue(), date))
+
+
+def build_digest(target, env):
+    command, output = CHECK_TARGETS[target]
+    subprocess.run([sys.executable, *command], cwd=REPO_ROOT, env=env, check=True,
+                   stdout=subprocess.DEVNULL)
+    with open(os.path.join(REPO_ROOT, output), 'rb') as f:
+        return hashlib.sha256(f.read()).hexdigest()
+
+
+def check(targets):
+    """Builds each target twice in fresh processes and compares output hashes."""
+    env = dict(os.environ)
+    env.setdefault(EPOCH_ENV, str(DEFAULT_EPOCH))
+    # Fresh builds both times: no daemon, no artifact store reuse
+    env["REPORT_NO_STORE"] = "1"
+    ok = True
+    for target in targets:
+        first, second = build_digest(target, env), build_digest(target, env)
+        same = first == second
+        ok = ok and same
+        print(f"{target:<14} {first[:16]} {second[:16]}  {'reproducible' if same else 'DIFFERENT'}")
+    return ok
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Reproducible build check")
+    sub = parser.add_subparsers(dest="command", required=True)
+    p = sub.add_parser("check", help="build twice and compare output hashes")
+    p.add_argument("targets", nargs="*", help=f"any of {', '.join(CHECK_TARGETS)} (default: pdf docx)")
+    args = parser.parse_args()
+    unknown = sorted(set(args.targets) - set(CHECK_TARGETS))
+    if unknown:
+        parser.error(f"unknown target(s): {', '.join(unknown)}")
+    if not check(args.targets or ["pdf", "docx"]):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,338 @@
+"""
+Full-text search over the report chapters, the research paper and the
+reference PDFs in ATTENDRO-REPORT/. server.py answers /search?q= from it.
+
+Text is extracted once per file version: each source gets a segment under
+.cache/search named by its content hash, holding the text (one unit per PDF
+page, one per HTML file) and its inverted index, term -> character offsets
+per unit, delta-encoded. index.json maps each source path to its segment;
+an update only re-extracts files whose size/mtime changed and whose hash then
+differs, so editing one chapter never re-reads the PDFs.
+
+Queries match every term (AND); a trailing * makes a term a prefix. Results
+are ranked with BM25 and come with an HTML snippet, hits in <mark>.
+
+    python report_gen/search.py index                   # bring the index up to date
+    python report_gen/search.py query face recognition  # search from the command line
+"""
+import argparse
+import bisect
+import glob
+import html
+import json
+import math
+import os
+import re
+import sys
+import threading
+import time
+from html.parser import HTMLParser
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from report_gen import references, store
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+INDEX_DIR = os.path.join(REPO_ROOT, "report_gen", ".cache", "search")
+MANIFEST = os.path.join(INDEX_DIR, "index.json")
+# Part of every segment name; bump when extraction or tokenizing changes
+INDEX_VERSION = "2"
+# Searched files, relative to the repository root (generated combined reports left out)
+SOURCES = [
+    "ATTENDRO-REPORT/Abstract.html",
+    "ATTENDRO-REPORT/Chapter-*.html",
+    "ATTENDRO-REPORT/References.html",
+    "ATTENDRO-REPORT/Research-paper/Attendro_Research_Paper*.html",
+    "ATTENDRO-REPORT/*.pdf",
+]
+TOKEN_RE = re.compile(r'\w+')
+# BM25 parameters
+K1 = 1.2
+B = 0.75
+# Characters of context around the first hit in a snippet
+SNIPPET_BEFORE = 80
+SNIPPET_AFTER = 160
+SKIP_TAGS = {"script", "style", "head", "noscript", "svg"}
+BLOCK_TAGS = {"p", "div", "section", "br", "li", "tr", "td", "th", "h1", "h2", "h3", "h4", "h5", "h6",
+              "table", "figcaption", "pre", "blockquote"}
+
+
+class TextExtractor(HTMLParser):
+    """Visible text of an HTML page, with a line break per block element, plus its <title>."""
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.parts, self.title, self.skip, self.in_title = [], "", 0, False
+
+    def handle_starttag(self, tag, attrs):
+        if tag == "title":
+            self.in_title = True
+        elif tag in SKIP_TAGS:
+            self.skip += 1
+        elif tag in BLOCK_TAGS:
+            self.parts.append("\n")
+
+    def handle_endtag(self, tag):
+        if tag == "title":
+            self.in_title = False
+        elif tag in SKIP_TAGS:
+            self.skip = max(0, self.skip - 1)
+        elif tag in BLOCK_TAGS:
+            self.parts.append("\n")
+
+    def handle_data(self, data):
+        if self.in_title:
+            self.title += data
+        elif not self.skip:
+            self.parts.append(data)
+
+    def text(self):
+        return re.sub(r'[ \t\r\f\v]*\n\s*', '\n', re.sub(r'[ \t\r\f\v]+', ' ', "".join(self.parts))).strip()
+
+
+def extract(path):
+    """(title, [(page or None, text), ...]) for an HTML file or a PDF (one entry per page)."""
+    if path.lower().endswith(".pdf"):
+        # Through the references cache, so each PDF version is parsed once for both
+        data = references.extract_all([path]).get(path)
+        if data is None:
+            raise ValueError("PDF could not be parsed")
+        return data["title"], list(enumerate(data["text"], start=1))
+    parser = TextExtractor()
+    with open(path, 'r', encoding='utf-8') as f:
+        parser.feed(f.read())
+    return parser.title.strip() or os.path.basename(path), [(None, parser.text())]
+
+
+def tokens(text):
+    """(term, offset) for each word in text; terms are lowercased."""
+    return [(m.group().lower(), m.start()) for m in TOKEN_RE.finditer(text)]
+
+
+def build_segment(path):
+    title, pages = extract(path)
+    units, postings = [], {}
+    for unit, (page, text) in enumerate(pages):
+        words = tokens(text)
+        units.append({"page": page, "text": text, "length": len(words)})
+        for term, offset in words:
+            entry = postings.setdefault(term, {}).setdefault(unit, [])
+            entry.append(offset)
+    # term -> [[unit, first offset, gap, gap, ...], ...]
+    encoded = {}
+    for term, by_unit in postings.items():
+        encoded[term] = [[unit, offsets[0], *(b - a for a, b in zip(offsets, offsets[1:]))]
+                         for unit, offsets in by_unit.items()]
+    return {"title": title, "units": units, "postings": encoded}
+
+
+def write_json(path, data):
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, 'w', encoding='utf-8') as f:
+        json.dump(data, f, separators=(',', ':'))
+    os.replace(tmp, path)
+
+
+def load_manifest():
+    try:
+        with open(MANIFEST, 'r', encoding='utf-8') as f:
+            manifest = json.load(f)
+    except (FileNotFoundError, ValueError):
+        return {"version": INDEX_VERSION, "files": {}}
+    if manifest.get("version") != INDEX_VERSION:
+        return {"version": INDEX_VERSION, "files": {}}
+    return manifest
+
+
+def source_files():
+    return sorted({path for pattern in SOURCES for path in glob.glob(os.path.join(REPO_ROOT, pattern))})
+
+
+def update(verbose=False):
+    """
+    Brings the index up to date with the source files and returns the
+    manifest's "files" entry. Returns without writing anything when no
+    file's size or mtime changed.
+    """
+    manifest = load_manifest()
+    old, new = manifest["files"], {}
+    changed = False
+    for full in source_files():
+        path = os.path.relpath(full, REPO_ROOT)
+        st = os.stat(full)
+        entry = old.get(path)
+        # A segment that went missing (cleared cache, damaged manifest) is rebuilt
+        if entry and entry["size"] == st.st_size and entry["mtime_ns"] == st.st_mtime_ns \
+                and os.path.exists(os.path.join(INDEX_DIR, entry["segment"])):
+            new[path] = entry
+            continue
+        changed = True
+        digest = store.file_digest(full)
+        segment = f"{digest[:32]}-v{INDEX_VERSION}.json"
+        if not os.path.exists(os.path.join(INDEX_DIR, segment)):
+            start = time.perf_counter()
+            try:
+                data = build_segment(full)
+            except Exception as e:
+                # Left out of the manifest, so the next update tries again
+                print(f"Warning: not indexing {path} ({e})")
+                continue
+            os.makedirs(INDEX_DIR, exist_ok=True)
+            write_json(os.path.join(INDEX_DIR, segment), data)
+            if verbose:
+                print(f"  indexed  {path} ({len(data['units'])} units, {len(data['postings'])} terms)"
+                      f" in {time.perf_counter() - start:.2f}s")
+        new[path] = {"sha256": digest, "size": st.st_size, "mtime_ns": st.st_mtime_ns, "segment": segment}
+    changed = changed or set(new) != set(old)
+    if changed:
+        os.makedirs(INDEX_DIR, exist_ok=True)
+        # Not while loaded() reads the old manifest's segments
+        with _lock:
+            write_json(MANIFEST, {"version": INDEX_VERSION, "files": new})
+            live = {entry["segment"] for entry in new.values()}
+            for name in os.listdir(INDEX_DIR):
+                if name.endswith(".json") and name != os.path.basename(MANIFEST) and name not in live:
+                    os.remove(os.path.join(INDEX_DIR, name))
+    if verbose:
+        print(f"Search index: {len(new)} files in {INDEX_DIR}" + ("" if changed else " (up to date)"))
+    return new
+
+
+class Index:
+    """The segments of one manifest, merged in memory for querying."""
+
+    def __init__(self, files):
+        self.files = files
+        # doc = (path, title, units); postings: term -> [(doc, unit, [offsets])]
+        self.docs, self.postings = [], {}
+        for path in sorted(files):
+            with open(os.path.join(INDEX_DIR, files[path]["segment"]), 'r', encoding='utf-8') as f:
+                segment = json.load(f)
+            doc = len(self.docs)
+            self.docs.append((path, segment["title"], segment["units"]))
+            for term, entries in segment["postings"].items():
+                target = self.postings.setdefault(term, [])
+                for unit, first, *gaps in entries:
+                    offsets = [first]
+                    for gap in gaps:
+                        offsets.append(offsets[-1] + gap)
+                    target.append((doc, unit, offsets))
+        self.terms = sorted(self.postings)
+        self.unit_count = sum(len(units) for _, _, units in self.docs)
+        self.average_length = sum(u["length"] for _, _, units in self.docs for u in units) / max(self.unit_count, 1)
+
+    def expand(self, term):
+        """Index terms a query term stands for: itself, or every term it prefixes if it ends in *."""
+        if not term.endswith("*"):
+            return [term] if term in self.postings else []
+        prefix = term[:-1]
+        start = bisect.bisect_left(self.terms, prefix)
+        end = bisect.bisect_left(self.terms, prefix + "\U0010ffff")
+        return self.terms[start:end]
+
+    def search(self, query, limit=20):
+        """
+        {"query", "total", "results": [{"path", "title", "page", "score",
+        "snippet"}]} for the units containing every query term, best first.
+        """
+        words = [w.lower() for w in re.findall(r'\w+\*?', query)]
+        if not words:
+            return {"query": query, "total": 0, "results": []}
+        scores, hits = None, {}
+        for word in words:
+            # (doc, unit) -> BM25 contribution of this query word, summed over its expansions
+            word_scores = {}
+            for term in self.expand(word):
+                entries = self.postings[term]
+                idf = math.log(1 + (self.unit_count - len(entries) + 0.5) / (len(entries) + 0.5))
+                for doc, unit, offsets in entries:
+                    length = self.docs[doc][2][unit]["length"]
+                    tf = len(offsets)
+                    score = idf * tf * (K1 + 1) / (tf + K1 * (1 - B + B * length / self.average_length))
+                    word_scores[doc, unit] = word_scores.get((doc, unit), 0) + score
+                    hits.setdefault((doc, unit), []).append((offsets[0], term))
+            if scores is None:
+                scores = word_scores
+            else:
+                scores = {key: scores[key] + s for key, s in word_scores.items() if key in scores}
+            if not scores:
+                break
+
+        ranked = sorted(scores.items(), key=lambda item: -item[1])
+        results = []
+        for (doc, unit), score in ranked[:limit]:
+            path, title, units = self.docs[doc]
+            matched = {term for _, term in hits[doc, unit]}
+            results.append({"path": path, "title": title, "page": units[unit]["page"], "score": round(score, 3),
+                            "snippet": snippet(units[unit]["text"], min(hits[doc, unit])[0], matched)})
+        return {"query": query, "total": len(ranked), "results": results}
+
+
+def snippet(text, offset, terms):
+    """HTML-escaped text around offset, cut at word boundaries, with every matched term in <mark>."""
+    start, end = max(0, offset - SNIPPET_BEFORE), min(len(text), offset + SNIPPET_AFTER)
+    if start > 0:
+        start = text.find(" ", start, offset) + 1 or start
+    if end < len(text):
+        cut = text.rfind(" ", offset, end)
+        end = cut if cut > 0 else end
+    window, parts, pos = text[start:end], [], 0
+    for m in TOKEN_RE.finditer(window):
+        if m.group().lower() in terms:
+            parts.append(html.escape(window[pos:m.start()]))
+            parts.append(f"<mark>{html.escape(m.group())}</mark>")
+            pos = m.end()
+    parts.append(html.escape(window[pos:]))
+    prefix = "… " if start > 0 else ""
+    suffix = " …" if end < len(text) else ""
+    return prefix + " ".join("".join(parts).split()) + suffix
+
+
+_current = None
+# Held by update() while it swaps the manifest and sweeps superseded segments, and by loaded()
+# while it reads them, so a search never opens a segment that is being removed; also guards _current
+_lock = threading.Lock()
+
+
+def current():
+    """Brings the index up to date (update()) and returns it, reloaded only when the manifest changed."""
+    return loaded(update())
+
+
+def loaded(files=None):
+    """
+    The Index of the manifest as it stands, without looking at the sources:
+    for request handlers, which must not stat, extract or sweep segments.
+    Reloaded when the manifest changed (after current() or `search.py index`).
+    """
+    global _current
+    with _lock:
+        files = load_manifest()["files"] if files is None else files
+        if _current is None or _current.files != files:
+            _current = Index(files)
+        return _current
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Full-text search over the report, paper and reference PDFs")
+    sub = parser.add_subparsers(dest="command", required=True)
+    sub.add_parser("index", help="bring the index up to date")
+    p = sub.add_parser("query", help="search the index")
+    p.add_argument("terms", nargs="+")
+    p.add_argument("--limit", type=int, default=10)
+    args = parser.parse_args()
+
+    if args.command == "index":
+        update(verbose=True)
+        return
+    index = current()
+    start = time.perf_counter()
+    found = index.search(" ".join(args.terms), args.limit)
+    print(f"{found['total']} matches in {(time.perf_counter() - start) * 1000:.1f} ms")
+    for result in found["results"]:
+        where = result["path"] + (f" p.{result['page']}" if result["page"] else "")
+        text = re.sub(r'</?mark>', '*', html.unescape(result["snippet"]))
+        print(f"  {result['score']:6.2f}  {where}\n          {text}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,63 @@
+# Report section markers, as a configuration table.
+# Each row: (heading marker, heading text prefix, section title, section type)
+#   - a title of None keeps the heading's own text (used for chapters)
+#   - type is "special" (front matter), "chapter" or "ref"
+# Adding a section type is a new row here; the parsers don't change.
+SECTION_TABLE = [
+    ("##", "Title Page", "Title Page", "special"),
+    ("##", "Certificate", "Certificate", "special"),
+    ("##", "Acknowledgement", "Acknowledgement", "special"),
+    ("##", "Index", "Table of Contents", "special"),
+    ("##", "Table of Contents", "Table of Contents", "special"),
+    ("##", "Abstract", "Abstract", "special"),
+    ("##", "List of Figures", "List of Figures", "special"),
+    ("##", "List of Tables", "List of Tables", "special"),
+    ("#", "Chapter", None, "chapter"),
+    ("#", "References", "References", "ref"),
+]
+
+_END = object()  # trie key marking a complete prefix
+
+
+def build_trie(table):
+    """
+    Builds {marker: character trie of heading prefixes}. Looking a line up walks
+    at most len(longest prefix) characters, however many rows the table has.
+    """
+    tries = {}
+    for marker, prefix, title, section_type in table:
+        node = tries.setdefault(marker, {})
+        for ch in prefix:
+            node = node.setdefault(ch, {})
+        node[_END] = (title, section_type)
+    return tries
+
+
+SECTION_TRIE = build_trie(SECTION_TABLE)
+
+
+def classify_line(line, trie=SECTION_TRIE):
+    """
+    Returns (type, title) for a line that opens a report section, or None for
+    ordinary content. The longest configured prefix wins.
+    """
+    if not line.startswith("#"):
+        return None
+    marker, _, text = line.partition(" ")
+    node = trie.get(marker)
+    if node is None:
+        return None
+
+    found = node.get(_END)
+    for ch in text:
+        node = node.get(ch)
+        if node is None:
+            break
+        found = node.get(_END, found)
+    if found is None:
+        return None
+
+    title, section_type = found
+    if title is None:
+        title = line.strip("# ").strip()
+    return section_type, title
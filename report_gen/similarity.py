@@ -0,0 +1,307 @@
+"""
+Overlap check of report text against the reference papers, before submission.
+
+Text is cut into windows of WINDOW words (half-overlapping, within a
+paragraph for reports), each window into word SHINGLE-grams, and every
+window gets a MinHash signature of NUM_PERM values. Bands of ROWS signature
+values are LSH bucket keys, so a report window is only compared with the
+reference windows it shares a bucket with instead of with all of them;
+those candidates are then scored by the exact Jaccard similarity of their
+shingles.
+
+Signatures are cached per source file version under .cache/similarity (the
+reference PDFs' text comes from the references cache), and the merged LSH
+index over all references is kept in lsh.json until the reference set
+changes. Checking unchanged reports again only loads their cached signatures.
+
+    python report_gen/similarity.py                    # project report, ATTENDRO-REPORT chapters, paper
+    python report_gen/similarity.py other/report.md    # any markdown or HTML reports
+    python report_gen/similarity.py --threshold 0.2    # report weaker overlaps too
+"""
+import argparse
+import glob
+import json
+import os
+import random
+import re
+import sys
+import time
+import zlib
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from report_gen import patterns, references, search, store
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+CACHE_DIR = os.path.join(REPO_ROOT, "report_gen", ".cache", "similarity")
+LSH_FILE = os.path.join(CACHE_DIR, "lsh.json")
+# Part of every cache name; bump when any parameter below changes
+SIMILARITY_VERSION = "2"
+SHINGLE = 5
+WINDOW = 50
+STEP = 25
+# Paragraphs shorter than this (headings, captions, table cells) aren't checked
+MIN_WORDS = 20
+# BANDS * ROWS == NUM_PERM; 16 bands of 2 rows make pairs from about 0.25 Jaccard up likely candidates
+NUM_PERM = 32
+BANDS = 16
+ROWS = 2
+# Exact Jaccard at which a candidate pair is reported
+THRESHOLD = 0.3
+PRIME = (1 << 31) - 1
+# Fixed seed: signatures are persisted, so the permutations must not change between runs
+_rng = random.Random(20250101)
+PERMUTATIONS = [(_rng.randrange(1, PRIME), _rng.randrange(PRIME)) for _ in range(NUM_PERM)]
+# Checked when no paths are given
+DEFAULT_REPORTS = [
+    "project-report/ATTENDRO_PROJECT_REPORT.md",
+    "ATTENDRO-REPORT/Chapter-*.html",
+    "ATTENDRO-REPORT/Research-paper/Attendro_Research_Paper_IRJMETS.html",
+]
+# Heading the checked text of an HTML report stops at: "References", "VIII. REFERENCES", "7 Bibliography"
+REFERENCES_HEADING_RE = re.compile(r'^(?:[IVXLC\d]+\.?\s*)?(?:references|bibliography)$', re.IGNORECASE)
+MARKDOWN_NOISE_RE = re.compile(r'!\[[^\]]*\]\([^)]*\)|\]\([^)]*\)|<[^>]+>')
+
+
+def words(text):
+    return search.TOKEN_RE.findall(text.lower())
+
+
+def shingles(ws):
+    """crc32 of every SHINGLE-word run in ws (the whole of ws if it is shorter)."""
+    if len(ws) <= SHINGLE:
+        return {zlib.crc32(" ".join(ws).encode("utf-8"))}
+    return {zlib.crc32(" ".join(ws[i:i + SHINGLE]).encode("utf-8")) for i in range(len(ws) - SHINGLE + 1)}
+
+
+def signatures(ws, windows):
+    """
+    MinHash signature of each (start, end) word window of ws. Each permutation
+    is applied once per shingle position of ws, and a window's value is the
+    minimum over its slice, so overlapping windows share the hashing.
+    """
+    if len(ws) <= SHINGLE:
+        hashes, bounds = list(shingles(ws)), [(0, 1)] * len(windows)
+    else:
+        hashes = [zlib.crc32(" ".join(ws[i:i + SHINGLE]).encode("utf-8")) for i in range(len(ws) - SHINGLE + 1)]
+        # Window [start, end) holds the shingles that start in [start, end - SHINGLE]
+        bounds = [(start, max(start + 1, end - SHINGLE + 1)) for start, end in windows]
+    sigs = [[] for _ in windows]
+    for a, b in PERMUTATIONS:
+        values = [(a * x + b) % PRIME for x in hashes]
+        for sig, (lo, hi) in zip(sigs, bounds):
+            sig.append(min(values[lo:hi]))
+    return sigs
+
+
+def band_keys(sig):
+    """One int per band: the band's ROWS values packed together (31 bits each), so no hashing is needed."""
+    keys = []
+    for band in range(BANDS):
+        key = 0
+        for value in sig[band * ROWS:(band + 1) * ROWS]:
+            key = key << 31 | value
+        keys.append(key)
+    return keys
+
+
+def spans(count):
+    """(start, end) word windows over count words, half-overlapping, the last one flush with the end."""
+    if count <= WINDOW:
+        return [(0, count)]
+    starts = list(range(0, count - WINDOW, STEP)) + [count - WINDOW]
+    return [(start, start + WINDOW) for start in starts]
+
+
+def jaccard(a, b):
+    return len(a & b) / len(a | b) if a and b else 0.0
+
+
+def report_passages(path):
+    """[(label, text)] of the paragraphs a report's checked sections are made of."""
+    if path.endswith(".md"):
+        from report_gen import build_report_v3
+        with open(path, 'r', encoding='utf-8') as f:
+            md_text = f.read()
+        passages = []
+        for section in build_report_v3.parse_sections(build_report_v3.process_markdown_content(md_text)):
+            # Front matter is boilerplate, and the reference list is meant to match the papers
+            if not section["title"].startswith("Chapter"):
+                continue
+            body = patterns.CODE_FENCE_RE.sub("", section["content"])
+            for number, block in enumerate(re.split(r'\n\s*\n', body), start=1):
+                passages.append((f"{section['title']} ¶{number}", MARKDOWN_NOISE_RE.sub(" ", block)))
+        return passages
+    parser = search.TextExtractor()
+    with open(path, 'r', encoding='utf-8') as f:
+        parser.feed(f.read())
+    title = parser.title.strip() or os.path.basename(path)
+    passages = []
+    for number, line in enumerate(parser.text().split("\n"), start=1):
+        # The bibliography is meant to match the papers' own reference lists
+        if REFERENCES_HEADING_RE.match(line.strip()):
+            break
+        passages.append((f"{title} ¶{number}", line))
+    return passages
+
+
+def passage_segment(passages):
+    """{"passages": [label, ...], "windows": [[passage, start, end]], "bands": [[key] * BANDS]}"""
+    labels, windows, bands = [], [], []
+    for label, text in passages:
+        ws = words(text)
+        if len(ws) < MIN_WORDS:
+            continue
+        passage_spans = spans(len(ws))
+        windows.extend([len(labels), start, end] for start, end in passage_spans)
+        bands.extend(band_keys(sig) for sig in signatures(ws, passage_spans))
+        labels.append(label)
+    return {"passages": labels, "windows": windows, "bands": bands}
+
+
+def reference_words(entry):
+    """(words, page of each word) over all pages of a reference."""
+    ws, pages = [], []
+    for page, text in enumerate(references.page_text(entry), start=1):
+        page_words = words(text)
+        ws.extend(page_words)
+        pages.extend([page] * len(page_words))
+    return ws, pages
+
+
+def reference_segment(entry):
+    ws, _ = reference_words(entry)
+    ref_spans = spans(len(ws))
+    return {"passages": [entry["key"]], "windows": [[0, start, end] for start, end in ref_spans],
+            "bands": [band_keys(sig) for sig in signatures(ws, ref_spans)]}
+
+
+def cached_segment(digest, build):
+    """The segment cached for a source version, or build() stored under it."""
+    path = os.path.join(CACHE_DIR, f"{digest[:32]}-v{SIMILARITY_VERSION}.json")
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (FileNotFoundError, ValueError):
+        pass
+    segment = build()
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, 'w', encoding='utf-8') as f:
+        json.dump(segment, f, separators=(',', ':'))
+    os.replace(tmp, path)
+    return segment
+
+
+class ReferenceIndex:
+    """LSH buckets over the windows of every reference in the dataset."""
+
+    def __init__(self, entries=None):
+        self.entries = {entry["key"]: entry for entry in (entries or references.load())}
+        stamp = {key: entry["sha256"] for key, entry in self.entries.items()}
+        try:
+            with open(LSH_FILE, 'r', encoding='utf-8') as f:
+                saved = json.load(f)
+        except (FileNotFoundError, ValueError):
+            saved = {}
+        if saved.get("version") == SIMILARITY_VERSION and saved.get("references") == stamp:
+            self.windows = saved["windows"]
+            self.buckets = [{int(k): ids for k, ids in band.items()} for band in saved["buckets"]]
+            return
+
+        # (reference key, start, end) per window; buckets[band][key] -> window ids
+        self.windows, self.buckets = [], [{} for _ in range(BANDS)]
+        for key, entry in sorted(self.entries.items()):
+            segment = cached_segment(entry["sha256"], lambda: reference_segment(entry))
+            for (_, start, end), keys in zip(segment["windows"], segment["bands"]):
+                for band, bucket_key in enumerate(keys):
+                    self.buckets[band].setdefault(bucket_key, []).append(len(self.windows))
+                self.windows.append([key, start, end])
+        os.makedirs(CACHE_DIR, exist_ok=True)
+        tmp = f"{LSH_FILE}.{os.getpid()}.tmp"
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump({"version": SIMILARITY_VERSION, "references": stamp, "windows": self.windows,
+                       "buckets": self.buckets}, f, separators=(',', ':'))
+        os.replace(tmp, LSH_FILE)
+
+    def candidates(self, keys):
+        """Reference window ids sharing at least one band with a window's band keys."""
+        found = set()
+        for band, bucket_key in enumerate(keys):
+            found.update(self.buckets[band].get(bucket_key, ()))
+        return found
+
+
+def check_segment(index, segment, passages, threshold=THRESHOLD, ref_words=None):
+    """
+    Overlaps between one report (its segment and passages) and the references:
+    [{"passage", "reference", "page", "score", "excerpt", "source"}], at most
+    one per passage and reference (the best window pair), best first.
+    ref_words caches reference_words() across reports.
+    """
+    ref_words = {} if ref_words is None else ref_words
+    texts = dict(passages)
+    passage_words = {}
+    best = {}
+    for (passage, start, end), keys in zip(segment["windows"], segment["bands"]):
+        found = index.candidates(keys)
+        if not found:
+            continue
+        label = segment["passages"][passage]
+        if label not in passage_words:
+            passage_words[label] = words(texts[label])
+        mine = shingles(passage_words[label][start:end])
+        for window in found:
+            key, ref_start, ref_end = index.windows[window]
+            if key not in ref_words:
+                ref_words[key] = reference_words(index.entries[key])
+            ws, pages = ref_words[key]
+            score = jaccard(mine, shingles(ws[ref_start:ref_end]))
+            if score >= threshold and score > best.get((label, key), {}).get("score", 0):
+                best[label, key] = {
+                    "passage": label, "reference": key, "page": pages[ref_start] if pages else None,
+                    "score": round(score, 3),
+                    "excerpt": " ".join(passage_words[label][start:end]),
+                    "source": " ".join(ws[ref_start:ref_end]),
+                }
+    return sorted(best.values(), key=lambda overlap: -overlap["score"])
+
+
+def default_reports():
+    return sorted({path for pattern in DEFAULT_REPORTS for path in glob.glob(os.path.join(REPO_ROOT, pattern))})
+
+
+def check(paths, threshold=THRESHOLD):
+    """{path: overlaps} for each report file; signatures come from the cache when the file is unchanged."""
+    index = ReferenceIndex()
+    ref_words, results = {}, {}
+    for path in paths:
+        passages = report_passages(path)
+        segment = cached_segment(store.file_digest(path), lambda: passage_segment(passages))
+        results[path] = check_segment(index, segment, passages, threshold, ref_words)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="MinHash/LSH overlap check of reports against the reference PDFs")
+    parser.add_argument("paths", nargs="*", help="markdown or HTML reports (default: the Attendro reports)")
+    parser.add_argument("--threshold", type=float, default=THRESHOLD,
+                        help=f"Jaccard similarity to report (default {THRESHOLD})")
+    args = parser.parse_args()
+    paths = args.paths or default_reports()
+
+    start = time.perf_counter()
+    results = check(paths, args.threshold)
+    found = 0
+    for path, overlaps in results.items():
+        for overlap in overlaps:
+            found += 1
+            print(f"{overlap['score']:.2f}  {os.path.relpath(path, REPO_ROOT)}: {overlap['passage']}"
+                  f"  ~  {overlap['reference']} p.{overlap['page']}")
+            print(f"      report:    {overlap['excerpt'][:150]}")
+            print(f"      reference: {overlap['source'][:150]}")
+    print(f"{found} overlaps at Jaccard >= {args.threshold} in {len(paths)} reports "
+          f"({time.perf_counter() - start:.2f}s)")
+
+
+if __name__ == "__main__":
+    main()
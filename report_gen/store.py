@@ -0,0 +1,297 @@
+"""
+Content-addressed store for generated outputs (PDF, DOCX, HTML, thumbnails).
+
+A build computes a key from all of its inputs (input_key), asks the store to
+check that key out, and only builds on a miss; afterwards it commits the
+files it wrote under that key. Files are stored once per content hash, and
+the well-known output paths are hard links to the stored objects, so
+switching back to an earlier source restores its outputs without rebuilding
+or copying. Least recently used entries are evicted once the store exceeds
+its size budget. Every change to the index happens under a file lock on a
+freshly read copy, so builds running side by side (report.py build -j)
+keep each other's entries.
+
+    python report_gen/store.py stats
+    python report_gen/store.py gc --budget 200   # MB
+"""
+import argparse
+import ast
+import contextlib
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import time
+
+try:
+    import fcntl
+except ImportError:  # Windows: builds there run one at a time
+    fcntl = None
+
+STORE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), ".cache", "artifacts")
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+INDEX_FILE = "index.json"
+LOCK_FILE = "index.lock"
+# Modules that only pass a build elsewhere (the render daemon and its queue); left out of code_files() keys
+HANDOFF_MODULES = ("report_gen/daemon.py", "report_gen/jobs.py")
+# Size budget for stored objects, in bytes
+BUDGET_BYTES = 512 * 1024 * 1024
+# Part of every key; bump to invalidate all stored outputs at once
+TEMPLATE_VERSION = "1"
+# Set to skip reuse (outputs are still stored), e.g. to check reproducibility
+DISABLE_ENV = "REPORT_NO_STORE"
+
+
+def input_key(*parts):
+    """
+    sha256 over the given inputs (str or bytes), length-prefixed so boundaries
+    count. SOURCE_DATE_EPOCH is always included since it changes output metadata.
+    """
+    h = hashlib.sha256(TEMPLATE_VERSION.encode("utf-8"))
+    for part in (os.environ.get("SOURCE_DATE_EPOCH", ""),) + parts:
+        data = part if isinstance(part, bytes) else str(part).encode("utf-8")
+        h.update(len(data).to_bytes(8, "big"))
+        h.update(data)
+    return h.hexdigest()
+
+
+def read_files(paths):
+    """Contents of each path (b"" for a missing file), for use as input_key() parts."""
+    contents = []
+    for path in paths:
+        try:
+            with open(path, 'rb') as f:
+                contents.append(f.read())
+        except FileNotFoundError:
+            contents.append(b"")
+    return contents
+
+
+def local_module(name):
+    """Path of a module of this repository (report_gen.toc, split_report), or None for anything else."""
+    base = os.path.join(REPO_ROOT, *name.split("."))
+    for path in (base + ".py", os.path.join(base, "__init__.py")):
+        if os.path.isfile(path):
+            return path
+    return None
+
+
+def code_files(*scripts, skip=()):
+    """
+    The given Python files plus every module of this repository they import,
+    directly or through each other (function-level imports included), as
+    sorted absolute paths. A build's key reads these, so editing any code
+    that shapes its output invalidates the stored result. skip lists
+    repo-relative modules that don't take part in the output.
+    """
+    seen = {os.path.join(REPO_ROOT, path) for path in skip}
+    todo = [os.path.abspath(path) for path in scripts]
+    while todo:
+        path = todo.pop()
+        if path in seen:
+            continue
+        seen.add(path)
+        with open(path, 'r', encoding='utf-8') as f:
+            tree = ast.parse(f.read(), path)
+        for node in ast.walk(tree):
+            if isinstance(node, ast.Import):
+                names = [alias.name for alias in node.names]
+            elif isinstance(node, ast.ImportFrom) and node.module and not node.level:
+                # from report_gen import toc -> report_gen.toc (or report_gen itself)
+                names = [node.module] + [f"{node.module}.{alias.name}" for alias in node.names]
+            else:
+                continue
+            todo += [found for found in map(local_module, names) if found and found not in seen]
+    return sorted(seen - {os.path.join(REPO_ROOT, path) for path in skip})
+
+
+def package_version(name):
+    """Installed version of a distribution without importing it ("" when it isn't installed)."""
+    from importlib import metadata
+    try:
+        return metadata.version(name)
+    except metadata.PackageNotFoundError:
+        return ""
+
+
+def file_digest(path):
+    h = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def link_or_copy(src, dest):
+    """Points dest at src (hard link, copy across filesystems), replacing dest atomically."""
+    # rename() between two links to the same file is a no-op, so check first
+    if os.path.exists(dest) and os.path.samefile(src, dest):
+        return
+    os.makedirs(os.path.dirname(dest) or ".", exist_ok=True)
+    tmp = f"{dest}.{os.getpid()}.tmp"
+    try:
+        os.link(src, tmp)
+    except OSError:
+        shutil.copyfile(src, tmp)
+    os.replace(tmp, dest)
+
+
+def detach(paths):
+    """
+    Unlinks outputs that are hard links into the store, so a build that rewrites
+    them in place (open(path, 'wb')) gets a fresh file instead of altering an object.
+    """
+    for path in paths:
+        members = [os.path.join(d, name) for d, _, names in os.walk(path) for name in names] \
+            if os.path.isdir(path) else [path]
+        for member in members:
+            if os.path.isfile(member) and os.stat(member).st_nlink > 1:
+                os.remove(member)
+
+
+class ArtifactStore:
+    """
+    index.json maps key -> {"files": {repo-relative path: sha256}, "dirs": [...],
+    "used": last checkout/commit time}. Objects live at objects/<aa>/<sha256>.
+    """
+
+    def __init__(self, root=STORE_DIR, budget=BUDGET_BYTES):
+        self.root = root
+        self.budget = budget
+        self.index_path = os.path.join(root, INDEX_FILE)
+        self.index = self.load_index()
+
+    def load_index(self):
+        try:
+            with open(self.index_path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (FileNotFoundError, ValueError):
+            return {}
+
+    @contextlib.contextmanager
+    def locked(self):
+        """Holds the store's lock with the index freshly read; changes are saved by the caller."""
+        os.makedirs(self.root, exist_ok=True)
+        with open(os.path.join(self.root, LOCK_FILE), 'a') as lock:
+            if fcntl:
+                fcntl.flock(lock, fcntl.LOCK_EX)
+            try:
+                self.index = self.load_index()
+                yield
+            finally:
+                if fcntl:
+                    fcntl.flock(lock, fcntl.LOCK_UN)
+
+    def object_path(self, digest):
+        return os.path.join(self.root, "objects", digest[:2], digest)
+
+    def save_index(self):
+        os.makedirs(self.root, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=self.root, suffix=".json")
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            json.dump(self.index, f, indent=1, sort_keys=True)
+        os.replace(tmp, self.index_path)
+
+    def checkout(self, key):
+        """
+        Restores the outputs stored under key to their paths. Returns False (and
+        touches nothing) on a miss or if a stored object is missing or damaged.
+        """
+        if os.environ.get(DISABLE_ENV) or key not in self.load_index():
+            return False
+        with self.locked():
+            entry = self.index.get(key)
+            if entry is None:
+                return False
+            for digest in entry["files"].values():
+                obj = self.object_path(digest)
+                # A hard-linked output rewritten in place would change the object too
+                if not os.path.exists(obj) or file_digest(obj) != digest:
+                    del self.index[key]
+                    self.save_index()
+                    return False
+
+            for rel in entry.get("dirs", []):
+                shutil.rmtree(os.path.join(REPO_ROOT, rel), ignore_errors=True)
+            for rel, digest in entry["files"].items():
+                link_or_copy(self.object_path(digest), os.path.join(REPO_ROOT, rel))
+            entry["used"] = time.time()
+            self.save_index()
+        return True
+
+    def commit(self, key, paths):
+        """
+        Stores the files at paths (directories are taken whole) under key. Each
+        file is replaced by a link to its object, so identical outputs share one copy.
+        """
+        files, dirs = {}, []
+        # Under the lock, so another build's eviction can't drop an object between linking and indexing it
+        with self.locked():
+            for path in paths:
+                if os.path.isdir(path):
+                    dirs.append(os.path.relpath(os.path.abspath(path), REPO_ROOT))
+                    members = [os.path.join(d, name) for d, _, names in os.walk(path) for name in names]
+                elif os.path.exists(path):
+                    members = [path]
+                else:
+                    continue
+                for member in sorted(members):
+                    digest = file_digest(member)
+                    obj = self.object_path(digest)
+                    if not os.path.exists(obj):
+                        link_or_copy(member, obj)
+                    link_or_copy(obj, member)
+                    files[os.path.relpath(os.path.abspath(member), REPO_ROOT)] = digest
+
+            self.index[key] = {"files": files, "dirs": dirs, "used": time.time()}
+            self.evict()
+            self.save_index()
+
+    def object_sizes(self):
+        sizes = {}
+        for entry in self.index.values():
+            for digest in entry["files"].values():
+                if digest not in sizes and os.path.exists(self.object_path(digest)):
+                    sizes[digest] = os.path.getsize(self.object_path(digest))
+        return sizes
+
+    def evict(self, budget=None):
+        """Drops least recently used entries, and objects no entry needs, until under budget. Call under locked()."""
+        budget = self.budget if budget is None else budget
+        sizes = self.object_sizes()
+        total = sum(sizes.values())
+        for key in sorted(self.index, key=lambda k: self.index[k]["used"]):
+            if total <= budget or len(self.index) == 1:
+                break
+            del self.index[key]
+            live = {d for entry in self.index.values() for d in entry["files"].values()}
+            for digest in [d for d in sizes if d not in live]:
+                # Outputs linked to this object keep their data; only the store's name goes
+                os.remove(self.object_path(digest))
+                total -= sizes.pop(digest)
+        return total
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generated output store")
+    sub = parser.add_subparsers(dest="command", required=True)
+    sub.add_parser("stats", help="entries, objects and size")
+    p = sub.add_parser("gc", help="evict least recently used entries")
+    p.add_argument("--budget", type=float, default=BUDGET_BYTES / 2**20, help="size budget in MB")
+    args = parser.parse_args()
+
+    store = ArtifactStore()
+    if args.command == "gc":
+        with store.locked():
+            total = store.evict(int(args.budget * 2**20))
+            store.save_index()
+    else:
+        total = sum(store.object_sizes().values())
+    files = sum(len(entry["files"]) for entry in store.index.values())
+    print(f"{len(store.index)} builds, {files} output files, {len(store.object_sizes())} objects, "
+          f"{total / 2**20:.1f} MB (budget {store.budget / 2**20:.0f} MB) in {store.root}")
+
+
+if __name__ == "__main__":
+    main()
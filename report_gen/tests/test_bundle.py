@@ -0,0 +1,30 @@
+import os
+
+from report_gen import bundle
+
+
+def write(path, data):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'wb') as f:
+        f.write(data)
+
+
+def test_stylesheet_urls_resolve_against_the_stylesheet(tmp_path):
+    write(str(tmp_path / "css" / "style.css"), b"@font-face { src: url('../fonts/a.woff'); } p { background: url(img/b.png); }")
+    write(str(tmp_path / "fonts" / "a.woff"), b"font")
+    write(str(tmp_path / "css" / "img" / "b.png"), b"png")
+    page = '<html><head><link rel="stylesheet" href="css/style.css"></head><body></body></html>'
+
+    bundled = bundle.Bundler(str(tmp_path)).bundle(page)
+    assert "fonts/a.woff" not in bundled and "img/b.png" not in bundled
+    assert bundled.count("data:") == 2
+
+    # The bundle key covers the same files the bundle inlines
+    assert set(bundle.local_refs(page, str(tmp_path))) == {
+        str(tmp_path / "css" / "style.css"), str(tmp_path / "fonts" / "a.woff"), str(tmp_path / "css" / "img" / "b.png")}
+
+
+def test_rebase_url():
+    assert bundle.rebase_url("../fonts/a.woff", "css/style.css") == "fonts/a.woff"
+    assert bundle.rebase_url("#grad", "css/style.css") == "#grad"
+    assert bundle.rebase_url("a.woff", "https://cdn.example/css/x.css") == "https://cdn.example/css/a.woff"
@@ -0,0 +1,91 @@
+import os
+
+import pytest
+
+from report_gen import citations
+
+ENTRIES = {
+    "alpha": {"key": "alpha", "authors": ["Ada Lovelace"], "title": "Alpha", "venue": "Journal A", "year": 2020},
+    "beta": {"key": "beta", "authors": ["Alan Turing"], "title": "Beta", "venue": "Journal B", "year": 2021},
+}
+
+
+@pytest.fixture(autouse=True)
+def cache(monkeypatch, tmp_path):
+    monkeypatch.setattr(citations, "CACHE_FILE", str(tmp_path / "citations.json"))
+
+
+@pytest.fixture
+def bibliography(monkeypatch):
+    monkeypatch.setattr(citations, "bibliography", lambda: dict(ENTRIES))
+
+
+def read(path):
+    with open(os.path.join(citations.REPO_ROOT, path), 'r', encoding='utf-8') as f:
+        return f.read()
+
+
+def test_numbers_by_first_use(bibliography):
+    md = "# Chapter 1\n\nSee [@beta] and [@alpha; @beta].\n\n# References\n\n[1] typed by hand\n"
+    resolved = citations.resolve_markdown(md, "test")
+    assert "See [1] and [2, 1]." in resolved
+    refs = resolved.split("# References", 1)[1]
+    assert refs.index("[1] A. Turing") < refs.index("[2] A. Lovelace")
+    assert "typed by hand" not in refs
+
+
+def test_unknown_key_is_marked(bibliography):
+    assert "[gamma?]" in citations.resolve_markdown("# Chapter 1\n\n[@alpha] [@gamma]\n", "test")
+
+
+def test_document_starting_with_heading_keeps_its_first_line(bibliography):
+    md = "# Chapter 1\n\nText [@alpha].\n"
+    assert citations.resolve_markdown(md, "test") == "# Chapter 1\n\nText [1].\n"
+
+
+def test_fenced_code_is_left_as_written(bibliography):
+    md = "# Chapter 1\n\n```python\nx = [@beta]\n```\n\nText [@alpha].\n"
+    resolved = citations.resolve_markdown(md, "test")
+    assert "x = [@beta]" in resolved
+    assert "Text [1]." in resolved
+
+
+def test_html_code_is_left_as_written(bibliography):
+    parts = [("Chapter-1.html", "<p>[@alpha]</p><pre>[@beta]</pre>"),
+             ("References.html", '<div class="reference-list"></div>')]
+    (_, chapter), (_, refs) = citations.resolve_html_parts(parts, "References.html", "test")
+    assert "<pre>[@beta]</pre>" in chapter
+    assert 'href="#ref-1"' in chapter
+    assert 'id="ref-2"' not in refs
+
+
+def test_document_without_citations_is_unchanged(bibliography):
+    md = "# Chapter 1\n\nNo citations, just [1] by hand.\n"
+    assert citations.resolve_markdown(md, "test") is md
+
+
+def test_generated_list_ends_before_a_rule(bibliography):
+    resolved = citations.resolve_markdown("# Chapter 1\n\n[@alpha]\n\n# References\n\n---\nNotes\n", "test")
+    # Without the blank line, --- under the list would turn it into a setext heading
+    assert resolved.endswith('[1] A. Lovelace, "Alpha," *Journal A*, 2020.  \n\n---\nNotes\n')
+
+
+def test_project_report_cites_by_key():
+    md = read(citations.SOURCE_MD)
+    refs = md.split("\n# References", 1)[1]
+    assert not [line for line in refs.split("\n") if citations.MD_REF_ITEM_RE.match(line)], "hand-typed list is back"
+    resolved = citations.resolve_markdown(md)
+    assert "[@" not in resolved
+    generated = [line for line in resolved.split("\n# References", 1)[1].split("\n")
+                 if citations.MD_REF_ITEM_RE.match(line)]
+    assert [line.split("]")[0] + "]" for line in generated] == ["[1]", "[2]", "[3]", "[4]"]
+
+
+def test_combined_chapters_cite_by_key():
+    names = ["Chapter-2-Literature-Survey.html", "Chapter-4-Methodology.html", "References.html"]
+    parts = [(name, read(os.path.join("ATTENDRO-REPORT", name))) for name in names]
+    for name, page in parts:
+        assert not citations.TYPED_RE.findall(citations.CITE_RE.sub("", page)), f"typed number in {name}"
+    resolved = dict(citations.resolve_html_parts(parts, "References.html", "combined"))
+    assert "[@" not in "".join(resolved.values())
+    assert resolved["References.html"].count('class="reference-item"') == 5
@@ -0,0 +1,23 @@
+from report_gen.css import StyleCollector
+
+
+def test_repeated_rule_keeps_its_last_position():
+    styles = StyleCollector()
+    styles.add("p { color: red; }")
+    styles.add("p { color: blue; }")
+    styles.add("p { color: red; }")
+    # Red overrode blue last in the sources, so it must come after blue here too
+    assert styles.css() == "p { color: blue; }\np { color: red; }"
+
+
+def test_statement_at_rules_stay_first():
+    styles = StyleCollector()
+    styles.add("@import url(a.css); p { color: red; }")
+    styles.add("@import url(a.css); h1 { margin: 0; }")
+    assert styles.css().split("\n") == ["@import url(a.css);", "p { color: red; }", "h1 { margin: 0; }"]
+
+
+def test_extract_removes_style_blocks():
+    styles = StyleCollector()
+    assert styles.extract("<style>p { color: red; }</style><p>x</p>") == "<p>x</p>"
+    assert styles.render("s") == '<style id="s">\np { color: red; }\n</style>'
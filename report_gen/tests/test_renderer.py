@@ -0,0 +1,45 @@
+import os
+
+import pytest
+
+from report_gen import renderer
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def engine(name):
+    pytest.importorskip({"python-markdown": "markdown", "markdown-it": "markdown_it"}[name])
+    return renderer.ENGINES[name]()
+
+
+@pytest.mark.parametrize("name", list(renderer.ENGINES))
+@pytest.mark.parametrize("source", renderer.CONFORMANCE_SOURCES)
+def test_block_render_matches_whole_render(name, source):
+    path = os.path.join(REPO_ROOT, source)
+    if not os.path.exists(path):
+        pytest.skip(f"{source} not in this checkout")
+    with open(path, 'r', encoding='utf-8') as f:
+        text = f.read()
+    blocks = engine(name)
+    assert renderer.normalize_html(blocks.render(text)) == renderer.normalize_html(blocks.convert(text))
+
+
+def test_list_under_heading_stays_one_block():
+    # docs/START_HERE.md: items separated by blank lines, the first one right under a heading
+    text = "### What Makes Attendro Unique\n1. **One**\n   - a\n\n2. **Two**\n   - b\n\nAfter."
+    assert renderer.split_blocks(text) == [
+        "### What Makes Attendro Unique\n1. **One**\n   - a\n\n2. **Two**\n   - b",
+        "After.",
+    ]
+
+
+def test_fenced_code_stays_one_block():
+    text = "Intro.\n\n```\na\n\nb\n```\n\nOutro."
+    assert renderer.split_blocks(text) == ["Intro.", "```\na\n\nb\n```", "Outro."]
+
+
+def test_render_block_is_memoized():
+    blocks = engine("python-markdown")
+    blocks.render("One.\n\nTwo.")
+    blocks.render("One.\n\nThree.")
+    assert (blocks.hits, blocks.misses) == (1, 3)
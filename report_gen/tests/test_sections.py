@@ -0,0 +1,63 @@
+import os
+import re
+
+import pytest
+
+from report_gen import sections
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# The regex dispatch classify_line replaced, kept as the reference behaviour
+HEADING_DISPATCH_RE = re.compile(
+    r'^(?:## (?P<front>Title Page|Certificate|Acknowledgement|Index|Table of Contents'
+    r'|Abstract|List of Figures|List of Tables)'
+    r'|# (?P<main>Chapter|References))'
+)
+FRONT_MATTER_TITLES = {"Index": "Table of Contents"}
+
+
+def classify_heading(line):
+    m = HEADING_DISPATCH_RE.match(line)
+    if not m:
+        return None
+    if m.group("front"):
+        return "special", FRONT_MATTER_TITLES.get(m.group("front"), m.group("front"))
+    if m.group("main") == "References":
+        return "ref", "References"
+    return "chapter", line.strip("# ").strip()
+
+
+EDGE_CASES = [
+    "", "#", "# ", "##", "## ", "###", "### 1.1 Overview", "#Chapter 1", "##Abstract",
+    "# Chapter", "# Chapter 3: Methodology", "# Chapters", "# References", "# References and Notes",
+    "## References", "# Abstract", "## Abstract", "## Abstracts", "## Index", "## Indexing",
+    "## Table of Contents", "## Table", "## List of Figures", "## List of", "## Title Page",
+    "## Certificate of Approval", "## Acknowledgement", "Chapter 1", " # Chapter 1", "#\tChapter 1",
+]
+
+
+def report_lines():
+    path = os.path.join(REPO_ROOT, "project-report", "ATTENDRO_PROJECT_REPORT.md")
+    if not os.path.exists(path):
+        return []
+    with open(path, 'r', encoding='utf-8') as f:
+        return f.read().split("\n")
+
+
+@pytest.mark.parametrize("line", EDGE_CASES)
+def test_classify_line_matches_regex_dispatch(line):
+    assert sections.classify_line(line) == classify_heading(line)
+
+
+def test_classify_line_matches_regex_dispatch_on_report():
+    lines = report_lines()
+    if not lines:
+        pytest.skip("project report source not present")
+    assert [sections.classify_line(line) for line in lines] == [classify_heading(line) for line in lines]
+    assert any(sections.classify_line(line) for line in lines)
+
+
+def test_new_row_needs_no_parser_change():
+    trie = sections.build_trie(sections.SECTION_TABLE + [("##", "Glossary", "Glossary", "special")])
+    assert sections.classify_line("## Glossary of Terms", trie) == ("special", "Glossary")
+    assert sections.classify_line("## Glossary") is None
@@ -0,0 +1,35 @@
+import os
+
+import pytest
+
+from report_gen import similarity
+
+PAPER = os.path.join(similarity.REPO_ROOT, "ATTENDRO-REPORT", "Research-paper", "Attendro_Research_Paper_IRJMETS.html")
+
+
+@pytest.mark.parametrize("heading", ["References", "REFERENCES", "VIII. REFERENCES", "7 Bibliography"])
+def test_references_heading_matches_numbered_headings(heading):
+    assert similarity.REFERENCES_HEADING_RE.match(heading)
+
+
+def test_references_heading_ignores_prose():
+    assert not similarity.REFERENCES_HEADING_RE.match("See the references below.")
+
+
+def test_paper_passages_stop_at_references():
+    texts = [text for _, text in similarity.report_passages(PAPER)]
+    assert texts
+    assert not any(similarity.REFERENCES_HEADING_RE.match(text.strip()) for text in texts)
+    # The bibliography would otherwise follow as "[1] Author, ..." lines
+    assert not any(text.lstrip().startswith("[1]") for text in texts)
+
+
+def test_default_run_reports_no_bibliography_lines():
+    pytest.importorskip("pypdf")
+    if not os.path.exists(os.path.join(similarity.REPO_ROOT, "ATTENDRO-REPORT", "references.json")):
+        pytest.skip("reference dataset not built")
+    paths = similarity.default_reports()
+    checked = {path: {label for label, _ in similarity.report_passages(path)} for path in paths}
+    overlaps = similarity.check(paths)
+    # Every reported passage is one the cutoff kept; the paper's bibliography used to show up as ¶235 onwards
+    assert all(o["passage"] in checked[path] for path, results in overlaps.items() for o in results)
@@ -0,0 +1,86 @@
+import os
+
+import pytest
+
+from report_gen import store
+
+
+@pytest.fixture
+def artifacts(tmp_path):
+    return store.ArtifactStore(root=str(tmp_path / "store"), budget=1 << 20)
+
+
+def write(path, data):
+    with open(path, 'wb') as f:
+        f.write(data)
+    return str(path)
+
+
+def test_input_key_counts_part_boundaries():
+    assert store.input_key("ab", "c") != store.input_key("a", "bc")
+    assert store.input_key("a", b"b") == store.input_key("a", "b")
+
+
+def test_input_key_includes_source_date_epoch(monkeypatch):
+    monkeypatch.delenv("SOURCE_DATE_EPOCH", raising=False)
+    unset = store.input_key("x")
+    monkeypatch.setenv("SOURCE_DATE_EPOCH", "1700000000")
+    assert store.input_key("x") != unset
+
+
+def test_code_files_follows_function_level_imports():
+    files = {os.path.relpath(path, store.REPO_ROOT) for path in store.code_files(
+        os.path.join(store.REPO_ROOT, "report_gen", "build_report_v3.py"), skip=store.HANDOFF_MODULES)}
+    # Modules the PDF build reaches only through other report_gen modules count too
+    assert {"report_gen/renderer.py", "report_gen/patterns.py", "report_gen/sections.py",
+            "report_gen/thumbnails.py", "report_gen/reproducible.py", "report_gen/assets.py"} <= files
+    assert not files & set(store.HANDOFF_MODULES)
+
+
+def test_checkout_restores_committed_outputs(artifacts, tmp_path):
+    out = write(tmp_path / "report.pdf", b"pdf v1")
+    key = store.input_key("source v1")
+    assert not artifacts.checkout(key)
+    artifacts.commit(key, [out])
+
+    os.remove(out)
+    assert artifacts.checkout(key)
+    with open(out, 'rb') as f:
+        assert f.read() == b"pdf v1"
+    assert not artifacts.checkout(store.input_key("source v2"))
+
+
+def test_damaged_object_is_a_miss(artifacts, tmp_path):
+    out = write(tmp_path / "report.pdf", b"pdf v1")
+    key = store.input_key("source")
+    artifacts.commit(key, [out])
+    store.detach([out])
+    digest = artifacts.index[key]["files"][os.path.relpath(out, store.REPO_ROOT)]
+    write(artifacts.object_path(digest), b"changed in place")
+    assert not artifacts.checkout(key)
+    assert key not in artifacts.load_index()
+
+
+def test_evicts_least_recently_used(tmp_path):
+    artifacts = store.ArtifactStore(root=str(tmp_path / "store"), budget=250)
+    keys = []
+    for n in range(3):
+        out = write(tmp_path / f"out{n}.bin", bytes([n]) * 100)
+        keys.append(store.input_key(n))
+        artifacts.commit(keys[-1], [out])
+        if n == 1:
+            # Using the first entry again makes the second one the oldest
+            assert artifacts.checkout(keys[0])
+
+    index = artifacts.load_index()
+    assert set(index) == {keys[0], keys[2]}
+    assert sum(artifacts.object_sizes().values()) <= 250
+    assert not os.path.exists(artifacts.object_path(store.file_digest(str(tmp_path / "out1.bin"))))
+
+
+def test_stores_opened_side_by_side_keep_each_others_entries(tmp_path):
+    root = str(tmp_path / "store")
+    first, second = store.ArtifactStore(root=root), store.ArtifactStore(root=root)
+    first.commit("pdf", [write(tmp_path / "a.pdf", b"a")])
+    second.commit("docx", [write(tmp_path / "b.docx", b"b")])
+    assert set(store.ArtifactStore(root=root).index) == {"pdf", "docx"}
@@ -0,0 +1,104 @@
+import hashlib
+import io
+import json
+import os
+import shutil
+import subprocess
+import tempfile
+
+from report_gen import pdfopt, reproducible
+
+# Thumbnail width in pixels; height follows the page aspect ratio
+THUMB_WIDTH = 320
+INDEX_FILE = "index.json"
+
+
+def thumbnails_dir(pdf_path):
+    """report_gen/output/Attendro_Final_Report.pdf -> report_gen/output/Attendro_Final_Report_thumbs"""
+    return os.path.splitext(pdf_path)[0] + "_thumbs"
+
+
+def rasterize(pdf_bytes, width):
+    """
+    Yields PNG bytes for each page of a PDF, scaled to `width` pixels.
+    Uses pypdfium2 if installed, otherwise (or if it fails) poppler's pdftoppm.
+    """
+    try:
+        import pypdfium2 as pdfium
+    except ImportError:
+        pdfium = None
+
+    if pdfium is not None:
+        try:
+            # All pages first, so a failure part way falls back before anything is yielded
+            pngs = []
+            for page in pdfium.PdfDocument(pdf_bytes):
+                image = page.render(scale=width / page.get_width()).to_pil()
+                buf = io.BytesIO()
+                image.save(buf, format="PNG", optimize=True)
+                pngs.append(buf.getvalue())
+            yield from pngs
+            return
+        except (pdfium.PdfiumError, OSError, ValueError) as e:
+            print(f"Warning: pypdfium2 could not render the thumbnails ({e}); trying pdftoppm")
+
+    if not shutil.which("pdftoppm"):
+        raise RuntimeError("No PDF rasterizer found (pip install pypdfium2, or install poppler-utils)")
+    with tempfile.TemporaryDirectory() as tmp:
+        src = os.path.join(tmp, "doc.pdf")
+        with open(src, 'wb') as f:
+            f.write(pdf_bytes)
+        subprocess.run(["pdftoppm", "-png", "-scale-to-x", str(width), "-scale-to-y", "-1",
+                        src, os.path.join(tmp, "page")], check=True)
+        for name in sorted(n for n in os.listdir(tmp) if n.endswith(".png")):
+            with open(os.path.join(tmp, name), 'rb') as f:
+                yield f.read()
+
+
+def write_thumbnails(pdf_bytes, out_dir, width=THUMB_WIDTH):
+    """
+    Writes page-001.png, page-002.png, ... plus an index.json into out_dir.
+    The set is keyed by the PDF's hash and left alone if it is already current.
+    """
+    digest = hashlib.sha256(pdf_bytes).hexdigest()
+    index_path = os.path.join(out_dir, INDEX_FILE)
+    if os.path.exists(index_path):
+        with open(index_path, 'r', encoding='utf-8') as f:
+            index = json.load(f)
+        if index.get("pdf_sha256") == digest and index.get("width") == width:
+            return index
+
+    if os.path.isdir(out_dir):
+        shutil.rmtree(out_dir)
+    os.makedirs(out_dir)
+    pages = []
+    for number, png in enumerate(rasterize(pdf_bytes, width), start=1):
+        name = f"page-{number:03d}.png"
+        with open(os.path.join(out_dir, name), 'wb') as f:
+            f.write(png)
+        pages.append(name)
+
+    index = {"pdf_sha256": digest, "width": width, "pages": pages}
+    with open(index_path, 'w', encoding='utf-8') as f:
+        json.dump(index, f, indent=2)
+    return index
+
+
+def write_outputs(document, pdf_path, thumbs=True):
+    """
+    Emits everything from one laid-out WeasyPrint Document: the PDF, shrunk by
+    pdfopt.py, and (unless thumbs is False) a cached set of downscaled page
+    previews next to it. Honors SOURCE_DATE_EPOCH (see reproducible.py).
+    """
+    pdf_bytes = document.write_pdf(**pdfopt.WRITE_OPTIONS, **reproducible.pdf_options(document))
+    pdf_bytes, stats = pdfopt.optimize(pdf_bytes)
+    print(pdfopt.describe(stats))
+    with open(pdf_path, 'wb') as f:
+        f.write(pdf_bytes)
+    if thumbs:
+        try:
+            index = write_thumbnails(pdf_bytes, thumbnails_dir(pdf_path))
+            print(f"{len(index['pages'])} page thumbnails in {thumbnails_dir(pdf_path)}")
+        except (RuntimeError, subprocess.SubprocessError) as e:
+            print(f"Warning: skipped thumbnails ({e})")
+    return pdf_bytes
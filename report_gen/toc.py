@@ -0,0 +1,92 @@
+import html
+import re
+
+HEADING_RE = re.compile(r'<h([12])>(.*?)</h\1>', re.DOTALL)
+TAG_RE = re.compile(r'<[^>]+>')
+
+# Width reserved for a page number before layout, so the TOC pages break the
+# same way once the real numbers are filled in.
+PLACEHOLDER_PAGE = "000"
+
+TOC_CSS = """
+.toc-entry { display: flex; align-items: baseline; margin-bottom: 0; text-indent: 0; }
+.toc-entry a { color: black; text-decoration: none; }
+.toc-entry .toc-title { flex: 1; }
+.toc-entry .toc-page { min-width: 1cm; text-align: right; }
+.toc-level-1 { font-weight: bold; }
+.toc-level-2 { padding-left: 1cm; }
+.toc-level-3 { padding-left: 0; }
+"""
+
+
+def number_headings(body, start=0):
+    """
+    Gives every <h1>/<h2> an id so its page can be looked up after layout.
+    Returns (html, entries) with entries as (id, level, text) in document order.
+    Ids are numbered from start + 1, so separately numbered parts don't collide.
+    """
+    entries = []
+
+    def add_id(m):
+        anchor = f"toc-{start + len(entries) + 1}"
+        text = html.unescape(TAG_RE.sub('', m.group(2))).strip()
+        entries.append((anchor, int(m.group(1)), text))
+        return f'<h{m.group(1)} id="{anchor}">{m.group(2)}</h{m.group(1)}>'
+
+    return HEADING_RE.sub(add_id, body), entries
+
+
+def toc_html(entries, page_numbers=None):
+    rows = []
+    for anchor, level, text in entries:
+        page = page_numbers.get(anchor, "") if page_numbers else PLACEHOLDER_PAGE
+        rows.append(f'<div class="toc-entry toc-level-{level}"><a class="toc-title" href="#{anchor}">'
+                    f'{html.escape(text)}</a><span class="toc-page">{page}</span></div>')
+    return "\n".join(rows)
+
+
+def page_numbers(document):
+    """Maps every anchor id in a laid-out WeasyPrint Document to its 1-based page."""
+    numbers = {}
+    for index, page in enumerate(document.pages):
+        for anchor in page.anchors:
+            numbers.setdefault(anchor, index + 1)
+    return numbers
+
+
+def render_with_toc(html_cls, compose, boundary_anchor):
+    """
+    Lays the report out once and fills the TOC with real page numbers.
+
+    compose(page_numbers) returns (front_html, full_html): the front matter on its
+    own and the whole report, with page numbers filled in (or placeholders when
+    page_numbers is None). The full report is rendered once with placeholders;
+    only the front matter is laid out again with the real numbers, and its pages
+    replace the placeholder ones. boundary_anchor is the id of the first heading
+    after the front matter, or None when there is none (the report is laid out
+    again whole).
+
+    Returns the final Document, ready for write_pdf().
+    """
+    _, full_html = compose(None)
+    document = html_cls(string=full_html).render()
+    numbers = page_numbers(document)
+    if boundary_anchor is None:
+        # No numbered main heading to split at: from the first page on, everything is relaid
+        _, full_html = compose(numbers)
+        return html_cls(string=full_html).render()
+
+    front_count = numbers.get(boundary_anchor, 1) - 1
+    front_html, full_html = compose(numbers)
+    front = html_cls(string=front_html).render()
+    if len(front.pages) == front_count:
+        return document.copy(front.pages + document.pages[front_count:])
+
+    # The real numbers changed how the front matter paginates, which shifts every
+    # later page; only then pay for another full layout.
+    print("TOC changed front matter pagination; re-rendering full report")
+    document = html_cls(string=full_html).render()
+    if page_numbers(document) != numbers:
+        _, full_html = compose(page_numbers(document))
+        document = html_cls(string=full_html).render()
+    return document
@@ -1,6 +1,6 @@
 import os
-import re
-from markdown_it import MarkdownIt
+from report_gen import citations, patterns, renderer
+from report_gen.css import StyleCollector, scope_css
 
 # Define the source MD file and output directory
 SOURCE_MD = "project-report/ATTENDRO_PROJECT_REPORT.md"
@@ -37,40 +37,61 @@ SECTIONS = [
     ("References", "References.html")
 ]
 
+# Page-level reset written into every chapter file
+RESET_CSS = """
+/* Reset */
+body { font-family: 'Times New Roman', serif; line-height: 1.5; text-align: justify; }
+h1, h2, h3 { text-align: center; }
+p { margin-bottom: 1em; }
+table { width: 100%; border-collapse: collapse; margin: 1em 0; }
+th, td { border: 1px solid #000; padding: 5px; }
+.diagram-wrap { border: none !important; margin: 20px auto !important; width: 100% !important; }
+"""
+
 def read_diagram_content(filename):
+    """
+    Returns (css, html) for a diagram file. The CSS is scoped to a wrapper class
+    named after the file so it can't collide with the chapter or other diagrams.
+    """
     path = os.path.join(OUTPUT_DIR, filename)
     if os.path.exists(path):
         with open(path, 'r', encoding='utf-8') as f:
             content = f.read()
             # Extract the useful diagram part (usually inside diagram-wrap or just body)
             # We strip the full HTML structure to embed it
-            match = re.search(r'<div class="diagram-wrap".*?</div>\s*</div>', content, re.DOTALL) 
+            match = patterns.DIAGRAM_WRAP_OUTER_RE.search(content)
             # Looking for the outer wrapper. The diagrams usually have <div class="diagram-wrap" id="diagram"> ... </div>
             
             # If regex fails, let's try to grab just the body content but exclude scripts
             if not match:
-                match = re.search(r'<body[^>]*>(.*?)</body>', content, re.DOTALL)
+                match = patterns.BODY_RE.search(content)
             
             if match:
                 inner = match.group(0 if 'diagram-wrap' in match.group(0) else 1)
                 # Remove controls
-                inner = re.sub(r'<div class="controls">.*?</div>', '', inner, flags=re.DOTALL)
+                inner = patterns.CONTROLS_RE.sub('', inner)
                 # Remove scripts
-                inner = re.sub(r'<script.*?</script>', '', inner, flags=re.DOTALL)
+                inner = patterns.SCRIPT_RE.sub('', inner)
                 # We need to include the CSS too for it to render!
-                css_match = re.search(r'<style>(.*?)</style>', content, re.DOTALL)
+                css_match = patterns.STYLE_RE.search(content)
                 css = css_match.group(1) if css_match else ""
+                scope = "diagram-" + os.path.splitext(os.path.basename(filename))[0]
                 
-                return f"<style>{css}</style>\n<div style='page-break-inside: avoid;'>{inner}</div>"
-    return ""
+                return scope_css(css, "." + scope), f"<div class='{scope}' style='page-break-inside: avoid;'>{inner}</div>"
+    return "", ""
+
+# One parser for all sections, with rendered blocks memoized. The chapter pages have always
+# been rendered with markdown-it, which doesn't pass renderer.conformance() against the PDF/DOCX
+# engine yet; they stay on it so the engine choice can't change them (REPORT_MARKDOWN_ENGINE overrides)
+MARKDOWN = renderer.get_renderer(os.environ.get(renderer.ENGINE_ENV) or "markdown-it")
 
 def md_to_html(md_text):
-    md = MarkdownIt()
-    return md.render(md_text)
+    return MARKDOWN.render(md_text)
 
 def split_and_save():
     with open(SOURCE_MD, 'r', encoding='utf-8') as f:
         full_text = f.read()
+    full_text = citations.resolve_markdown(full_text)
 
     # Naive split by "## " or "# " depending on the file structure
     # The file uses "## Title Page" then "# Chapter-1"
@@ -85,12 +106,8 @@ def split_and_save():
         # The MD file uses "## Title Page (i)" or "# Chapter–1"
         # We need to be flexible with exact matching or substring
         
-        # Construct a regex to find the header
-        # pattern: ^#+\s*Title Page \(i\)
-        escaped_title = re.escape(section_title).replace(r'\ ', r'\s*')
-        pattern = r'(^|\n)(#+)\s*' + escaped_title
-        
-        match = re.search(pattern, current_text, re.IGNORECASE)
+        # Precompiled header regex, pattern: ^#+\s*Title Page \(i\)
+        match = patterns.section_title_re(section_title).search(current_text)
         
         if not match:
             print(f"Warning: Could not find section '{section_title}'")
@@ -102,11 +119,9 @@ def split_and_save():
         end_idx = len(current_text)
         if i < len(SECTIONS) - 1:
             next_title = SECTIONS[i+1][0]
-            escaped_next = re.escape(next_title).replace(r'\ ', r'\s*')
-            next_pattern = r'(^|\n)(#+)\s*' + escaped_next
-            next_match = re.search(next_pattern, current_text[start_idx+1:], re.IGNORECASE)
+            next_match = patterns.section_title_re(next_title).search(current_text, start_idx+1)
             if next_match:
-                end_idx = start_idx + 1 + next_match.start()
+                end_idx = next_match.start()
         
         # Extract content
         section_content_md = current_text[start_idx:end_idx]
@@ -118,11 +133,15 @@ def split_and_save():
         # We look for references like "Figure 1" in the text and append the diagram after the paragraph
         # Or just append all relevant diagrams for the chapter at the end
         
-        # For simplicity and robustness: Check which figures are mentioned and append them
+        # For simplicity and robustness: Check which figures are mentioned and append them.
+        # Diagram CSS is collected (deduplicated by hash) into one stylesheet in <head>
+        # instead of a <style> block per injected diagram.
+        styles = StyleCollector()
         for fig_name, dia_file in DIAGRAM_MAP.items():
             if fig_name in section_content_md:
                 print(f"Injecting {fig_name} into {filename}")
-                dia_html = read_diagram_content(dia_file)
+                dia_css, dia_html = read_diagram_content(dia_file)
+                styles.add(dia_css)
                 # Append to end of HTML
                 html_content += f"\n<br><hr><br>\n{dia_html}"
         
@@ -132,15 +151,8 @@ def split_and_save():
 <html>
 <head>
 <meta charset="UTF-8">
-<style>
-/* Reset */
-body {{ font-family: 'Times New Roman', serif; line-height: 1.5; text-align: justify; }}
-h1, h2, h3 {{ text-align: center; }}
-p {{ margin-bottom: 1em; }}
-table {{ width: 100%; border-collapse: collapse; margin: 1em 0; }}
-th, td {{ border: 1px solid #000; padding: 5px; }}
-.diagram-wrap {{ border: none !important; margin: 20px auto !important; width: 100% !important; }}
-</style>
+<style>{RESET_CSS}</style>
+{styles.render("shared-styles")}
 </head>
 <body>
 {html_content}